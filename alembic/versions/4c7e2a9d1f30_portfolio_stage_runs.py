@@ -0,0 +1,86 @@
+"""add portfolio_stage_runs and portfolio_state_machines.stage_attempts
+
+Revision ID: 4c7e2a9d1f30
+Revises: 8b3c5d2e9f61
+Create Date: 2026-10-18 14:05:12.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "4c7e2a9d1f30"  # pragma: allowlist secret
+down_revision = "8b3c5d2e9f61"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "portfolio_stage_runs",
+        sa.Column(
+            "time_created",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "time_updated",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "id",
+            postgresql.UUID(as_uuid=True),
+            server_default=sa.text("uuid_generate_v4()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "portfolio_state_machine_id",
+            postgresql.UUID(as_uuid=True),
+            nullable=False,
+        ),
+        sa.Column("stage", sa.String(), nullable=False),
+        sa.Column(
+            "outcome",
+            sa.Enum(
+                "FINISHED",
+                "RESET",
+                "FAILED",
+                name="stageoutcome",
+                native_enum=False,
+                create_constraint=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("attempt", sa.Integer(), nullable=False),
+        sa.Column("duration_ms", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["portfolio_state_machine_id"],
+            ["portfolio_state_machines.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_portfolio_stage_runs_portfolio_state_machine_id"),
+        "portfolio_stage_runs",
+        ["portfolio_state_machine_id"],
+        unique=False,
+    )
+    op.add_column(
+        "portfolio_state_machines",
+        sa.Column(
+            "stage_attempts", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("portfolio_state_machines", "stage_attempts")
+    op.drop_index(
+        op.f("ix_portfolio_stage_runs_portfolio_state_machine_id"),
+        table_name="portfolio_stage_runs",
+    )
+    op.drop_table("portfolio_stage_runs")
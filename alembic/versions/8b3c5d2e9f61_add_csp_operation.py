@@ -0,0 +1,36 @@
+"""add applications.csp_operation and environments.csp_operation
+
+Revision ID: 8b3c5d2e9f61
+Revises: bfdb81e51aed
+Create Date: 2026-10-18 10:12:41.302518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "8b3c5d2e9f61"  # pragma: allowlist secret
+down_revision = "bfdb81e51aed"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "applications",
+        sa.Column(
+            "csp_operation", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+    op.add_column(
+        "environments",
+        sa.Column(
+            "csp_operation", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("environments", "csp_operation")
+    op.drop_column("applications", "csp_operation")
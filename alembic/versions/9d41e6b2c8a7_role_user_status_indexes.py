@@ -0,0 +1,36 @@
+"""add (user_id, status) indexes to portfolio_roles and application_roles
+
+Revision ID: 9d41e6b2c8a7
+Revises: 4c7e2a9d1f30
+Create Date: 2026-10-18 19:12:40.513902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9d41e6b2c8a7"  # pragma: allowlist secret
+down_revision = "4c7e2a9d1f30"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "portfolio_role_user_status",
+        "portfolio_roles",
+        ["user_id", "status", "portfolio_id"],
+        unique=False,
+    )
+    op.create_index(
+        "application_role_user_status",
+        "application_roles",
+        ["user_id", "status", "application_id"],
+        unique=False,
+        postgresql_where=sa.text("deleted = false"),
+    )
+
+
+def downgrade():
+    op.drop_index("application_role_user_status", table_name="application_roles")
+    op.drop_index("portfolio_role_user_status", table_name="portfolio_roles")
@@ -0,0 +1,53 @@
+"""replace audit_events portfolio and application indexes with keyset indexes
+
+Revision ID: b5e1f7a3c9d2
+Revises: 9d41e6b2c8a7
+Create Date: 2026-10-18 19:40:12.228174
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b5e1f7a3c9d2"  # pragma: allowlist secret
+down_revision = "9d41e6b2c8a7"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "audit_event_time_created",
+        "audit_events",
+        ["time_created", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "audit_event_portfolio_time_created",
+        "audit_events",
+        ["portfolio_id", "time_created", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "audit_event_application_time_created",
+        "audit_events",
+        ["application_id", "time_created", "id"],
+        unique=False,
+    )
+    op.drop_index("ix_audit_events_portfolio_id", table_name="audit_events")
+    op.drop_index("ix_audit_events_application_id", table_name="audit_events")
+
+
+def downgrade():
+    op.create_index(
+        "ix_audit_events_application_id",
+        "audit_events",
+        ["application_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_audit_events_portfolio_id", "audit_events", ["portfolio_id"], unique=False
+    )
+    op.drop_index("audit_event_application_time_created", table_name="audit_events")
+    op.drop_index("audit_event_portfolio_time_created", table_name="audit_events")
+    op.drop_index("audit_event_time_created", table_name="audit_events")
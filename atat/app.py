@@ -9,36 +9,83 @@ from flask_session import Session
 from flask_wtf.csrf import CSRFProtect
 from unipath import Path
 
-from atat.assets import environment as assets_environment
 from atat.database import db
 from atat.debug import setup_debug_toolbar
 from atat.domain.auth import apply_authentication
 from atat.domain.authz import Authorization
+from atat.domain.authz.permission_index import clear_permission_indexes
 from atat.domain.csp import make_csp_provider
 from atat.domain.portfolios import Portfolios
+from atat.domain.portfolios.summaries import PortfolioSummaryCache
+from atat.domain.reports import PortfolioSpendingCache
+from atat.domain.user_snapshots import UserSnapshotCache
 from atat.filters import register_filters
 from atat.models.permissions import Permissions
 from atat.queue import celery, update_celery
-from atat.routes import bp
-from atat.routes.applications import applications_bp
-from atat.routes.ccpo import bp as ccpo_routes
-from atat.routes.dev import dev_bp as dev_routes
-from atat.routes.dev import local_access_bp
-from atat.routes.errors import make_error_pages
-from atat.routes.portfolios import portfolios_bp as portfolio_routes
-from atat.routes.task_orders import task_orders_bp
-from atat.routes.users import bp as user_routes
 from atat.utils import mailer
 from atat.utils.context_processors import assign_resources
+from atat.utils.dispatcher import BatchDispatcher
 from atat.utils.environment import ApplicationEnvironment
 from atat.utils.form_cache import FormCache
 from atat.utils.json import CustomJSONEncoder
+from atat.utils.localization import get_catalogue
 from atat.utils.logging import JsonFormatter, RequestContextFilter
 from atat.utils.notification_sender import NotificationSender
 from atat.utils.session_limiter import SessionLimiter
 
 
 def make_app(config):
+    app = make_base_app(config)
+    environment_name = ApplicationEnvironment(config["ENV"])
+
+    csrf = CSRFProtect()
+    # These routes are exempted in order to allow SAML integration
+    csrf.exempt("atat.routes.dev.login_dev")
+    csrf.exempt("atat.routes.login")
+    csrf.exempt("atat.routes.handle_login_response")
+
+    app.config.update(
+        SESSION_COOKIE_SECURE=True,
+        SESSION_COOKIE_HTTPONLY=True,
+        SESSION_COOKIE_SAMESITE="Lax",
+    )
+
+    make_flask_callbacks(app)
+    register_filters(app)
+    register_jinja_globals(app)
+    make_services(app)
+
+    csrf.init_app(app)
+    Session(app)
+    make_session_limiter(app, session, config)
+    make_assets(app)
+
+    register_blueprints(app, environment_name)
+
+    app.form_cache = FormCache(app.redis)
+
+    apply_authentication(app)
+    set_default_headers(app)
+
+    @app.before_request
+    def _set_resources():
+        assign_resources(request.view_args)
+
+    return app
+
+
+def make_worker_app(config):
+    """
+    Builds an app for Celery workers. It has the services that jobs use, but
+    none of the web-only setup: no blueprints, CSRF protection, sessions,
+    assets, template filters or request callbacks.
+    """
+    app = make_base_app(config)
+    make_services(app)
+    return app
+
+
+def make_base_app(config):
     environment_name = ApplicationEnvironment(config["ENV"])
 
     if environment_name is ApplicationEnvironment.PRODUCTION or config.get("LOG_JSON"):
@@ -53,36 +100,56 @@ def make_app(config):
     )
     app.json_encoder = CustomJSONEncoder
     make_redis(app, config)
-    csrf = CSRFProtect()
-    # These routes are exempted in order to allow SAML integration
-    csrf.exempt("atat.routes.dev.login_dev")
-    csrf.exempt("atat.routes.login")
-    csrf.exempt("atat.routes.handle_login_response")
 
     app.config.update(config)
     app.config.update({"SESSION_REDIS": app.redis})
 
-    app.config.update(
-        SESSION_COOKIE_SECURE=True,
-        SESSION_COOKIE_HTTPONLY=True,
-        SESSION_COOKIE_SAMESITE="Lax",
-    )
-
     update_celery(celery, app)
+    return app
 
-    make_flask_callbacks(app)
-    register_filters(app)
-    register_jinja_globals(app)
-    make_csp_provider(app, config.get("CSP", "mock"))
+
+def make_services(app):
+    with app.app_context():
+        # Compile the translations before the first request or job needs them
+        get_catalogue()
+    make_csp_provider(app, app.config.get("CSP", "mock"))
     make_mailer(app)
     make_notification_sender(app)
+    make_dispatcher(app)
 
     db.init_app(app)
-    csrf.init_app(app)
-    Session(app)
-    make_session_limiter(app, session, config)
+
+    app.portfolio_summaries = PortfolioSummaryCache(
+        app.redis, ttl=app.config["PORTFOLIO_SUMMARY_CACHE_TTL"]
+    )
+    app.portfolio_spending = PortfolioSpendingCache(
+        app.redis, ttl=app.config["PORTFOLIO_SPENDING_CACHE_TTL"]
+    )
+    app.user_snapshots = UserSnapshotCache(
+        app.redis, ttl=app.config["CURRENT_USER_SNAPSHOT_TTL"]
+    )
+
+
+def make_assets(app):
+    # Imported here so that worker processes do not load webassets
+    from atat.assets import environment as assets_environment
+
     assets_environment.init_app(app)
 
+
+def register_blueprints(app, environment_name):
+    # The routes import the forms, SAML and everything else that only serving
+    # requests needs, so they are imported here rather than with this module
+    from atat.routes import bp
+    from atat.routes.applications import applications_bp
+    from atat.routes.ccpo import bp as ccpo_routes
+    from atat.routes.dev import dev_bp as dev_routes
+    from atat.routes.dev import local_access_bp
+    from atat.routes.errors import make_error_pages
+    from atat.routes.portfolios import portfolios_bp as portfolio_routes
+    from atat.routes.task_orders import task_orders_bp
+    from atat.routes.users import bp as user_routes
+
     make_error_pages(app)
     app.register_blueprint(bp)
     app.register_blueprint(portfolio_routes)
@@ -100,17 +167,6 @@ def make_app(config):
             # active dev route that are only available on local
             app.register_blueprint(local_access_bp)
 
-    app.form_cache = FormCache(app.redis)
-
-    apply_authentication(app)
-    set_default_headers(app)
-
-    @app.before_request
-    def _set_resources():
-        assign_resources(request.view_args)
-
-    return app
-
 
 def make_flask_callbacks(app):
     environment_name = ApplicationEnvironment(app.config.get("ENV"))
@@ -123,13 +179,17 @@ def make_flask_callbacks(app):
         g.modal = request.args.get("modal", None)
         g.Authorization = Authorization
         g.Permissions = Permissions
+        clear_permission_indexes()
 
     @app.context_processor
     def _portfolios():
         if not g.current_user:
             return {}
 
-        portfolios = Portfolios.for_user(g.current_user)
+        user = g.current_user
+        portfolios = app.portfolio_summaries.for_user(
+            user, lambda: Portfolios.for_user(user)
+        )
         return {"portfolios": portfolios}
 
     @app.after_request
@@ -138,6 +198,7 @@ def make_flask_callbacks(app):
         g.portfolio = None
         g.application = None
         g.task_order = None
+        clear_permission_indexes()
         return response
 
 
@@ -183,7 +244,7 @@ def make_mailer(app):
     if app.config["DEBUG"] or app.config["DEBUG_MAILER"]:
         mailer_connection = mailer.RedisConnection(app.redis)
     else:
-        mailer_connection = mailer.SMTPConnection(
+        smtp_settings = dict(
             server=app.config.get("MAIL_SERVER"),
             port=app.config.get("MAIL_PORT"),
             username=app.config.get("MAIL_SENDER"),
@@ -191,14 +252,33 @@ def make_mailer(app):
             use_tls=app.config.get("MAIL_TLS"),
             debug_smtp=app.config.get("DEBUG_SMTP"),
         )
+        if app.config.get("MAIL_POOL_SIZE"):
+            mailer_connection = mailer.PooledSMTPConnection(
+                **smtp_settings,
+                pool_size=app.config.get("MAIL_POOL_SIZE"),
+                health_check_interval=app.config.get("MAIL_HEALTH_CHECK_INTERVAL"),
+            )
+        else:
+            mailer_connection = mailer.SMTPConnection(**smtp_settings)
     sender = app.config.get("MAIL_SENDER")
     app.mailer = mailer.Mailer(mailer_connection, sender)
+    app.mail_outbox = mailer.MailOutbox(
+        app.redis, batch_size=app.config.get("MAIL_BATCH_SIZE")
+    )
 
 
 def make_notification_sender(app):
     app.notification_sender = NotificationSender()
 
 
+def make_dispatcher(app):
+    app.dispatcher = BatchDispatcher(
+        app.redis,
+        chunk_size=app.config.get("DISPATCH_CHUNK_SIZE"),
+        inflight_ttl=app.config.get("DISPATCH_INFLIGHT_TTL"),
+    )
+
+
 def make_session_limiter(app, session, config):
     app.session_limiter = SessionLimiter(config, session, app.redis)
 
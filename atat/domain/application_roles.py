@@ -14,6 +14,7 @@ from atat.models import (
     Portfolio,
     User,
 )
+from atat.models.utils import claim_batch_by_owner
 
 from .exceptions import NotFoundError
 from .permission_sets import PermissionSets
@@ -115,13 +116,9 @@ class ApplicationRoles(object):
         db.session.commit()
 
     @classmethod
-    def get_pending_creation(cls) -> List[List[UUID]]:
-        """
-        Returns a list of lists of ApplicationRole IDs. The IDs
-        should be grouped by user and portfolio.
-        """
-        results = (
-            db.session.query(ApplicationRole.id, ApplicationRole.user_id, Portfolio.id)
+    def _pending_creation_query(cls):
+        return (
+            db.session.query(ApplicationRole)
             .join(Application, Application.id == ApplicationRole.application_id)
             .join(Portfolio, Portfolio.id == Application.portfolio_id)
             .filter(
@@ -131,23 +128,64 @@ class ApplicationRoles(object):
                     ApplicationRole.cloud_id.is_(None),
                     ApplicationRole.user_id.isnot(None),
                     ApplicationRole.status == ApplicationRoleStatus.ACTIVE,
-                    or_(
-                        ApplicationRole.claimed_until.is_(None),
-                        ApplicationRole.claimed_until <= func.now(),
-                    ),
                 )
             )
-        ).all()
+        )
 
+    @classmethod
+    def _group_by_user_and_portfolio(cls, results):
         groups = []
-        keyfunc = lambda pair: (pair[1], pair[2])
+        keyfunc = lambda triple: (triple[1], triple[2])
         sorted_results = sorted(results, key=keyfunc)
         for _, g in groupby(sorted_results, keyfunc):
-            group = [pair[0] for pair in list(g)]
+            group = [triple[0] for triple in list(g)]
             groups.append(group)
 
         return groups
 
+    @classmethod
+    def get_pending_creation(cls) -> List[List[UUID]]:
+        """
+        Returns a list of lists of ApplicationRole IDs. The IDs
+        should be grouped by user and portfolio.
+        """
+        results = (
+            cls._pending_creation_query()
+            .with_entities(ApplicationRole.id, ApplicationRole.user_id, Portfolio.id)
+            .filter(
+                or_(
+                    ApplicationRole.claimed_until.is_(None),
+                    ApplicationRole.claimed_until <= func.now(),
+                ),
+            )
+            .all()
+        )
+
+        return cls._group_by_user_and_portfolio(results)
+
+    @classmethod
+    def claim_pending_creation(cls, limit, ids=None) -> List[List[ApplicationRole]]:
+        """
+        Claim the application roles returned by `get_pending_creation` for up
+        to `limit` users, skipping users another worker has already claimed.
+        Every pending role of a user is claimed together, so that two workers
+        never create the same user. Pass `ids` to only claim from those roles.
+        The claimed roles are grouped by user and portfolio.
+        """
+        query = cls._pending_creation_query()
+        if ids is not None:
+            query = query.filter(ApplicationRole.id.in_(ids))
+        claimed = claim_batch_by_owner(
+            query,
+            ApplicationRole.user_id,
+            User,
+            limit,
+            columns=[Application.portfolio_id],
+        )
+        return cls._group_by_user_and_portfolio(
+            (ar, ar.user_id, portfolio_id) for ar, portfolio_id in claimed
+        )
+
     @classmethod
     def get_cloud_id_for_user(cls, dod_id, portfolio_id):
         app_role = (
@@ -165,3 +203,23 @@ class ApplicationRoles(object):
         ).one_or_none()
 
         return getattr(app_role, "cloud_id", None)
+
+    @classmethod
+    def get_cloud_ids_for_users(cls, dod_ids, portfolio_id):
+        """
+        Like `get_cloud_id_for_user`, for several users with one query. Returns
+        a dict of DoD ID to cloud ID for the users that have one.
+        """
+        rows = (
+            db.session.query(User.dod_id, ApplicationRole.cloud_id)
+            .join(ApplicationRole, ApplicationRole.user_id == User.id)
+            .join(Application, Application.id == ApplicationRole.application_id)
+            .filter(
+                and_(
+                    Application.portfolio_id == portfolio_id,
+                    User.dod_id.in_(list(dod_ids)),
+                    ApplicationRole.cloud_id.isnot(None),
+                )
+            )
+        )
+        return dict(rows)
@@ -1,5 +1,5 @@
 from typing import List
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from flask import g
 from sqlalchemy import and_, func, or_
@@ -9,6 +9,7 @@ from atat.domain.application_roles import ApplicationRoles
 from atat.domain.environments import Environments
 from atat.domain.exceptions import NotFoundError
 from atat.domain.invitations import ApplicationInvitations
+from atat.domain.permission_sets import PermissionSets
 from atat.models import (
     Application,
     ApplicationRole,
@@ -18,6 +19,7 @@ from atat.models import (
     PortfolioStateMachine,
 )
 from atat.models.mixins.state_machines import PortfolioStates
+from atat.models.utils import claim_batch
 from atat.utils import commit_or_raise_already_exists_error, first_or_none
 
 from . import BaseDomainClass
@@ -132,6 +134,54 @@ class Applications(BaseDomainClass):
 
         return invitation
 
+    @classmethod
+    def invite_many(cls, application, inviter, members_data):
+        """
+        Invites several members in one transaction. Each item of
+        `members_data` holds the `user_data` and `permission_sets` that
+        `invite` takes. Members are invited without environment roles. IDs are
+        assigned here rather than by the database, so that the roles and
+        invitations are written with one multi-row insert each. Returns the
+        email address and token of each invitation.
+        """
+        cloud_ids = ApplicationRoles.get_cloud_ids_for_users(
+            {member_data["user_data"]["dod_id"] for member_data in members_data},
+            application.portfolio_id,
+        )
+        requested = {
+            name
+            for member_data in members_data
+            for name in member_data.get("permission_sets", [])
+        }
+        permission_sets = {
+            permission_set.name: permission_set
+            for permission_set in ApplicationRoles._permission_sets_for_names(requested)
+        }
+
+        invitations = []
+        for member_data in members_data:
+            user_data = member_data["user_data"]
+            names = {PermissionSets.VIEW_APPLICATION}.union(
+                member_data.get("permission_sets", [])
+            )
+            app_role = ApplicationRole(
+                id=uuid4(),
+                application=application,
+                permission_sets=[permission_sets[name] for name in names],
+                cloud_id=cloud_ids.get(user_data["dod_id"]),
+            )
+            invitation = ApplicationInvitations.create(
+                inviter=inviter, role=app_role, member_data=user_data
+            )
+            invitation.id = uuid4()
+            invitations.append(invitation)
+
+        # Tokens are generated on flush, and the commit expires them
+        db.session.flush()
+        sent = [(invitation.email, invitation.token) for invitation in invitations]
+        db.session.commit()
+        return sent
+
     @classmethod
     def get_applications_pending_creation(cls) -> List[UUID]:
         results = (
@@ -143,6 +193,7 @@ class Applications(BaseDomainClass):
                     PortfolioStateMachine.state == PortfolioStates.COMPLETED,
                     Application.deleted == False,
                     Application.cloud_id.is_(None),
+                    Application.csp_operation.is_(None),
                     or_(
                         Application.claimed_until.is_(None),
                         Application.claimed_until <= func.now(),
@@ -151,3 +202,14 @@ class Applications(BaseDomainClass):
             )
         ).all()
         return [id_ for id_, in results]
+
+    @classmethod
+    def claim_pending_operations(cls, limit) -> List[Application]:
+        """
+        Claim up to `limit` applications whose management group is still
+        being created by the CSP.
+        """
+        query = db.session.query(Application).filter(
+            Application.deleted == False, Application.csp_operation.isnot(None)
+        )
+        return claim_batch(query, limit)
@@ -1,31 +1,33 @@
 from atat.database import db
-from atat.domain.common import Query
+from atat.domain.common import Paginator, Query
 from atat.models.audit_event import AuditEvent
 
 
 class AuditEventQuery(Query):
     model = AuditEvent
 
+    @classmethod
+    def paginate(cls, query, pagination_opts, table=None):
+        return Paginator.paginate_keyset(
+            query, cls.model.time_created, cls.model.id, pagination_opts, table
+        )
+
     @classmethod
     def get_all(cls, pagination_opts):
-        query = db.session.query(cls.model).order_by(cls.model.time_created.desc())
-        return cls.paginate(query, pagination_opts)
+        query = db.session.query(cls.model)
+        return cls.paginate(query, pagination_opts, table=cls.model.__table__)
 
     @classmethod
     def get_portfolio_events(cls, portfolio_id, pagination_opts):
-        query = (
-            db.session.query(cls.model)
-            .filter(cls.model.portfolio_id == portfolio_id)
-            .order_by(cls.model.time_created.desc())
+        query = db.session.query(cls.model).filter(
+            cls.model.portfolio_id == portfolio_id
         )
         return cls.paginate(query, pagination_opts)
 
     @classmethod
     def get_application_events(cls, application_id, pagination_opts):
-        query = (
-            db.session.query(cls.model)
-            .filter(cls.model.application_id == application_id)
-            .order_by(cls.model.time_created.desc())
+        query = db.session.query(cls.model).filter(
+            cls.model.application_id == application_id
         )
         return cls.paginate(query, pagination_opts)
 
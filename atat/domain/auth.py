@@ -19,6 +19,9 @@ UNPROTECTED_ROUTES = [
     "atat.handle_login_response",
 ]
 
+# Requests that may use a cached snapshot of the current user
+READ_ONLY_METHODS = ["GET", "HEAD"]
+
 
 def apply_authentication(app):
     @app.before_request
@@ -51,11 +54,13 @@ def should_redirect_to_user_profile(request, user):
 
 def get_current_user():
     user_id = session.get("user_id")
-    if user_id:
-        return Users.get(user_id)
-    else:
+    if not user_id:
         return False
 
+    if request.method in READ_ONLY_METHODS:
+        return app.user_snapshots.get(user_id, Users.get_with_roles)
+    return Users.get_with_roles(user_id)
+
 
 def get_last_login():
     return session.get("user_id") and session.get("last_login")
@@ -0,0 +1,146 @@
+from uuid import UUID
+
+from flask import g, has_request_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, selectinload
+
+from atat.database import db
+from atat.models import ApplicationRole, PermissionSet, PortfolioRole, User
+from atat.models.application_role import Status as ApplicationRoleStatus
+from atat.models.portfolio_role import Status as PortfolioRoleStatus
+
+NO_PERMISSIONS = frozenset()
+ROLE_RELATIONSHIPS = {"permission_sets", "portfolio_roles", "application_roles"}
+
+
+class PermissionIndex(object):
+    """
+    The permissions a user holds, compiled into frozensets keyed by portfolio
+    and application ID, so that each permission check is a set lookup rather
+    than a scan over the user's roles and permission sets.
+
+    A disabled role grants no permissions. If a user somehow has more than
+    one role for a resource, the first one wins, as it always has.
+    """
+
+    def __init__(self, user):
+        self.atat = frozenset(user.permissions)
+        self.portfolios = self._compile(
+            user.portfolio_roles, "portfolio_id", PortfolioRoleStatus.DISABLED
+        )
+        self.applications = self._compile(
+            user.application_roles, "application_id", ApplicationRoleStatus.DISABLED
+        )
+
+    @classmethod
+    def build(cls, user):
+        """Builds the index for a user, loading their roles and permission
+        sets in a fixed number of queries if they have not been loaded
+        already.
+        """
+        if user.id is not None and inspect(user).unloaded & ROLE_RELATIONSHIPS:
+            db.session.query(User).filter(User.id == user.id).options(
+                selectinload(User.permission_sets),
+                selectinload(User.portfolio_roles).selectinload(
+                    PortfolioRole.permission_sets
+                ),
+                selectinload(User.application_roles).selectinload(
+                    ApplicationRole.permission_sets
+                ),
+            ).all()
+        return cls(user)
+
+    def dump(self):
+        """Returns the index as JSON-serializable data for `load`."""
+        return {
+            "atat": sorted(self.atat),
+            "portfolios": self._dump(self.portfolios),
+            "applications": self._dump(self.applications),
+        }
+
+    @classmethod
+    def load(cls, data):
+        """Rebuilds an index from the output of `dump` without a user."""
+        index = cls.__new__(cls)
+        index.atat = frozenset(data["atat"])
+        index.portfolios = cls._load(data["portfolios"])
+        index.applications = cls._load(data["applications"])
+        return index
+
+    @staticmethod
+    def _dump(index):
+        return {str(key): sorted(permissions) for key, permissions in index.items()}
+
+    @staticmethod
+    def _load(data):
+        return {UUID(key): frozenset(permissions) for key, permissions in data.items()}
+
+    @staticmethod
+    def _compile(roles, key, disabled_status):
+        index = {}
+        for role in roles:
+            resource_id = getattr(role, key)
+            if resource_id in index:
+                continue
+            if role.status is disabled_status:
+                index[resource_id] = NO_PERMISSIONS
+            else:
+                index[resource_id] = frozenset(role.permissions)
+        return index
+
+    def has_atat_permission(self, permission):
+        return permission in self.atat
+
+    def has_portfolio_permission(self, portfolio_id, permission):
+        return permission in self.atat or permission in self.portfolios.get(
+            portfolio_id, NO_PERMISSIONS
+        )
+
+    def has_application_permission(self, portfolio_id, application_id, permission):
+        return self.has_portfolio_permission(
+            portfolio_id, permission
+        ) or permission in self.applications.get(application_id, NO_PERMISSIONS)
+
+
+def permission_index(user):
+    """Returns the permission index for a user. Within a request the index is
+    built once and reused by every check until roles or permission sets are
+    changed; outside a request it is built for each call.
+    """
+    if not has_request_context():
+        return PermissionIndex.build(user)
+
+    indexes = g.get("permission_indexes")
+    if indexes is None:
+        indexes = g.permission_indexes = {}
+
+    key = user.id or id(user)
+    if key not in indexes:
+        indexes[key] = PermissionIndex.build(user)
+    return indexes[key]
+
+
+def set_permission_index(user, index):
+    """Uses `index` for the user's permission checks for the rest of the
+    request, unless their roles change.
+    """
+    if has_request_context():
+        indexes = g.get("permission_indexes")
+        if indexes is None:
+            indexes = g.permission_indexes = {}
+        indexes[user.id] = index
+
+
+def clear_permission_indexes():
+    if has_request_context():
+        g.pop("permission_indexes", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _clear_on_role_changes(session, flush_context):
+    changed = session.new | session.dirty | session.deleted
+    if any(
+        isinstance(obj, (User, PortfolioRole, ApplicationRole, PermissionSet))
+        for obj in changed
+    ):
+        clear_permission_indexes()
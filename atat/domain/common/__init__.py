@@ -1 +1 @@
-from .query import Paginator, Query
+from .query import KeysetPage, Paginator, Query
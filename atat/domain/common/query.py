@@ -1,3 +1,11 @@
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import literal_column, select, text, tuple_
 from sqlalchemy.exc import DataError
 from sqlalchemy.orm.exc import NoResultFound
 
@@ -8,7 +16,7 @@ from atat.domain.exceptions import NotFoundError
 class Paginator(object):
     """
     Uses the Flask-SQLAlchemy extension's pagination method to paginate
-    a query set.
+    a query set, or `KeysetPage` for keyset pagination.
 
     Also acts as a proxy object so that the results of the query set can be iterated
     over without needing to call `.items`.
@@ -22,6 +30,9 @@ class Paginator(object):
         return {
             "page": int(request.args.get("page", default_page)),
             "per_page": int(request.args.get("perPage", default_per_page)),
+            "after": request.args.get("after"),
+            "before": request.args.get("before"),
+            "last": request.args.get("last") == "1",
         }
 
     @classmethod
@@ -35,6 +46,48 @@ class Paginator(object):
         else:
             return query.all()
 
+    @classmethod
+    def paginate_keyset(
+        cls, query, time_column, id_column, pagination_opts=None, table=None
+    ):
+        """
+        Paginates a query in descending (time_column, id_column) order by
+        seeking past the last row of the previous page instead of using
+        OFFSET, so every page costs the same to load.
+
+        If `query` selects a whole table, pass the table so its planner row
+        estimate can stand in for the total on large tables.
+        """
+        if pagination_opts is None:
+            return query.order_by(time_column.desc(), id_column.desc()).all()
+        return KeysetPage(query, time_column, id_column, pagination_opts, table)
+
+    @classmethod
+    def estimate_count(cls, query, limit):
+        """
+        Counts the rows of `query`, stopping at `limit`. Returns the count
+        and whether it stopped early.
+        """
+        capped = (
+            query.order_by(None).with_entities(literal_column("1")).limit(limit + 1)
+        )
+        count = db.session.execute(
+            select([db.func.count()]).select_from(capped.subquery())
+        ).scalar()
+        return (min(count, limit), count > limit)
+
+    @classmethod
+    def estimate_table_count(cls, table):
+        """
+        Returns the planner's row estimate for a table, or None if the table
+        has not been analyzed yet.
+        """
+        estimate = db.session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": table.name},
+        ).scalar()
+        return int(estimate) if estimate and estimate > 0 else None
+
     def __getattr__(self, name):
         return getattr(self.query_set, name)
 
@@ -45,6 +98,114 @@ class Paginator(object):
         return self.items.__len__()
 
 
+class KeysetPage(object):
+    """
+    One page of a query paginated by `Paginator.paginate_keyset`.
+
+    Pages are addressed with opaque cursors built from the (time, id) of the
+    first or last row on the neighbouring page. `page` is carried in the
+    links for display only; when no cursor is given and `page` is greater
+    than 1 the page is loaded with OFFSET, so older links keep working.
+    """
+
+    # Counting stops at this many pages; `total` is reported as an estimate
+    # above it.
+    COUNT_PAGES_LIMIT = 10
+
+    def __init__(self, query, time_column, id_column, pagination_opts, table=None):
+        self.per_page = pagination_opts["per_page"]
+        self.page = pagination_opts.get("page") or 1
+        self._time_column = time_column
+        self._id_column = id_column
+
+        after = self.decode_cursor(pagination_opts.get("after"))
+        before = self.decode_cursor(pagination_opts.get("before"))
+        key = tuple_(time_column, id_column)
+        descending = (time_column.desc(), id_column.desc())
+        ascending = (time_column.asc(), id_column.asc())
+
+        self._query = query
+        self._table = table
+        self._total = None
+        self.total_is_estimate = False
+
+        if pagination_opts.get("last"):
+            rows = query.order_by(*ascending).limit(self.per_page + 1).all()
+            self.has_prev = len(rows) > self.per_page
+            self.has_next = False
+            self.items = list(reversed(rows[: self.per_page]))
+            self.page = self.pages
+        elif before is not None:
+            rows = (
+                query.filter(key > before)
+                .order_by(*ascending)
+                .limit(self.per_page + 1)
+                .all()
+            )
+            self.has_prev = len(rows) > self.per_page
+            self.has_next = True
+            self.items = list(reversed(rows[: self.per_page]))
+        else:
+            query = query.order_by(*descending)
+            if after is not None:
+                query = query.filter(key < after)
+            elif self.page > 1:
+                query = query.offset((self.page - 1) * self.per_page)
+            rows = query.limit(self.per_page + 1).all()
+            self.has_prev = after is not None or self.page > 1
+            self.has_next = len(rows) > self.per_page
+            self.items = rows[: self.per_page]
+
+        if not self.has_prev:
+            self.page = 1
+
+    @property
+    def total(self):
+        if self._total is None:
+            limit = self.per_page * self.COUNT_PAGES_LIMIT
+            total, self.total_is_estimate = Paginator.estimate_count(self._query, limit)
+            if self.total_is_estimate and self._table is not None:
+                total = max(total, Paginator.estimate_table_count(self._table) or 0)
+            self._total = total
+        return self._total
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page))
+
+    @property
+    def next_cursor(self):
+        return self.encode_cursor(self.items[-1]) if self.items else None
+
+    @property
+    def prev_cursor(self):
+        return self.encode_cursor(self.items[0]) if self.items else None
+
+    def encode_cursor(self, item):
+        key = [
+            getattr(item, self._time_column.key).isoformat(),
+            str(getattr(item, self._id_column.key)),
+        ]
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    @classmethod
+    def decode_cursor(cls, cursor):
+        """Returns the (time, id) key in a cursor, or None if it is invalid."""
+        if not cursor:
+            return None
+        try:
+            time, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (datetime.fromisoformat(time), UUID(id_))
+        except (binascii.Error, ValueError, TypeError):
+            return None
+
+    def __iter__(self):
+        return self.items.__iter__()
+
+    def __len__(self):
+        return self.items.__len__()
+
+
 class Query(object):
 
     model = None
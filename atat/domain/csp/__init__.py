@@ -1,37 +1,56 @@
-import os
-
-from .cloud import (
-    AzureCloudProvider,
-    EaHybridCloudProvider,
-    HybridCloudProvider,
-    MockCloudProvider,
-)
+from functools import cached_property
+
+from .cloud import MockCloudProvider
 from .files import AzureFileService, MockFileService
 from .reports import MockReportingProvider
 
+CSP_MODES = ("azure", "mock-test", "mock", "hybrid", "ea-hybrid")
+
 
 class CSP:
+    """
+    The cloud, file and reporting services for one CSP mode. Each service is
+    built the first time it is used, so the Azure SDKs are only imported by
+    processes that talk to Azure.
+    """
+
     def __init__(self, csp, config, **kwargs):
-        if csp == "azure":
-            self.cloud = AzureCloudProvider(config)
-            self.files = AzureFileService(config)
-        elif csp in ("mock-test", "mock"):
-            self.cloud = MockCloudProvider(config, **kwargs)
-            self.files = MockFileService(config)
-        elif csp == "hybrid":
-            azure = AzureCloudProvider(config)
-            mock = MockCloudProvider(config, **kwargs)
-            self.cloud = HybridCloudProvider(azure, mock, config)
-            self.files = AzureFileService(config)
-        elif csp == "ea-hybrid":
-            azure = AzureCloudProvider(config)
-            mock = MockCloudProvider(config, **kwargs)
-            self.cloud = EaHybridCloudProvider(azure, mock, config)
-            self.files = AzureFileService(config)
-        else:
+        if csp not in CSP_MODES:
             raise ValueError(f"Unexpected CSP value provided: {csp}")
 
-        self.reports = MockReportingProvider()
+        self.csp = csp
+        self.config = config
+        self.mock_options = kwargs
+
+    @cached_property
+    def cloud(self):
+        if self.csp in ("mock-test", "mock"):
+            return MockCloudProvider(self.config, **self.mock_options)
+
+        from .cloud import (
+            AzureCloudProvider,
+            EaHybridCloudProvider,
+            HybridCloudProvider,
+        )
+
+        azure = AzureCloudProvider(self.config)
+        if self.csp == "azure":
+            return azure
+
+        mock = MockCloudProvider(self.config, **self.mock_options)
+        if self.csp == "hybrid":
+            return HybridCloudProvider(azure, mock, self.config)
+        return EaHybridCloudProvider(azure, mock, self.config)
+
+    @cached_property
+    def files(self):
+        if self.csp in ("mock-test", "mock"):
+            return MockFileService(self.config)
+        return AzureFileService(self.config)
+
+    @cached_property
+    def reports(self):
+        return MockReportingProvider()
 
 
 def make_csp_provider(app, csp=None):
@@ -44,3 +63,8 @@ def make_csp_provider(app, csp=None):
         with_failure=simulate_failures,
         with_authorization=simulate_failures,
     )
+
+    if not app.config.get("CSP_LAZY_INIT"):
+        # Build the services now, so that a misconfigured CSP fails at startup
+        app.csp.cloud
+        app.csp.files
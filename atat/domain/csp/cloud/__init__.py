@@ -1,5 +1,18 @@
-from .azure_cloud_provider import AzureCloudProvider
+from importlib import import_module
+
 from .cloud_provider_interface import CloudProviderInterface
-from .ea_hybrid_cloud_provider import EaHybridCloudProvider
-from .hybrid_cloud_provider import HybridCloudProvider
 from .mock_cloud_provider import MockCloudProvider
+
+# The Azure providers import requests, msrestazure and the other Azure
+# dependencies, so they are only imported when one is first used
+_AZURE_PROVIDERS = {
+    "AzureCloudProvider": ".azure_cloud_provider",
+    "EaHybridCloudProvider": ".ea_hybrid_cloud_provider",
+    "HybridCloudProvider": ".hybrid_cloud_provider",
+}
+
+
+def __getattr__(name):
+    if name in _AZURE_PROVIDERS:
+        return getattr(import_module(_AZURE_PROVIDERS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
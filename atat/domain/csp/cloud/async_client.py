@@ -0,0 +1,77 @@
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app as app
+
+from .cloud_provider_interface import CloudProviderInterface
+from .models import UserCSPPayload, UserRoleCSPPayload
+
+
+class AsyncCSPClient(object):
+    """Makes user and role provisioning calls for many users at once.
+
+    Each call is made by the wrapped cloud provider on a worker thread, so it
+    keeps the provider's pooled connections, token caching and error
+    handling, while a single event loop schedules the whole batch. At most
+    `max_concurrency` calls are in flight for any one tenant, so a large
+    onboarding does not trip the CSP's per-tenant throttling.
+
+    Build the calls with `create_user`, `create_user_role` and `disable_user`
+    and pass them to `run`:
+
+        client = AsyncCSPClient(app.csp.cloud)
+        results = client.run([client.create_user(p) for p in payloads])
+    """
+
+    def __init__(self, csp: CloudProviderInterface, max_concurrency=8, max_workers=32):
+        self.csp = csp
+        self.max_concurrency = max_concurrency
+        self.max_workers = max_workers
+        self._app = None
+        self._executor = None
+        self._semaphores = None
+
+    def run(self, calls):
+        """Runs `calls` in one event loop and returns their results in order.
+        A call that raises returns its exception in place of a result, so one
+        failure does not abandon the rest of the batch.
+        """
+        if not calls:
+            return []
+
+        self._app = app._get_current_object()
+        return asyncio.run(self._gather(calls))
+
+    async def create_user(self, payload: UserCSPPayload):
+        return await self._call(payload.tenant_id, self.csp.create_user, payload)
+
+    async def create_user_role(self, payload: UserRoleCSPPayload):
+        return await self._call(payload.tenant_id, self.csp.create_user_role, payload)
+
+    async def disable_user(self, tenant_id, role_assignment_cloud_id):
+        return await self._call(
+            tenant_id, self.csp.disable_user, tenant_id, role_assignment_cloud_id
+        )
+
+    async def _gather(self, calls):
+        # Semaphores belong to the event loop they are created in, so they are
+        # made afresh for every run.
+        self._semaphores = defaultdict(lambda: asyncio.Semaphore(self.max_concurrency))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            try:
+                return await asyncio.gather(*calls, return_exceptions=True)
+            finally:
+                self._executor = None
+
+    async def _call(self, tenant_id, func, *args):
+        async with self._semaphores[tenant_id]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, self._call_in_app_context, func, *args
+            )
+
+    def _call_in_app_context(self, func, *args):
+        with self._app.app_context():
+            return func(*args)
@@ -8,25 +8,31 @@ from contextlib import contextmanager
 from enum import Enum
 from functools import wraps
 from secrets import token_hex, token_urlsafe
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from urllib.parse import urljoin
 from uuid import uuid4
 
+import redis
 from flask import current_app as app
 
 from atat.utils import sha256_hex
 from atat.utils.azure_api_version import AzureApiVersion
 
 from .cloud_provider_interface import CloudProviderInterface
+from .credential_cache import CredentialCache
 from .exceptions import (
     AuthenticationException,
     ConnectionException,
     DomainNameException,
     ResourceProvisioningError,
+    ThrottlingException,
     UnknownServerException,
     UserProvisioningException,
 )
+from .graph_batch import GraphBatch, is_success, provisioning_error
+from .http_client import PooledHTTPClient
 from .models import (
+    AZURE_MGMNT_PATH,
     AdminRoleDefinitionCSPPayload,
     AdminRoleDefinitionCSPResult,
     ApplicationCSPPayload,
@@ -49,6 +55,9 @@ from .models import (
     InitialMgmtGroupCSPResult,
     InitialMgmtGroupVerificationCSPPayload,
     InitialMgmtGroupVerificationCSPResult,
+    ManagementGroupCSPResponse,
+    ManagementGroupOperationCSPPayload,
+    ManagementGroupOperationCSPResult,
     KeyVaultCredentials,
     PoliciesCSPPayload,
     PoliciesCSPResult,
@@ -90,10 +99,13 @@ from .models import (
     class_to_stage,
 )
 from .policy import AzurePolicyManager
+from .throttling import AzureThrottle, CircuitBreaker, RateLimiter, retry_after
+from .token_cache import TokenCache, derive_encryption_key
 from .utils import (
     OFFICE_365_DOMAIN,
+    active_directory_user_body,
     create_active_directory_user,
-    get_principal_auth_token,
+    get_principal_auth_token_response,
     make_auth_header,
 )
 
@@ -102,6 +114,10 @@ from .utils import (
 AZURE_SKU_ID = "0001"  # probably a static sku specific to ATAT/JEDI
 REMOTE_ROOT_ROLE_DEF_ID = "/providers/Microsoft.Authorization/roleDefinitions/00000000-0000-4000-8000-000000000000"
 
+# How many seconds to wait before retrying a throttled call whose response did
+# not say how long to wait with a Retry-After header
+THROTTLED_RETRY_AFTER = 30
+
 # This identifier is the application id of the Graph API. Azure automatically
 # creates a service principal for this application in each tenant. You can find
 # this application in the portal by going to "Enterprise Applications",
@@ -145,6 +161,11 @@ def log_and_raise_exceptions(func):
             status_code = exc_string[:3]
             message = f"error calling {func.__name__}"
 
+            if status_code == "429":
+                delay = retry_after(exc.response, THROTTLED_RETRY_AFTER)
+                app.logger.warning("Throttled %s", message, exc_info=1)
+                raise ThrottlingException(func.__name__, delay)
+
             log_format = "%s %s"
             log_values = [status_code, message]
 
@@ -170,14 +191,21 @@ def log_and_raise_exceptions(func):
 
 
 class AzureSDKProvider(object):
-    def __init__(self):
-        import requests
+    def __init__(
+        self, pool_size=10, max_retries=3, backoff_factor=0.5, timeout=30, throttle=None
+    ):
         from msrestazure.azure_cloud import (  # TODO: choose cloud type from config
             AZURE_PUBLIC_CLOUD,
         )
 
         self.cloud = AZURE_PUBLIC_CLOUD
-        self.requests = requests
+        self.requests = PooledHTTPClient(
+            pool_size=pool_size,
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+            timeout=timeout,
+            throttle=throttle,
+        )
 
 
 class AsyncOperationStatus(Enum):
@@ -199,21 +227,70 @@ class AzureCloudProvider(CloudProviderInterface):
         self.vault_url = config["AZURE_VAULT_URL"]
         self.powershell_client_id = config["AZURE_POWERSHELL_CLIENT_ID"]
         self.default_aadp_qty = config["AZURE_AADP_QTY"]
+        self.nonblocking_mgmt_groups = config["AZURE_NONBLOCKING_MGMT_GROUPS"]
+        self.graph_batching = config["AZURE_GRAPH_BATCHING"]
         self.roles = {
             "owner": config["AZURE_ROLE_DEF_ID_OWNER"],
             "contributor": config["AZURE_ROLE_DEF_ID_CONTRIBUTOR"],
             "billing": config["AZURE_ROLE_DEF_ID_BILLING_READER"],
         }
 
+        shared_redis = None
+        if config["AZURE_TOKEN_CACHE_REDIS"] or config["AZURE_THROTTLING"]:
+            shared_redis = redis.Redis.from_url(config["REDIS_URI"])
+
         if azure_sdk_provider is None:
-            self.sdk = AzureSDKProvider()
+            self.sdk = AzureSDKProvider(
+                pool_size=config["AZURE_HTTP_POOL_SIZE"],
+                max_retries=config["AZURE_HTTP_MAX_RETRIES"],
+                backoff_factor=config["AZURE_HTTP_BACKOFF_FACTOR"],
+                timeout=config["AZURE_HTTP_TIMEOUT"],
+                throttle=self._make_throttle(config, shared_redis),
+            )
         else:
             self.sdk = azure_sdk_provider
 
+        if config["AZURE_TOKEN_CACHE_REDIS"]:
+            self.token_cache = TokenCache(
+                refresh_margin=config["AZURE_TOKEN_REFRESH_MARGIN"],
+                redis=shared_redis,
+                encryption_key=derive_encryption_key(config["SECRET_KEY"]),
+            )
+        else:
+            self.token_cache = TokenCache(
+                refresh_margin=config["AZURE_TOKEN_REFRESH_MARGIN"]
+            )
+
+        self.credential_cache = CredentialCache(
+            maxsize=config["AZURE_CREDENTIAL_CACHE_SIZE"],
+            ttl=config["AZURE_CREDENTIAL_CACHE_TTL"],
+        )
+
         self.graph_resource = self.sdk.cloud.endpoints.microsoft_graph_resource_id
         self.graph_scope = self.graph_resource + ".default"
         self.policy_manager = AzurePolicyManager(config["AZURE_POLICY_LOCATION"])
 
+    @staticmethod
+    def _make_throttle(config, shared_redis):
+        if not config["AZURE_THROTTLING"]:
+            return None
+
+        rate_limiter = RateLimiter(
+            shared_redis,
+            rates={
+                "arm": config["AZURE_RATE_LIMIT_ARM"],
+                "billing": config["AZURE_RATE_LIMIT_BILLING"],
+                "graph": config["AZURE_RATE_LIMIT_GRAPH"],
+            },
+            max_wait=config["AZURE_RATE_LIMIT_MAX_WAIT"],
+        )
+        circuit_breaker = CircuitBreaker(
+            shared_redis,
+            threshold=config["AZURE_CIRCUIT_BREAKER_THRESHOLD"],
+            cooldown=config["AZURE_CIRCUIT_BREAKER_COOLDOWN"],
+        )
+        return AzureThrottle(rate_limiter, circuit_breaker)
+
     @log_and_raise_exceptions
     def _get_keyvault_token(self):
         url = urljoin(
@@ -227,9 +304,16 @@ class AzureCloudProvider(CloudProviderInterface):
             "client_secret": self.secret_key,
             "resource": resource,
         }
-        token_response = self.sdk.requests.get(url, data=payload, timeout=30)
-        token_response.raise_for_status()
-        token = token_response.json().get("access_token")
+
+        def fetch():
+            token_response = self.sdk.requests.get(url, data=payload, timeout=30)
+            token_response.raise_for_status()
+            token_json = token_response.json()
+            return token_json.get("access_token"), token_json.get("expires_in")
+
+        token = self.token_cache.get(
+            (self.root_tenant_id, self.client_id, resource), fetch
+        )
         if token is None:
             message = f"Failed to get token for resource '{resource}' in tenant '{self.root_tenant_id}'"
             app.logger.error(message, exc_info=1)
@@ -272,6 +356,8 @@ class AzureCloudProvider(CloudProviderInterface):
             payload.tenant_id,
             payload.parent_id,
         )
+        if isinstance(response, ManagementGroupOperationCSPResult):
+            return response
 
         return EnvironmentCSPResult(**response)
 
@@ -283,6 +369,8 @@ class AzureCloudProvider(CloudProviderInterface):
             payload.tenant_id,
             payload.parent_id,
         )
+        if isinstance(response, ManagementGroupOperationCSPResult):
+            return response
 
         return ApplicationCSPResult(**response)
 
@@ -306,6 +394,12 @@ class AzureCloudProvider(CloudProviderInterface):
             payload.display_name,
             payload.tenant_id,
         )
+        if isinstance(response, ManagementGroupOperationCSPResult):
+            return InitialMgmtGroupCSPResult(
+                initial_management_group_name=response.management_group_name,
+                initial_management_group_status_url=response.status_url,
+                initial_management_group_result_url=response.result_url,
+            )
 
         return InitialMgmtGroupCSPResult(**response)
 
@@ -321,6 +415,20 @@ class AzureCloudProvider(CloudProviderInterface):
 
         https://docs.microsoft.com/en-us/azure/governance/management-groups/overview
         """
+        if payload.initial_management_group_status_url:
+            # The initial management group was created without waiting for it.
+            # Until it is done, reset the stage so it is checked again later.
+            operation = ManagementGroupOperationCSPPayload(
+                tenant_id=payload.tenant_id,
+                management_group_name=payload.management_group_name,
+                status_url=payload.initial_management_group_status_url,
+                result_url=payload.initial_management_group_result_url,
+            )
+            if self.check_management_group_operation(operation) is None:
+                return InitialMgmtGroupVerificationCSPResult(
+                    id=f"{AZURE_MGMNT_PATH}{payload.management_group_name}",
+                    reset_stage=True,
+                )
 
         with self._get_elevated_access_token(
             payload.tenant_id, payload.user_object_id
@@ -358,6 +466,10 @@ class AzureCloudProvider(CloudProviderInterface):
             ManagementGroup: https://docs.microsoft.com/en-us/rest/api/resources/managementgroups/createorupdate#managementgroup
             or
             AzureAsyncOperationResults: https://docs.microsoft.com/en-us/rest/api/resources/managementgroups/createorupdate#azureasyncoperationresults
+            or, if AZURE_NONBLOCKING_MGMT_GROUPS is set and Azure accepted the
+            request without finishing it,
+            ManagementGroupOperationCSPResult: the URLs to check the operation
+            with `check_management_group_operation`
         """
         sp_token = self._get_tenant_principal_token(tenant_id)
         session = self.sdk.requests.Session()
@@ -380,6 +492,13 @@ class AzureCloudProvider(CloudProviderInterface):
         if response.status_code == 202:
             status_url = response.headers["Azure-AsyncOperation"]
             result_url = response.headers["Location"]
+            if self.nonblocking_mgmt_groups:
+                # The parent is applied once the operation has finished.
+                return ManagementGroupOperationCSPResult(
+                    management_group_name=management_group_id,
+                    status_url=status_url,
+                    result_url=result_url,
+                )
             resp = self._poll_management_group_creation_job(
                 status_url, result_url, session
             )
@@ -449,22 +568,75 @@ class AzureCloudProvider(CloudProviderInterface):
         """
 
         while True:
-            response = session.get(status_url)
-            response.raise_for_status()
-            response_json = response.json()
-            status = response_json["status"]
-            if status == AsyncOperationStatus.SUCCEEDED.value:
-                resp = session.get(result_url)
-                resp.raise_for_status()
-                return resp.json()
-            elif status in (
-                AsyncOperationStatus.FAILED.value,
-                AsyncOperationStatus.CANCELED.value,
-            ):
-                error_message = f"{response_json['error']['message']}\nError code: {response_json['error']['code']}"
-                raise ResourceProvisioningError("management group", f"{error_message}")
-            else:
-                time.sleep(int(response.headers.get("Retry-After", 10)))
+            result, retry_after = self._check_management_group_creation_job(
+                status_url, result_url, session
+            )
+            if result is not None:
+                return result
+            time.sleep(retry_after)
+
+    def _check_management_group_creation_job(
+        self, status_url: str, result_url: str, session
+    ) -> Tuple[Optional[Dict], int]:
+        """Checks the status of a management group creation job once.
+
+        Returns:
+            A tuple of the details of the created management group, or None if
+            the job is still in progress, and the number of seconds Azure asks
+            us to wait before checking again.
+
+        Raises:
+            ResourceProvisioningError: Something went wrong when trying to
+                create the management group
+        """
+        response = session.get(status_url)
+        response.raise_for_status()
+        response_json = response.json()
+        status = response_json["status"]
+        retry_after = int(response.headers.get("Retry-After", 10))
+        if status == AsyncOperationStatus.SUCCEEDED.value:
+            resp = session.get(result_url)
+            resp.raise_for_status()
+            return resp.json(), retry_after
+        elif status in (
+            AsyncOperationStatus.FAILED.value,
+            AsyncOperationStatus.CANCELED.value,
+        ):
+            error_message = f"{response_json['error']['message']}\nError code: {response_json['error']['code']}"
+            raise ResourceProvisioningError("management group", f"{error_message}")
+        else:
+            return None, retry_after
+
+    @log_and_raise_exceptions
+    def check_management_group_operation(
+        self, payload: ManagementGroupOperationCSPPayload
+    ) -> Optional[ManagementGroupCSPResponse]:
+        """Checks once on a management group creation that was started without
+        waiting for it, so that many outstanding creations can be tracked by a
+        scheduled job instead of each pinning a worker.
+
+        Returns:
+            ManagementGroupCSPResponse for the created management group, or
+            None if Azure is still creating it
+
+        Raises:
+            ResourceProvisioningError: Azure failed to create the management group
+        """
+        sp_token = self._get_tenant_principal_token(payload.tenant_id)
+        session = self.sdk.requests.Session()
+        session.headers = make_auth_header(sp_token)
+
+        result, _ = self._check_management_group_creation_job(
+            payload.status_url, payload.result_url, session
+        )
+        if result is None:
+            return None
+
+        if payload.parent_id:
+            self._force_apply_mgmt_grp_parent(
+                session, payload.parent_id, payload.management_group_name
+            )
+        return ManagementGroupCSPResponse(**result)
 
     @log_and_raise_exceptions
     def _create_policy_definition(self, session, root_management_group_name, policy):
@@ -1380,13 +1552,23 @@ class AzureCloudProvider(CloudProviderInterface):
             )
 
         # Step 1: Retrieve or create an AAD identity for the user
+        # and set the recovery email
         user_result = self._get_existing_billing_owner(graph_token, payload)
-        if not user_result:
+        if user_result:
+            self._update_active_directory_user_email(
+                graph_token, user_result.id, payload
+            )
+        elif self.graph_batching:
+            user_result = self._create_active_directory_user_with_email(
+                graph_token, payload
+            )
+        else:
             user_result = self._create_active_directory_user(graph_token, payload)
+            self._update_active_directory_user_email(
+                graph_token, user_result.id, payload
+            )
 
-        # Step 2: Set the recovery email
-        self._update_active_directory_user_email(graph_token, user_result.id, payload)
-        # Step 3: Try and retrieve the billing admin role id. If it isn't found,
+        # Step 2: Try and retrieve the billing admin role id. If it isn't found,
         # activate the Billing Admin role and return the id
         # TODO: Find out if we need to check for the Billing Admin role first
         # for provisioning. Will the Billing Admin role be applied by default?
@@ -1395,7 +1577,7 @@ class AzureCloudProvider(CloudProviderInterface):
             billing_admin_role_id = self._activate_and_return_billing_admin_role_id(
                 graph_token
             )
-        # Step 4: Assign the Billing Administrator role to the new user
+        # Step 3: Assign the Billing Administrator role to the new user
         self._assign_billing_owner_role(
             graph_token, billing_admin_role_id, user_result.id
         )
@@ -1456,7 +1638,18 @@ class AzureCloudProvider(CloudProviderInterface):
 
         # Use the graph api to invite a user
 
-        body = {
+        url = f"{self.graph_resource}v1.0/invitations"
+        response = self.sdk.requests.post(
+            url,
+            json=self._invitation_body(payload),
+            headers=make_auth_header(graph_token),
+        )
+        response.raise_for_status()
+
+        return UserCSPResult(id=response.json()["invitedUser"]["id"])
+
+    def _invitation_body(self, payload: UserCSPPayload):
+        return {
             "invitedUserDisplayName": payload.display_name,
             "invitedUserEmailAddress": payload.email,
             "inviteRedirectUrl": "https://portal.azure.com",
@@ -1464,17 +1657,91 @@ class AzureCloudProvider(CloudProviderInterface):
             "invitedUserType": "Member",
         }
 
-        url = f"{self.graph_resource}v1.0/invitations"
-        response = self.sdk.requests.post(
-            url, json=body, headers=make_auth_header(graph_token)
+    @log_and_raise_exceptions
+    def create_users(
+        self, payloads: List[UserCSPPayload]
+    ) -> List[Union[UserCSPResult, UserProvisioningException]]:
+        """Invite many users to their tenants' Azure Active Directory, sending
+        up to 20 invitations per request with Graph JSON batching.
+
+        Returns:
+            A list in the same order as `payloads` holding the UserCSPResult
+            for each invited user, or the UserProvisioningException for a
+            user that could not be invited.
+        """
+        results = [None] * len(payloads)
+        by_tenant = {}
+        for index, payload in enumerate(payloads):
+            by_tenant.setdefault(payload.tenant_id, []).append(index)
+
+        for tenant_id, indexes in by_tenant.items():
+            graph_token = self._get_tenant_principal_token(
+                tenant_id, scope=self.graph_resource + DEFAULT_SCOPE_SUFFIX
+            )
+            batch = GraphBatch()
+            request_ids = [
+                batch.add("POST", "/invitations", self._invitation_body(payloads[i]))
+                for i in indexes
+            ]
+            responses = self._send_graph_batch(graph_token, batch)
+            for index, request_id in zip(indexes, request_ids):
+                response = responses[request_id]
+                if is_success(response):
+                    user_id = response["body"]["invitedUser"]["id"]
+                    results[index] = UserCSPResult(id=user_id)
+                else:
+                    results[index] = provisioning_error(response)
+
+        return results
+
+    def _send_graph_batch(self, graph_token, batch: GraphBatch) -> Dict[str, Dict]:
+        """Sends the requests in `batch`, in as few $batch requests as possible,
+        and returns their responses by request ID.
+
+        https://docs.microsoft.com/en-us/graph/json-batching
+        """
+        url = f"{self.graph_resource}v1.0/$batch"
+        responses = {}
+        for requests in batch.chunks():
+            response = self.sdk.requests.post(
+                url,
+                headers=make_auth_header(graph_token),
+                json={"requests": requests},
+                timeout=30,
+            )
+            response.raise_for_status()
+            for item in response.json()["responses"]:
+                responses[item["id"]] = item
+        return responses
+
+    @log_and_raise_exceptions
+    def _create_active_directory_user_with_email(
+        self, graph_token, payload
+    ) -> UserCSPResult:
+        """Creates an Azure Active Directory user and sets its recovery email in
+        a single $batch request. The email can only be set once the user
+        exists, so that request depends on the first.
+        """
+        batch = GraphBatch()
+        create_id = batch.add("POST", "/users", active_directory_user_body(payload))
+        email_id = batch.add(
+            "PATCH",
+            f"/users/{payload.user_principal_name}",
+            {"otherMails": [payload.email]},
+            depends_on=[create_id],
         )
-        response.raise_for_status()
+        responses = self._send_graph_batch(graph_token, batch)
 
-        return UserCSPResult(id=response.json()["invitedUser"]["id"])
+        for request_id in (create_id, email_id):
+            if not is_success(responses[request_id]):
+                raise provisioning_error(responses[request_id])
+        return UserCSPResult(**responses[create_id]["body"])
 
     @log_and_raise_exceptions
     def _create_active_directory_user(self, graph_token, payload) -> UserCSPResult:
-        result = create_active_directory_user(graph_token, self.graph_resource, payload)
+        result = create_active_directory_user(
+            graph_token, self.graph_resource, payload, http=self.sdk.requests
+        )
         result.raise_for_status()
 
         return UserCSPResult(**result.json())
@@ -1550,13 +1817,14 @@ class AzureCloudProvider(CloudProviderInterface):
                 f"Failed to create user role assignment: {response.json()}"
             )
 
-    def _get_tenant_admin_token(self, tenant_id, scope):
+    def _get_tenant_admin_token(self, tenant_id, scope, refresh=False):
         creds = self._source_tenant_creds(tenant_id)
         return self._get_user_principal_token_for_scope(
             creds.tenant_admin_username,
             creds.tenant_admin_password,
             creds.tenant_id,
             scope,
+            refresh=refresh,
         )
 
     def _get_root_provisioning_token(self):
@@ -1565,6 +1833,12 @@ class AzureCloudProvider(CloudProviderInterface):
             creds.root_tenant_id, creds.root_sp_client_id, creds.root_sp_key
         )
 
+    def _request_principal_token(self, tenant_id, payload):
+        response = get_principal_auth_token_response(
+            tenant_id, payload, http=self.sdk.requests
+        )
+        return response.get("access_token"), response.get("expires_in")
+
     @log_and_raise_exceptions
     def _get_service_principal_token(
         self, tenant_id, client_id, secret_key, scope=None
@@ -1575,7 +1849,10 @@ class AzureCloudProvider(CloudProviderInterface):
             client_id=client_id,
             client_secret=secret_key,
         )
-        token = get_principal_auth_token(tenant_id, payload)
+        token = self.token_cache.get(
+            (tenant_id, client_id, payload_scope),
+            lambda: self._request_principal_token(tenant_id, payload),
+        )
         if token is None:
             message = f"Failed to get service principal token for scope '{payload_scope}' in tenant '{tenant_id}'"
             app.logger.error(message, exc_info=1)
@@ -1584,14 +1861,20 @@ class AzureCloudProvider(CloudProviderInterface):
             return token
 
     @log_and_raise_exceptions
-    def _get_user_principal_token_for_scope(self, username, password, tenant_id, scope):
+    def _get_user_principal_token_for_scope(
+        self, username, password, tenant_id, scope, refresh=False
+    ):
         payload = UserPrincipalTokenPayload(
             client_id=self.powershell_client_id,
             username=username,
             password=password,
             scope=scope,
         )
-        token = get_principal_auth_token(tenant_id, payload)
+        token = self.token_cache.get(
+            (tenant_id, f"{self.powershell_client_id}:{username}", scope),
+            lambda: self._request_principal_token(tenant_id, payload),
+            refresh=refresh,
+        )
         if token is None:
             message = f"Failed to get user principal token for scope '{scope}' in tenant '{tenant_id}'"
             app.logger.error(message, exc_info=1)
@@ -1609,6 +1892,10 @@ class AzureCloudProvider(CloudProviderInterface):
 
     def _get_tenant_principal_token(self, tenant_id, scope=None):
         creds = self._source_tenant_creds(tenant_id)
+        if creds.tenant_sp_client_id is None:
+            # The tenant principal may have been created by another worker since
+            # these credentials were cached.
+            creds = self._source_tenant_creds(tenant_id, refresh=True)
         return self._get_service_principal_token(
             creds.tenant_id,
             creds.tenant_sp_client_id,
@@ -1643,21 +1930,28 @@ class AzureCloudProvider(CloudProviderInterface):
     ) -> KeyVaultCredentials:
         hashed = sha256_hex(tenant_id)
         self.set_secret(hashed, json.dumps(secret.dict()))
+        self.credential_cache.invalidate(tenant_id)
+        self.token_cache.invalidate(tenant_id)
         return secret
 
     def update_tenant_creds(
         self, tenant_id, secret: KeyVaultCredentials
     ) -> KeyVaultCredentials:
         hashed = sha256_hex(tenant_id)
-        curr_secrets = self._source_tenant_creds(tenant_id)
+        curr_secrets = self._source_tenant_creds(tenant_id, refresh=True)
         updated_secrets = curr_secrets.merge_credentials(secret)
         self.set_secret(hashed, json.dumps(updated_secrets.dict()))
+        self.credential_cache.invalidate(tenant_id)
+        self.token_cache.invalidate(tenant_id)
         return updated_secrets
 
-    def _source_tenant_creds(self, tenant_id) -> KeyVaultCredentials:
-        hashed = sha256_hex(tenant_id)
-        raw_creds = self.get_secret(hashed)
-        return KeyVaultCredentials(**json.loads(raw_creds))
+    def _source_tenant_creds(self, tenant_id, refresh=False) -> KeyVaultCredentials:
+        def load():
+            hashed = sha256_hex(tenant_id)
+            raw_creds = self.get_secret(hashed)
+            return KeyVaultCredentials(**json.loads(raw_creds))
+
+        return self.credential_cache.get(tenant_id, load, refresh=refresh)
 
     @log_and_raise_exceptions
     def get_reporting_data(self, payload: CostManagementQueryCSPPayload, token=None):
@@ -1844,9 +2138,11 @@ class AzureCloudProvider(CloudProviderInterface):
         )
         elevated_token = None
         try:
+            # Mint a new token after elevating instead of reusing the cached one.
             elevated_token = self._get_tenant_admin_token(
                 tenant_id,
                 self.sdk.cloud.endpoints.resource_manager + DEFAULT_SCOPE_SUFFIX,
+                refresh=True,
             )
             yield elevated_token
         finally:
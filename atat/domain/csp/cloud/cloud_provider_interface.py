@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 
 
 class CloudProviderInterface:  # pragma: no cover
@@ -54,6 +54,23 @@ class CloudProviderInterface:  # pragma: no cover
         """
         raise NotImplementedError()
 
+    def create_users(self, payloads: List) -> List:
+        """Create many users with as few CSP requests as possible.
+
+        Arguments:
+            payloads -- a list of UserCSPPayload objects
+
+        Returns:
+            list -- in the same order as `payloads`, the UserCSPResult for
+            each created user or the exception for a user that could not be
+            created
+
+        Raises:
+            ConnectionException: Issue with the CSP API connection
+            UnknownServerException: Unknown issue on the CSP side
+        """
+        raise NotImplementedError()
+
     def disable_user(self, tenant_id: str, role_assignment_cloud_id: str) -> bool:
         """Revoke all privileges for a user. Used to prevent user access while a full
         delete is being processed.
@@ -88,3 +105,15 @@ class CloudProviderInterface:  # pragma: no cover
 
     def create_application(self, payload):
         raise NotImplementedError()
+
+    def check_management_group_operation(self, payload):
+        """Check once on an application or environment management group that
+        the CSP accepted but had not finished creating.
+
+        Returns:
+            The created management group, or None if it is still being created
+
+        Raises:
+            ResourceProvisioningError: The CSP failed to create the management group
+        """
+        raise NotImplementedError()
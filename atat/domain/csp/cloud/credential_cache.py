@@ -0,0 +1,57 @@
+import threading
+import time
+
+from cachetools import TTLCache
+
+
+class CredentialCache(object):
+    """An in-process LRU cache with a TTL for tenant credentials read from Key
+    Vault, so repeated tenant operations do not each cost a Key Vault round
+    trip.
+
+    Credentials are only ever held in memory. Callers must `invalidate` a
+    tenant whenever they write its credentials. Hit and miss counts are
+    available from `metrics`.
+    """
+
+    def __init__(self, maxsize=256, ttl=300, timer=time.monotonic):
+        self.hits = 0
+        self.misses = 0
+        self._entries = (
+            TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+            if maxsize > 0 and ttl > 0
+            else None
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key, load, refresh=False):
+        """Returns the cached value for `key`, calling `load` when it is missing,
+        expired or `refresh` is set.
+        """
+        with self._lock:
+            if self._entries is not None and not refresh and key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = load()
+        self.set(key, value)
+        return value
+
+    def set(self, key, value):
+        if self._entries is None:
+            return
+
+        with self._lock:
+            self._entries[key] = value
+
+    def invalidate(self, key):
+        if self._entries is None:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def metrics(self):
+        size = 0 if self._entries is None else len(self._entries)
+        return {"hits": self.hits, "misses": self.misses, "size": size}
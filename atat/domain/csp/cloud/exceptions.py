@@ -68,6 +68,20 @@ class UnknownServerException(GeneralCSPException):
         return f"A server error with status code [{self.status_code}] occured: {self.server_error}"
 
 
+class ThrottlingException(GeneralCSPException):
+    """The CSP is throttling our requests, or we are holding them back so that
+    it does not. Callers should wait `retry_after` seconds before trying again.
+    """
+
+    def __init__(self, api, retry_after):
+        self.api = api
+        self.retry_after = retry_after
+
+    @property
+    def message(self):
+        return f"Calls to {self.api} are throttled; retry in {self.retry_after:.0f}s"
+
+
 class EnvironmentCreationException(GeneralCSPException):
     """If there was an error in creating the environment"""
 
@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional
+
+from .exceptions import UserProvisioningException
+
+# Microsoft Graph accepts at most 20 requests in a single $batch request.
+GRAPH_BATCH_LIMIT = 20
+
+
+class GraphBatch(object):
+    """Collects Microsoft Graph requests to send with JSON batching, so many
+    requests cost a single round trip.
+
+    Requests may depend on earlier requests in the batch; Graph runs a
+    request only after the requests it depends on have succeeded.
+
+    https://docs.microsoft.com/en-us/graph/json-batching
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def add(
+        self,
+        method: str,
+        url: str,
+        body: Optional[Dict] = None,
+        depends_on: Optional[List[str]] = None,
+    ) -> str:
+        """Adds a request and returns its ID. `url` is relative to the Graph
+        version root, e.g. `/users`.
+        """
+        request_id = str(len(self.requests) + 1)
+        request = {"id": request_id, "method": method, "url": url}
+        if body is not None:
+            request["body"] = body
+            request["headers"] = {"Content-Type": "application/json"}
+        if depends_on:
+            request["dependsOn"] = list(depends_on)
+        self.requests.append(request)
+        return request_id
+
+    def chunks(self, size=GRAPH_BATCH_LIMIT) -> List[List[Dict]]:
+        """Splits the requests into $batch bodies of at most `size` requests.
+        A request is always sent in the same body as the requests it depends
+        on, since dependencies cannot span $batch requests.
+        """
+        groups = {}
+        group_of = {}
+        for request in self.requests:
+            depends_on = request.get("dependsOn", [])
+            group = group_of[depends_on[0]] if depends_on else request["id"]
+            if any(group_of[dependency] != group for dependency in depends_on):
+                raise ValueError(
+                    f"Graph request {request['id']} depends on unrelated requests"
+                )
+            groups.setdefault(group, []).append(request)
+            group_of[request["id"]] = group
+
+        chunks = []
+        for group in groups.values():
+            if len(group) > size:
+                raise ValueError(
+                    f"{len(group)} dependent Graph requests do not fit in one batch"
+                )
+            if not chunks or len(chunks[-1]) + len(group) > size:
+                chunks.append([])
+            chunks[-1].extend(group)
+        return chunks
+
+
+def is_success(response: Dict) -> bool:
+    return 200 <= response["status"] < 300
+
+
+def provisioning_error(response: Dict) -> UserProvisioningException:
+    """Maps a failed response from a $batch request to an exception. A 424
+    status means a request this one depended on failed, so it was not run.
+    """
+    if response["status"] == 424:
+        return UserProvisioningException(
+            f"Graph request {response['id']} was not run because a request it"
+            " depends on failed"
+        )
+
+    error = (response.get("body") or {}).get("error") or {}
+    return UserProvisioningException(
+        f"Graph request {response['id']} failed with status {response['status']}:"
+        f" {error.get('code')} {error.get('message')}"
+    )
@@ -0,0 +1,153 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+
+class AzureRetry(Retry):
+    """Retry policy for calls to Azure.
+
+    Idempotent requests are retried on connection errors and 5xx responses with
+    exponential backoff. Any request, including a POST, is also retried when
+    Azure throttles it (a 429, or a 503 carrying `Retry-After`), since the
+    request was rejected without being acted on. `Retry-After` is honoured but
+    capped at `BACKOFF_MAX` so a single call cannot stall a worker indefinitely.
+    """
+
+    STATUS_FORCELIST = frozenset([500, 502, 503, 504])
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 or (
+            has_retry_after and status_code in self.RETRY_AFTER_STATUS_CODES
+        ):
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.BACKOFF_MAX)
+
+
+class PooledHTTPClient(object):
+    """A drop-in for the `requests` module that keeps one keep-alive
+    `requests.Session` per host, so repeated calls to management.azure.com,
+    graph.microsoft.com and login.microsoftonline.com reuse their TCP and TLS
+    connections instead of paying for a new handshake each time.
+
+    Every request gets `timeout` unless the caller passes its own. Sessions are
+    created lazily and discarded after a fork, so Celery's prefork workers never
+    share sockets with their parent process.
+
+    An optional `throttle` (see `AzureThrottle`) is consulted before each
+    request is sent and told about each response.
+    """
+
+    exceptions = requests.exceptions
+
+    def __init__(
+        self, pool_size=10, max_retries=3, backoff_factor=0.5, timeout=30, throttle=None
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.throttle = throttle
+        self.retry = AzureRetry(
+            total=max_retries,
+            status_forcelist=AzureRetry.STATUS_FORCELIST,
+            backoff_factor=backoff_factor,
+            raise_on_status=False,
+        )
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._pid = os.getpid()
+
+    def _make_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_size, max_retries=self.retry
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def session_for(self, url):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if self._pid != os.getpid():
+                self._sessions = {}
+                self._pid = os.getpid()
+            if host not in self._sessions:
+                self._sessions[host] = self._make_session()
+            return self._sessions[host]
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if self.throttle is None:
+            return self.session_for(url).request(method, url, **kwargs)
+
+        headers = kwargs.get("headers")
+        self.throttle.before_request(url, headers)
+        response = self.session_for(url).request(method, url, **kwargs)
+        self.throttle.after_response(url, headers, response)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def Session(self):
+        return PooledSession(self)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+class PooledSession(object):
+    """Stands in for `requests.Session` when a caller wants a set of default
+    headers (usually an auth header) for several calls. Requests are sent
+    through the client's pooled per-host sessions.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.headers = CaseInsensitiveDict()
+
+    def request(self, method, url, headers=None, **kwargs):
+        merged_headers = CaseInsensitiveDict(self.headers)
+        merged_headers.update(headers or {})
+        return self.client.request(method, url, headers=merged_headers, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
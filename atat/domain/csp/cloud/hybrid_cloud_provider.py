@@ -1,6 +1,6 @@
 import contextlib
 from operator import itemgetter
-from typing import Dict, Union
+from typing import Dict, List, Optional, Union
 from uuid import uuid4
 
 from atat.domain.csp.cloud.azure_cloud_provider import AzureCloudProvider
@@ -26,6 +26,8 @@ from atat.domain.csp.cloud.models import (
     InitialMgmtGroupVerificationCSPPayload,
     InitialMgmtGroupVerificationCSPResult,
     KeyVaultCredentials,
+    ManagementGroupCSPResponse,
+    ManagementGroupOperationCSPPayload,
     PoliciesCSPPayload,
     PoliciesCSPResult,
     PrincipalAdminRoleCSPPayload,
@@ -282,9 +284,17 @@ class HybridCloudProvider(object):
         payload.display_name = f"{self.HYBRID_PREFIX} {payload.display_name}"
         return self.azure.create_environment(payload)
 
+    def check_management_group_operation(
+        self, payload: ManagementGroupOperationCSPPayload
+    ) -> Optional[ManagementGroupCSPResponse]:
+        return self.azure.check_management_group_operation(payload)
+
     def create_user(self, payload: UserCSPPayload) -> UserCSPResult:
         return self.azure.create_user(payload)
 
+    def create_users(self, payloads: List[UserCSPPayload]) -> List:
+        return self.azure.create_users(payloads)
+
     def create_user_role(self, payload: UserRoleCSPPayload) -> UserRoleCSPResult:
         return self.azure.create_user_role(payload)
 
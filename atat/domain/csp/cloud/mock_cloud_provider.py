@@ -35,6 +35,8 @@ from .models import (
     InitialMgmtGroupCSPResult,
     InitialMgmtGroupVerificationCSPPayload,
     InitialMgmtGroupVerificationCSPResult,
+    ManagementGroupCSPResponse,
+    ManagementGroupOperationCSPPayload,
     PoliciesCSPPayload,
     PoliciesCSPResult,
     PrincipalAdminRoleCSPPayload,
@@ -485,11 +487,30 @@ class MockCloudProvider(CloudProviderInterface):
             name=payload.management_group_name,
         )
 
+    def check_management_group_operation(
+        self, payload: ManagementGroupOperationCSPPayload
+    ):
+        self._maybe_raise(self.UNAUTHORIZED_RATE, GeneralCSPException)
+
+        return ManagementGroupCSPResponse(
+            id=f"{AZURE_MGMNT_PATH}{payload.management_group_name}",
+            name=payload.management_group_name,
+        )
+
     def create_user(self, payload: UserCSPPayload):
         self._maybe_raise(self.UNAUTHORIZED_RATE, GeneralCSPException)
 
         return UserCSPResult(id=str(uuid4()))
 
+    def create_users(self, payloads):
+        results = []
+        for payload in payloads:
+            try:
+                results.append(self.create_user(payload))
+            except GeneralCSPException as exc:
+                results.append(exc)
+        return results
+
     def get_credentials(self, scope="portfolio", tenant_id=None):
         return self.root_creds()
 
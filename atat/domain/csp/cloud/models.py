@@ -474,6 +474,10 @@ class InitialMgmtGroupCSPPayload(ManagementGroupCSPPayload):
 
 class InitialMgmtGroupCSPResult(AliasModel):
     initial_management_group_name: str
+    # Only set when the management group is still being created, so that the
+    # verification stage can check on it instead of blocking a worker.
+    initial_management_group_status_url: Optional[str]
+    initial_management_group_result_url: Optional[str]
 
     class Config:
         fields = {
@@ -487,6 +491,8 @@ class InitialMgmtGroupCSPResult(AliasModel):
 
 class InitialMgmtGroupVerificationCSPPayload(ManagementGroupGetCSPPayload):
     user_object_id: str
+    initial_management_group_status_url: Optional[str]
+    initial_management_group_result_url: Optional[str]
 
     class Config:
         fields = {"management_group_name": "initial_management_group_name"}
@@ -504,6 +510,34 @@ class EnvironmentCSPResult(ManagementGroupCSPResponse):
     pass
 
 
+class ManagementGroupOperationCSPResult(AliasModel):
+    """A management group creation that Azure accepted but has not finished.
+
+    https://docs.microsoft.com/en-us/azure/azure-resource-manager/management/async-operations
+    """
+
+    management_group_name: str
+    status_url: str
+    result_url: str
+
+    class Config:
+        fields = {
+            "status_url": "Azure-AsyncOperation",
+            "result_url": "Location",
+        }
+
+
+class ManagementGroupOperationCSPPayload(BaseCSPPayload):
+    management_group_name: str
+    status_url: str
+    result_url: str
+    parent_id: Optional[str]
+
+    _normalize_parent_id = validator("parent_id", allow_reuse=True)(
+        normalize_management_group_id
+    )
+
+
 class KeyVaultCredentials(BaseModel):
     root_sp_client_id: Optional[str]
     root_sp_key: Optional[str]
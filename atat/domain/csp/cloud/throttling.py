@@ -0,0 +1,194 @@
+import base64
+import binascii
+import json
+import math
+import time
+from urllib.parse import urlsplit
+
+from flask import current_app as app
+from redis.exceptions import RedisError
+
+from .exceptions import ThrottlingException
+
+# Refills a token bucket for the time since it was last used, then takes a
+# token if there is one. Returns "0" when a token was taken, otherwise the
+# number of seconds until one will be available. The Redis clock is used so
+# that workers with drifting clocks share one view of the bucket.
+TAKE_TOKEN = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+def api_family(url):
+    """Returns which Azure API a URL belongs to, or None for APIs that are not
+    throttled per tenant (e.g. authentication and Key Vault).
+    """
+    parts = urlsplit(url)
+    if parts.netloc == "graph.microsoft.com":
+        return "graph"
+    if parts.netloc == "management.azure.com":
+        if "/providers/Microsoft.Billing/" in parts.path:
+            return "billing"
+        return "arm"
+    return None
+
+
+def tenant_from_headers(headers):
+    """Reads the tenant a request is made for from the `tid` claim of its
+    bearer token. The token is not verified; it is only used as a key.
+    """
+    authorization = (headers or {}).get("Authorization", "")
+    if not authorization.startswith("Bearer "):
+        return None
+    try:
+        claims = authorization[len("Bearer ") :].split(".")[1]
+        claims += "=" * (-len(claims) % 4)
+        return json.loads(base64.urlsafe_b64decode(claims)).get("tid")
+    except (IndexError, ValueError, binascii.Error, AttributeError):
+        return None
+
+
+def retry_after(response, default):
+    """Returns the seconds a throttled response's Retry-After header asks to
+    wait, or `default` if it has no such header.
+    """
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter(object):
+    """Token buckets, shared by every worker through Redis, that cap how many
+    calls per second are sent to each API family for each tenant.
+
+    `rates` maps an API family to its rate; a bucket holds up to a second's
+    worth of tokens. When a bucket is empty the caller waits for a token, or
+    gets a ThrottlingException if that would take longer than `max_wait`
+    seconds.
+    """
+
+    def __init__(self, redis, rates, max_wait=10, key_prefix="azure:ratelimit"):
+        self.redis = redis
+        self.rates = rates
+        self.max_wait = max_wait
+        self.key_prefix = key_prefix
+        self._take_token = redis.register_script(TAKE_TOKEN)
+
+    def acquire(self, tenant_id, family):
+        rate = self.rates.get(family)
+        if not rate:
+            return
+
+        key = f"{self.key_prefix}:{family}:{tenant_id}"
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = float(self._take_token(keys=[key], args=[rate, max(rate, 1)]))
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise ThrottlingException(family, wait)
+            time.sleep(wait)
+
+
+class CircuitBreaker(object):
+    """Stops calls to a tenant's API family for a while once `threshold`
+    responses in a row have been throttled (429) or failed (5xx), instead of
+    adding to the load that caused them.
+
+    The circuit stays open for `cooldown` seconds, or for as long as the last
+    response's `Retry-After` asks if that is longer. Calls made while it is
+    open raise a ThrottlingException without reaching Azure.
+    """
+
+    def __init__(self, redis, threshold=5, cooldown=30, key_prefix="azure:circuit"):
+        self.redis = redis
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.key_prefix = key_prefix
+
+    def _keys(self, tenant_id, family):
+        key = f"{self.key_prefix}:{family}:{tenant_id}"
+        return f"{key}:open", f"{key}:failures"
+
+    def check(self, tenant_id, family):
+        open_key, _ = self._keys(tenant_id, family)
+        remaining = self.redis.pttl(open_key)
+        if remaining > 0:
+            raise ThrottlingException(family, remaining / 1000)
+
+    def record(self, tenant_id, family, response):
+        open_key, failures_key = self._keys(tenant_id, family)
+        if response.status_code != 429 and response.status_code < 500:
+            self.redis.delete(failures_key)
+            return
+
+        pipeline = self.redis.pipeline()
+        pipeline.incr(failures_key)
+        pipeline.expire(failures_key, self.cooldown)
+        failures, _ = pipeline.execute()
+        if failures < self.threshold:
+            return
+
+        delay = retry_after(response, self.cooldown)
+        self.redis.set(open_key, 1, px=int(math.ceil(delay * 1000)))
+        self.redis.delete(failures_key)
+        app.logger.warning(
+            "Opened the %s circuit for tenant %s for %ss",
+            family,
+            tenant_id,
+            delay,
+            extra={"tags": ["throttling"]},
+        )
+
+
+class AzureThrottle(object):
+    """Applies a RateLimiter and a CircuitBreaker to the requests sent by a
+    PooledHTTPClient. Requests are keyed by the tenant in their bearer token
+    and by API family. If Redis is unavailable, requests are sent unthrottled.
+    """
+
+    def __init__(self, rate_limiter: RateLimiter, circuit_breaker: CircuitBreaker):
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+
+    def _key(self, url, headers):
+        family = api_family(url)
+        if family is None:
+            return None
+        return tenant_from_headers(headers) or "unknown", family
+
+    def before_request(self, url, headers):
+        key = self._key(url, headers)
+        if key is None:
+            return
+        try:
+            self.circuit_breaker.check(*key)
+            self.rate_limiter.acquire(*key)
+        except RedisError:
+            app.logger.warning("Could not apply Azure rate limits", exc_info=1)
+
+    def after_response(self, url, headers, response):
+        key = self._key(url, headers)
+        if key is None:
+            return
+        try:
+            self.circuit_breaker.record(*key, response)
+        except RedisError:
+            app.logger.warning("Could not update the Azure circuit breaker", exc_info=1)
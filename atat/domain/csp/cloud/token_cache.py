@@ -0,0 +1,147 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+
+from cryptography.fernet import Fernet, InvalidToken
+from flask import current_app as app
+from redis.exceptions import RedisError
+
+
+def derive_encryption_key(secret):
+    """Turns an arbitrary secret (e.g. the app's SECRET_KEY) into a Fernet key."""
+    digest = hashlib.sha256(secret.encode()).digest()
+    return base64.urlsafe_b64encode(digest)
+
+
+class TokenCache(object):
+    """Caches OAuth access tokens by (tenant, client, scope) until shortly
+    before they expire.
+
+    A token is refreshed once fewer than `refresh_margin` seconds of its
+    `expires_in` lifetime remain. Concurrent callers asking for the same key
+    wait on a single refresh instead of each minting their own token.
+
+    When a `redis` client is given, tokens are also shared between processes
+    (e.g. Celery workers). They are encrypted with `encryption_key` before they
+    are written, and a Redis lock single-flights refreshes across processes.
+    Redis errors are logged and the token is fetched directly.
+    """
+
+    def __init__(
+        self,
+        refresh_margin=300,
+        redis=None,
+        encryption_key=None,
+        key_prefix="azure:token",
+        lock_timeout=30,
+    ):
+        if redis is not None and encryption_key is None:
+            raise ValueError("An encryption key is required to cache tokens in Redis")
+
+        self.refresh_margin = refresh_margin
+        self.redis = redis
+        self.fernet = Fernet(encryption_key) if encryption_key else None
+        self.key_prefix = key_prefix
+        self.lock_timeout = lock_timeout
+        self._tokens = {}
+        self._locks = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def get(self, key, fetch, refresh=False):
+        """Returns the cached token for `key`, calling `fetch` when there is no
+        usable token. `fetch` must return an `(access_token, expires_in)` pair;
+        a `None` token is returned to the caller but never cached. Pass
+        `refresh=True` to ignore any cached token.
+        """
+        if not refresh:
+            token = self._get_local(key)
+            if token is not None:
+                return token
+
+        with self._lock_for(key):
+            if not refresh:
+                token = self._get_local(key)
+                if token is not None:
+                    return token
+
+            if self.redis is None:
+                return self._fetch(key, fetch)[0]
+
+            try:
+                return self._get_shared(key, fetch, refresh)
+            except RedisError:
+                app.logger.warning("Could not use the shared token cache", exc_info=1)
+                return self._fetch(key, fetch)[0]
+
+    def invalidate(self, tenant_id):
+        """Drops every locally cached token for a tenant. Tokens shared through
+        Redis expire on their own.
+        """
+        for key in list(self._tokens):
+            if key[0] == tenant_id:
+                self._tokens.pop(key, None)
+
+    def _lock_for(self, key):
+        with self._locks_lock:
+            return self._locks[key]
+
+    def _get_local(self, key):
+        cached = self._tokens.get(key)
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+        return None
+
+    def _fetch(self, key, fetch):
+        """Calls `fetch` and caches the token locally if it will not need a
+        refresh straight away. Returns the token and the time it should be
+        refreshed at, or `None` when it was not cached.
+        """
+        token, expires_in = fetch()
+        refresh_at = time.time() + int(expires_in or 0) - self.refresh_margin
+        if token is None or refresh_at <= time.time():
+            return token, None
+
+        self._tokens[key] = (token, refresh_at)
+        return token, refresh_at
+
+    def _redis_key(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return f"{self.key_prefix}:{digest}"
+
+    def _get_shared(self, key, fetch, refresh):
+        redis_key = self._redis_key(key)
+        with self.redis.lock(
+            f"{redis_key}:lock",
+            timeout=self.lock_timeout,
+            blocking_timeout=self.lock_timeout,
+        ):
+            if not refresh:
+                token = self._read_shared(key, redis_key)
+                if token is not None:
+                    return token
+
+            token, refresh_at = self._fetch(key, fetch)
+            if refresh_at is not None:
+                self.redis.set(
+                    redis_key,
+                    self.fernet.encrypt(json.dumps([token, refresh_at]).encode()),
+                    ex=max(int(refresh_at - time.time()), 1),
+                )
+            return token
+
+    def _read_shared(self, key, redis_key):
+        encrypted = self.redis.get(redis_key)
+        if encrypted is None:
+            return None
+        try:
+            token, refresh_at = json.loads(self.fernet.decrypt(encrypted))
+        except InvalidToken:
+            return None
+
+        if refresh_at <= time.time():
+            return None
+        self._tokens[key] = (token, refresh_at)
+        return token
@@ -2,7 +2,6 @@ import re
 import string
 
 import requests
-from msrestazure.azure_cloud import AZURE_PUBLIC_CLOUD as cloud
 
 OFFICE_365_DOMAIN = "onmicrosoft.com"
 
@@ -25,29 +24,28 @@ def generate_mail_nickname(name):
     return re.sub(f"[{ESCAPED_PUNCTUATION} ]+", ".", name).lower()
 
 
-def get_principal_auth_token(tenant_id, payload):
-    """Returns an OAuth Access token for a User or Service Principal
+def get_principal_auth_token_response(tenant_id, payload, http=None):
+    """Requests an OAuth Access token for a User or Service Principal
 
     args:
         tenant_id (str)
         payload (UserPrincipalTokenPayload or ServicePrincipalTokenPayload)
+        http: the `requests` module or a PooledHTTPClient to send the request with
     returns:
-        str: token
-        or
-        None
+        dict: the token response, including `access_token` and `expires_in`
     """
 
+    from msrestazure.azure_cloud import AZURE_PUBLIC_CLOUD as cloud
+
     url = f"{cloud.endpoints.active_directory}/{tenant_id}/oauth2/v2.0/token"
-    response = requests.post(url, data=payload.dict(), timeout=30)
+    http = http or requests
+    response = http.post(url, data=payload.dict(), timeout=30)
     response.raise_for_status()
-    token = response.json().get("access_token")
-    return token
+    return response.json()
 
 
-def create_active_directory_user(
-    graph_token, graph_resource, payload, password_reset=True
-):
-    request_body = {
+def active_directory_user_body(payload, password_reset=True):
+    return {
         "accountEnabled": True,
         "displayName": payload.display_name,
         "mailNickname": payload.mail_nickname,
@@ -60,9 +58,15 @@ def create_active_directory_user(
         "surname": payload.last_name,
     }
 
+
+def create_active_directory_user(
+    graph_token, graph_resource, payload, password_reset=True, http=None
+):
+    request_body = active_directory_user_body(payload, password_reset)
     url = f"{graph_resource}/v1.0/users"
 
-    return requests.post(
+    http = http or requests
+    return http.post(
         url,
         headers=make_auth_header(graph_token),
         json=request_body,
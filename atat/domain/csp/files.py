@@ -1,8 +1,23 @@
-from typing import Dict, Tuple
+import mimetypes
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
 from uuid import uuid4
 
 import pendulum
 
+from atat.domain.exceptions import NotFoundError
+
+
+class FileProperties(NamedTuple):
+    name: str
+    filename: str
+    size: int
+    # Unquoted entity tag; changes whenever the file's content changes
+    etag: str
+    last_modified: Optional[datetime]
+    content_type: str
+
 
 class FileService:
     def service_name(self) -> str:  # pragma: no cover
@@ -22,13 +37,36 @@ class FileService:
     def download_task_order(self, object_name):  # pragma: no cover
         raise NotImplementedError()
 
+    def get_properties(self, object_name) -> FileProperties:  # pragma: no cover
+        raise NotImplementedError()
+
+    def stream(
+        self, object_name, offset=0, length=None, etag=None
+    ) -> Iterator[bytes]:  # pragma: no cover
+        """
+        Returns an iterator over the file's bytes from `offset`, `length` bytes
+        at most, in chunks of at most FILE_DOWNLOAD_CHUNK_SIZE bytes. If `etag`
+        is given and the file has changed since, nothing is read. Raises
+        NotFoundError if the file does not exist or has changed.
+        """
+        raise NotImplementedError()
+
     def client_upload_config(self) -> Dict[str, str]:
         return {}
 
 
 class MockFileService(FileService):
+    """
+    Serves every object as the sample task order PDF, unless a file named
+    after the object exists in MOCK_FILE_STORAGE_PATH.
+    """
+
+    SAMPLE_FILE = "tests/fixtures/sample.pdf"
+
     def __init__(self, config):
         self.config = config
+        self.storage_path = config.get("MOCK_FILE_STORAGE_PATH")
+        self.chunk_size = config.get("FILE_DOWNLOAD_CHUNK_SIZE") or 1024 * 1024
 
     def service_name(self) -> str:
         return "mock"
@@ -40,13 +78,58 @@ class MockFileService(FileService):
         return ""
 
     def download_task_order(self, object_name):
-        with open("tests/fixtures/sample.pdf", "rb") as some_bytes:
+        with open(self._path(object_name), "rb") as some_bytes:
             return {
                 "name": object_name,
                 "content": some_bytes.read(),
-                "filename": "sample.pdf",
+                "filename": os.path.basename(self._path(object_name)),
             }
 
+    def get_properties(self, object_name) -> FileProperties:
+        path = self._path(object_name)
+        stat = os.stat(path)
+        filename = os.path.basename(path)
+        return FileProperties(
+            name=object_name,
+            filename=filename,
+            size=stat.st_size,
+            etag=f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+            last_modified=datetime.fromtimestamp(int(stat.st_mtime), timezone.utc),
+            content_type=mimetypes.guess_type(filename)[0]
+            or "application/octet-stream",
+        )
+
+    def stream(self, object_name, offset=0, length=None, etag=None):
+        if etag is not None and self.get_properties(object_name).etag != etag:
+            raise NotFoundError("file")
+
+        file_ = open(self._path(object_name), "rb")
+        file_.seek(offset)
+        return self._read_chunks(file_, length)
+
+    def _read_chunks(self, file_, length):
+        with file_:
+            remaining = length
+            while remaining is None or remaining > 0:
+                size = (
+                    self.chunk_size
+                    if remaining is None
+                    else min(self.chunk_size, remaining)
+                )
+                chunk = file_.read(size)
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def _path(self, object_name):
+        if self.storage_path:
+            path = os.path.join(self.storage_path, os.path.basename(object_name))
+            if os.path.isfile(path):
+                return path
+        return self.SAMPLE_FILE
+
 
 class AzureFileService(FileService):
     DEFAULT_FILENAME = "task-order.pdf"
@@ -56,10 +139,18 @@ class AzureFileService(FileService):
         self.storage_key = config["AZURE_STORAGE_KEY"]
         self.container_name = config["AZURE_TO_BUCKET_NAME"]
         self.timeout = config["PERMANENT_SESSION_LIFETIME"]
+        self.chunk_size = config.get("FILE_DOWNLOAD_CHUNK_SIZE") or 1024 * 1024
 
+        import azure.core
+        import azure.core.exceptions
         import azure.storage.blob
 
         self.blob = azure.storage.blob
+        self.match_conditions = azure.core.MatchConditions
+        self.not_found_errors = (
+            azure.core.exceptions.ResourceNotFoundError,
+            azure.core.exceptions.ResourceModifiedError,
+        )
 
     def service_name(self) -> str:
         return "azure"
@@ -120,6 +211,50 @@ class AzureFileService(FileService):
             "filename": self.get_filename_from_blob(blob),
         }
 
+    def get_properties(self, object_name) -> FileProperties:
+        try:
+            properties = self._blob_client(object_name).get_blob_properties()
+        except self.not_found_errors:
+            raise NotFoundError("file")
+
+        return FileProperties(
+            name=object_name,
+            filename=(properties.metadata or {}).get("filename", self.DEFAULT_FILENAME),
+            size=properties.size,
+            etag=properties.etag.strip('"'),
+            last_modified=properties.last_modified,
+            content_type=properties.content_settings.content_type
+            or "application/octet-stream",
+        )
+
+    def stream(self, object_name, offset=0, length=None, etag=None):
+        conditions = {}
+        if etag is not None:
+            conditions = {
+                "etag": f'"{etag}"',
+                "match_condition": self.match_conditions.IfNotModified,
+            }
+
+        try:
+            # The first chunk is requested here, so a missing or changed blob
+            # is reported before any of the response is sent.
+            downloader = self._blob_client(object_name).download_blob(
+                offset=offset, length=length, **conditions
+            )
+        except self.not_found_errors:
+            raise NotFoundError("file")
+        return downloader.chunks()
+
+    def _blob_client(self, object_name):
+        return self.blob.BlobClient(
+            account_url=f"https://{self.account_name}.blob.core.windows.net",
+            container_name=self.container_name,
+            blob_name=object_name,
+            credential=self.storage_key,
+            max_single_get_size=self.chunk_size,
+            max_chunk_get_size=self.chunk_size,
+        )
+
     def generate_object_name(self) -> str:
         # This is a basic attempt at ensuring that an _existing_ file won't be
         # overwritten; however, it is still potentially susceptible to TOCTOU
@@ -23,9 +23,12 @@ def prepare_azure_reporting_data(rows: list):
     }
     """
 
+    # Rows are in date order, so only the rows at the end need their dates
+    # parsed to find this month's estimated spending.
+    start_of_month = pendulum.now(tz="UTC").start_of("month")
     estimated = []
     while rows:
-        if pendulum.parse(rows[-1][1]) >= pendulum.now(tz="UTC").start_of("month"):
+        if pendulum.parse(rows[-1][1]) >= start_of_month:
             estimated.append(rows.pop())
         else:
             break
@@ -1,8 +1,10 @@
-from typing import List
+from collections import defaultdict
+from typing import List, Optional
 from uuid import UUID
 
 from flask import current_app as app
 from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.exc import NoResultFound
 
 from atat.database import db
@@ -15,6 +17,39 @@ from atat.models import (
     EnvironmentRole,
     EnvironmentRoleStatus,
 )
+from atat.models.utils import claim_batch
+
+
+class EnvironmentRoleIndex(object):
+    """
+    An application's members, environments and environment roles, with the
+    roles keyed by (member, environment) so that the settings page can find
+    each member's access to each environment without querying per member or
+    comparing every member's roles with every environment's.
+    """
+
+    def __init__(self, members, environments, environment_roles):
+        self.members = members
+        self.environments = environments
+        self._roles = {}
+        self._environment_roles = defaultdict(list)
+        for role in environment_roles:
+            self._roles[(role.application_role_id, role.environment_id)] = role
+            self._environment_roles[role.environment_id].append(role)
+
+    @classmethod
+    def for_member(cls, member, environments):
+        return cls([member], environments, member.environment_roles)
+
+    def get(self, member, environment) -> Optional[EnvironmentRole]:
+        return self._roles.get((member.id, environment.id))
+
+    def roles_for_member(self, member) -> List[EnvironmentRole]:
+        roles = [self.get(member, environment) for environment in self.environments]
+        return [role for role in roles if role is not None]
+
+    def roles_for_environment(self, environment) -> List[EnvironmentRole]:
+        return self._environment_roles[environment.id]
 
 
 class EnvironmentRoles(object):
@@ -93,9 +128,53 @@ class EnvironmentRoles(object):
         )
 
     @classmethod
-    def get_pending_creation(cls) -> List[UUID]:
-        results = (
-            db.session.query(EnvironmentRole.id)
+    def index_for_application(cls, application) -> EnvironmentRoleIndex:
+        """
+        Loads an application's members, with their users, permission sets,
+        invitations and environment roles, and the roles in each of its
+        environments, in a fixed number of queries however many members and
+        environments it has.
+        """
+        members = (
+            db.session.query(ApplicationRole)
+            .filter(
+                ApplicationRole.application_id == application.id,
+                ApplicationRole.deleted == False,
+            )
+            .options(
+                selectinload(ApplicationRole.user),
+                selectinload(ApplicationRole.permission_sets),
+                selectinload(ApplicationRole.invitations),
+                selectinload(ApplicationRole.environment_roles),
+            )
+            .all()
+        )
+        environment_roles = (
+            db.session.query(EnvironmentRole)
+            .join(Environment)
+            .filter(
+                Environment.application_id == application.id,
+                Environment.deleted == False,
+                EnvironmentRole.deleted == False,
+            )
+            .options(
+                selectinload(EnvironmentRole.application_role).selectinload(
+                    ApplicationRole.user
+                ),
+                selectinload(EnvironmentRole.application_role).selectinload(
+                    ApplicationRole.invitations
+                ),
+            )
+            .all()
+        )
+        return EnvironmentRoleIndex(
+            members, application.environments, environment_roles
+        )
+
+    @classmethod
+    def _pending_creation_query(cls):
+        return (
+            db.session.query(EnvironmentRole)
             .join(Environment)
             .join(ApplicationRole)
             .filter(
@@ -107,16 +186,34 @@ class EnvironmentRoles(object):
                     ApplicationRole.status != ApplicationRoleStatus.DISABLED,
                     EnvironmentRole.status != EnvironmentRoleStatus.DISABLED,
                     EnvironmentRole.cloud_id.is_(None),
-                    or_(
-                        EnvironmentRole.claimed_until.is_(None),
-                        EnvironmentRole.claimed_until <= func.now(),
-                    ),
                 )
             )
+        )
+
+    @classmethod
+    def get_pending_creation(cls) -> List[UUID]:
+        results = (
+            cls._pending_creation_query()
+            .with_entities(EnvironmentRole.id)
+            .filter(
+                or_(
+                    EnvironmentRole.claimed_until.is_(None),
+                    EnvironmentRole.claimed_until <= func.now(),
+                ),
+            )
             .all()
         )
         return [id_ for id_, in results]
 
+    @classmethod
+    def claim_pending_creation(cls, limit) -> List[EnvironmentRole]:
+        """
+        Claim up to `limit` of the environment roles returned by
+        `get_pending_creation`, skipping any that another worker has already
+        claimed.
+        """
+        return claim_batch(cls._pending_creation_query(), limit)
+
     @classmethod
     def activate(cls, role, cloud_id):
         """Assign a cloud id to an environment role and marks it as active"""
@@ -6,7 +6,8 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from atat.database import db
 from atat.domain.environment_roles import EnvironmentRoles
-from atat.models import CLIN, Application, Environment, Portfolio, TaskOrder
+from atat.models import CLIN, Application, Environment, TaskOrder
+from atat.models.utils import claim_batch
 from atat.utils import commit_or_raise_already_exists_error
 
 from .exceptions import DisabledError, NotFoundError
@@ -39,6 +40,8 @@ class Environments(object):
             environment.name = new_data["name"]
         if "cloud_id" in new_data:
             environment.cloud_id = new_data["cloud_id"]
+        if "csp_operation" in new_data:
+            environment.csp_operation = new_data["csp_operation"]
 
         db.session.add(environment)
         commit_or_raise_already_exists_error(message="environment")
@@ -101,24 +104,41 @@ class Environments(object):
         return environment
 
     @classmethod
-    def get_environments_pending_creation(cls, now) -> List[UUID]:
-        """
-        Query for any environment with an active CLIN and provisioned
-        application that doesn't yet have a `cloud_id`.
-        """
-        results = (
-            db.session.query(Environment.id)
-            .distinct(Environment.id)
-            .join(Application)
-            .join(Portfolio)
+    def _pending_creation_query(cls, now):
+        # Checking for an active CLIN with EXISTS rather than a join keeps
+        # one row per environment, which `claim_batch` needs to apply its
+        # limit and row locks correctly.
+        active_clins = (
+            db.session.query(CLIN.id)
             .join(TaskOrder)
-            .join(CLIN)
             .filter(
+                TaskOrder.portfolio_id == Application.portfolio_id,
                 CLIN.start_date <= now,
                 CLIN.end_date > now,
+            )
+        )
+        return (
+            db.session.query(Environment)
+            .join(Application)
+            .filter(
+                active_clins.exists(),
                 Application.cloud_id != None,
                 Environment.deleted == False,
                 Environment.cloud_id.is_(None),
+                Environment.csp_operation.is_(None),
+            )
+        )
+
+    @classmethod
+    def get_environments_pending_creation(cls, now) -> List[UUID]:
+        """
+        Query for any environment with an active CLIN and provisioned
+        application that doesn't yet have a `cloud_id`.
+        """
+        results = (
+            cls._pending_creation_query(now)
+            .with_entities(Environment.id)
+            .filter(
                 or_(
                     Environment.claimed_until == None,
                     Environment.claimed_until <= func.now(),
@@ -127,3 +147,23 @@ class Environments(object):
             .all()
         )
         return [id_ for id_, in results]
+
+    @classmethod
+    def claim_pending_creation(cls, now, limit) -> List[Environment]:
+        """
+        Claim up to `limit` of the environments returned by
+        `get_environments_pending_creation`, skipping any that another worker has
+        already claimed.
+        """
+        return claim_batch(cls._pending_creation_query(now), limit)
+
+    @classmethod
+    def claim_pending_operations(cls, limit) -> List[Environment]:
+        """
+        Claim up to `limit` environments whose management group is still
+        being created by the CSP.
+        """
+        query = db.session.query(Environment).filter(
+            Environment.deleted == False, Environment.csp_operation.isnot(None)
+        )
+        return claim_batch(query, limit)
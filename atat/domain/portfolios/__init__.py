@@ -4,3 +4,4 @@ from .portfolios import (
     Portfolios,
     PortfolioStateMachines,
 )
+from .stage_runs import PortfolioStageRuns
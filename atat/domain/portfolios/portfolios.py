@@ -1,5 +1,5 @@
 from typing import List
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pendulum
 from sqlalchemy import or_
@@ -115,6 +115,46 @@ class Portfolios(object):
 
         return invitation
 
+    @classmethod
+    def invite_many(cls, portfolio, inviter, members_data):
+        """
+        Invites several members in one transaction. Each item of
+        `members_data` is shaped like the `member_data` of `invite`. IDs are
+        assigned here rather than by the database, so that the roles and
+        invitations are written with one multi-row insert each. Returns the
+        email address and token of each invitation.
+        """
+        requested = {
+            name
+            for member_data in members_data
+            for name in member_data.get("permission_sets", [])
+        }
+        permission_sets = {
+            permission_set.name: permission_set
+            for permission_set in PortfolioRoles._permission_sets_for_names(requested)
+        }
+        invitations = []
+        for member_data in members_data:
+            names = PortfolioRoles.DEFAULT_PORTFOLIO_PERMISSION_SETS.union(
+                member_data.get("permission_sets", [])
+            )
+            role = PortfolioRole(
+                id=uuid4(),
+                portfolio=portfolio,
+                permission_sets=[permission_sets[name] for name in names],
+            )
+            invitation = PortfolioInvitations.create(
+                inviter=inviter, role=role, member_data=member_data["user_data"]
+            )
+            invitation.id = uuid4()
+            invitations.append(invitation)
+
+        # Tokens are generated on flush, and the commit expires them
+        db.session.flush()
+        sent = [(invitation.email, invitation.token) for invitation in invitations]
+        db.session.commit()
+        return sent
+
     @classmethod
     def update_member(cls, member, permission_sets):
         return PortfolioRoles.update(member, permission_sets)
@@ -176,3 +216,16 @@ class Portfolios(object):
             .filter(TaskOrder.signed_at.isnot(None))
         )
         return [id_ for id_, in results]
+
+    @classmethod
+    def get_provisioned_portfolio_ids(cls) -> List[UUID]:
+        """Retrieve UUIDs for portfolios that are not soft-deleted and have
+        finished provisioning."""
+
+        results = (
+            db.session.query(Portfolio.id)
+            .join(PortfolioStateMachine)
+            .filter(Portfolio.deleted == False)
+            .filter(PortfolioStateMachine.state == PortfolioStates.COMPLETED)
+        )
+        return [id_ for id_, in results]
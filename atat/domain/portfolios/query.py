@@ -1,4 +1,4 @@
-from sqlalchemy import or_
+from sqlalchemy import and_, exists, select, union
 
 from atat.database import db
 from atat.domain.common import Query
@@ -20,43 +20,45 @@ class PortfoliosQuery(Query):
 
     @classmethod
     def get_for_user(cls, user):
-        return (
-            db.session.query(Portfolio)
-            .filter(
-                or_(
-                    Portfolio.id.in_(
-                        db.session.query(Portfolio.id)
-                        .join(Application)
-                        .filter(Portfolio.id == Application.portfolio_id)
-                        .filter(
-                            Application.id.in_(
-                                db.session.query(Application.id)
-                                .join(ApplicationRole)
-                                .filter(
-                                    ApplicationRole.application_id == Application.id
-                                )
-                                .filter(ApplicationRole.user_id == user.id)
-                                .filter(
-                                    ApplicationRole.status
-                                    == ApplicationRoleStatus.ACTIVE
-                                )
-                                .filter(ApplicationRole.deleted == False)
-                                .subquery()
-                            )
-                        )
-                    ),
-                    Portfolio.id.in_(
-                        db.session.query(Portfolio.id)
-                        .join(PortfolioRole)
-                        .filter(PortfolioRole.user == user)
-                        .filter(PortfolioRole.status == PortfolioRoleStatus.ACTIVE)
-                        .subquery()
-                    ),
+        return cls.for_user_query(user).all()
+
+    @classmethod
+    def for_user_query(cls, user):
+        """
+        Queries the portfolios a user has an active portfolio role in, or an
+        active role in one of their applications.
+
+        Each kind of access is an EXISTS lookup driven by the user's roles,
+        and the two are combined with UNION, so the planner can use the
+        (user_id, status) role indexes instead of scanning every role.
+        """
+        via_portfolio_role = select(Portfolio.id).where(
+            exists().where(
+                and_(
+                    PortfolioRole.portfolio_id == Portfolio.id,
+                    PortfolioRole.user_id == user.id,
+                    PortfolioRole.status == PortfolioRoleStatus.ACTIVE,
+                )
+            )
+        )
+        via_application_role = select(Portfolio.id).where(
+            exists().where(
+                and_(
+                    Application.portfolio_id == Portfolio.id,
+                    ApplicationRole.application_id == Application.id,
+                    ApplicationRole.user_id == user.id,
+                    ApplicationRole.status == ApplicationRoleStatus.ACTIVE,
+                    ApplicationRole.deleted == False,
                 )
             )
+        )
+        portfolio_ids = union(via_portfolio_role, via_application_role)
+
+        return (
+            db.session.query(Portfolio)
+            .filter(Portfolio.id.in_(portfolio_ids))
             .filter(Portfolio.deleted == False)
             .order_by(Portfolio.name.asc())
-            .all()
         )
 
     @classmethod
@@ -0,0 +1,111 @@
+from typing import Dict, List, NamedTuple
+
+from sqlalchemy import func
+
+from atat.database import db
+from atat.models import PortfolioStageRun, StageOutcome
+from atat.models.mixins.state_machines import AzureStages
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+STAGE_ORDER = {stage.name.lower(): index for index, stage in enumerate(AzureStages)}
+
+
+class StageTiming(NamedTuple):
+    stage: str
+    runs: int
+    finished: int
+    reset: int
+    failed: int
+    max_attempt: int
+    total_ms: int
+    percentiles_ms: Dict[float, float]
+
+
+class PortfolioStageRuns(object):
+    @classmethod
+    def timings(cls, since=None, quantiles=DEFAULT_QUANTILES) -> List[StageTiming]:
+        """Summarises recorded stage runs per stage, in provisioning order.
+        Percentiles are computed by Postgres so no rows are loaded.
+        """
+        outcome_count = lambda outcome: func.count().filter(
+            PortfolioStageRun.outcome == outcome
+        )
+        query = db.session.query(
+            PortfolioStageRun.stage,
+            func.count(),
+            outcome_count(StageOutcome.FINISHED),
+            outcome_count(StageOutcome.RESET),
+            outcome_count(StageOutcome.FAILED),
+            func.max(PortfolioStageRun.attempt),
+            func.sum(PortfolioStageRun.duration_ms),
+            *[
+                func.percentile_cont(quantile).within_group(
+                    PortfolioStageRun.duration_ms
+                )
+                for quantile in quantiles
+            ],
+        ).group_by(PortfolioStageRun.stage)
+        if since is not None:
+            query = query.filter(PortfolioStageRun.time_created >= since)
+
+        timings = [
+            StageTiming(
+                stage,
+                runs,
+                finished,
+                reset,
+                failed,
+                max_attempt,
+                total_ms,
+                dict(zip(quantiles, percentiles)),
+            )
+            for stage, runs, finished, reset, failed, max_attempt, total_ms, *percentiles in query
+        ]
+        return sorted(timings, key=lambda t: STAGE_ORDER.get(t.stage, len(STAGE_ORDER)))
+
+
+def prometheus_metrics(timings: List[StageTiming]) -> str:
+    """Renders stage timings in the Prometheus text exposition format, e.g.
+    for node_exporter's textfile collector.
+    """
+    lines = [
+        "# HELP atat_portfolio_stage_duration_seconds Time taken by portfolio provisioning stages.",
+        "# TYPE atat_portfolio_stage_duration_seconds summary",
+    ]
+    for timing in timings:
+        for quantile, value in timing.percentiles_ms.items():
+            lines.append(
+                f'atat_portfolio_stage_duration_seconds{{stage="{timing.stage}",quantile="{quantile}"}}'
+                f" {value / 1000}"
+            )
+        lines.append(
+            f'atat_portfolio_stage_duration_seconds_sum{{stage="{timing.stage}"}}'
+            f" {timing.total_ms / 1000}"
+        )
+        lines.append(
+            f'atat_portfolio_stage_duration_seconds_count{{stage="{timing.stage}"}}'
+            f" {timing.runs}"
+        )
+
+    lines += [
+        "# HELP atat_portfolio_stage_runs_total Portfolio provisioning stage runs by outcome.",
+        "# TYPE atat_portfolio_stage_runs_total counter",
+    ]
+    for timing in timings:
+        for outcome in StageOutcome:
+            lines.append(
+                f'atat_portfolio_stage_runs_total{{stage="{timing.stage}",outcome="{outcome.value}"}}'
+                f" {getattr(timing, outcome.name.lower())}"
+            )
+
+    lines += [
+        "# HELP atat_portfolio_stage_max_attempt Most attempts any portfolio has made at a stage.",
+        "# TYPE atat_portfolio_stage_max_attempt gauge",
+    ]
+    for timing in timings:
+        lines.append(
+            f'atat_portfolio_stage_max_attempt{{stage="{timing.stage}"}} {timing.max_attempt}'
+        )
+
+    return "\n".join(lines) + "\n"
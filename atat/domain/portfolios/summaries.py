@@ -0,0 +1,142 @@
+import json
+from typing import List, NamedTuple
+from uuid import UUID
+
+from flask import current_app as app
+from flask import has_app_context
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from atat.models import ApplicationRole, Portfolio, PortfolioRole, User
+
+PENDING_INVALIDATIONS = "portfolio_summaries"
+
+
+class PortfolioSummary(NamedTuple):
+    id: UUID
+    name: str
+
+
+class PortfolioSummaryCache(object):
+    """
+    Caches the ID and name of each portfolio a user can see, for the sidebar
+    that is rendered on every page.
+
+    Entries are stored per user and stamped with a generation number. A change
+    to a user's roles deletes that user's entry; adding, renaming or deleting a
+    portfolio bumps the generation, which makes every entry stale at once.
+    Both happen after the change is committed, so a concurrent request cannot
+    cache data from before the change. If Redis is unavailable, summaries are
+    loaded from the database.
+    """
+
+    def __init__(self, redis, ttl=300, key_prefix="portfolio_summaries"):
+        self.redis = redis
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+
+    def for_user(self, user, load) -> List[PortfolioSummary]:
+        """Returns the summaries for `user`, calling `load` to get them from
+        the database when there is no current entry.
+        """
+        if not self.ttl:
+            return self._summaries(load)
+
+        try:
+            generation, cached = self.redis.mget(
+                self._generation_key, self._user_key(user.id)
+            )
+        except RedisError:
+            app.logger.warning("Could not read cached portfolios", exc_info=1)
+            return self._summaries(load)
+
+        generation = int(generation or 0)
+        if cached is not None:
+            entry = json.loads(cached)
+            if entry["generation"] == generation:
+                return [
+                    PortfolioSummary(UUID(id_), name)
+                    for id_, name in entry["portfolios"]
+                ]
+
+        summaries = self._summaries(load)
+        entry = {
+            "generation": generation,
+            "portfolios": [[str(s.id), s.name] for s in summaries],
+        }
+        try:
+            self.redis.setex(self._user_key(user.id), self.ttl, json.dumps(entry))
+        except RedisError:
+            app.logger.warning("Could not cache portfolios", exc_info=1)
+        return summaries
+
+    def invalidate_users(self, user_ids):
+        if user_ids:
+            self.redis.delete(*[self._user_key(user_id) for user_id in user_ids])
+
+    def invalidate_all(self):
+        self.redis.incr(self._generation_key)
+
+    @staticmethod
+    def _summaries(load):
+        return [PortfolioSummary(p.id, p.name) for p in load()]
+
+    @property
+    def _generation_key(self):
+        return f"{self.key_prefix}:generation"
+
+    def _user_key(self, user_id):
+        return f"{self.key_prefix}:user:{user_id}"
+
+
+def _portfolio_listing_changed(portfolio, is_new_or_deleted):
+    if is_new_or_deleted:
+        return True
+    state = inspect(portfolio)
+    return any(state.attrs[attr].history.has_changes() for attr in ("name", "deleted"))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault(
+        PENDING_INVALIDATIONS, {"user_ids": set(), "all": False}
+    )
+    dirty = session.dirty
+    for obj in session.new | dirty | session.deleted:
+        if isinstance(obj, (PortfolioRole, ApplicationRole)):
+            pending["user_ids"].add(obj.user_id)
+        elif isinstance(obj, User):
+            pending["user_ids"].add(obj.id)
+        elif isinstance(obj, Portfolio) and _portfolio_listing_changed(
+            obj, obj not in dirty
+        ):
+            pending["all"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session):
+    pending = session.info.pop(PENDING_INVALIDATIONS, None)
+    if not pending or not has_app_context():
+        return
+
+    cache = getattr(app, "portfolio_summaries", None)
+    if cache is None:
+        return
+
+    try:
+        if pending["all"]:
+            cache.invalidate_all()
+        cache.invalidate_users(
+            [user_id for user_id in pending["user_ids"] if user_id is not None]
+        )
+    except RedisError:
+        app.logger.warning("Could not invalidate cached portfolios", exc_info=1)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_invalidations(session, previous_transaction):
+    # Rolling back a savepoint leaves the rest of the transaction to commit,
+    # so only a full rollback discards its invalidations.
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_INVALIDATIONS, None)
@@ -1,5 +1,10 @@
+import json
+from decimal import Decimal
+
 import pendulum
 from flask import current_app
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
 
 from atat.domain.csp.cloud.models import (
     CostManagementQueryCSPPayload,
@@ -8,6 +13,64 @@ from atat.domain.csp.cloud.models import (
 from atat.domain.csp.reports import prepare_azure_reporting_data
 
 
+class PortfolioSpendingCache(object):
+    """
+    Holds the invoiced and estimated spending last fetched from the Cost
+    Management API for each portfolio, with the time it was retrieved.
+
+    A refresh must be claimed before it is queued. Only one claim per
+    portfolio can be held at a time, so concurrent requests for a refresh
+    share a single Cost Management query. The claim expires after
+    `refresh_timeout` seconds in case the worker holding it dies.
+    """
+
+    def __init__(
+        self, redis, ttl=86400, refresh_timeout=300, key_prefix="portfolio_spending"
+    ):
+        self.redis = redis
+        self.ttl = ttl
+        self.refresh_timeout = refresh_timeout
+        self.key_prefix = key_prefix
+
+    def get(self, portfolio_id):
+        """Returns the cached spending for a portfolio, or None."""
+        cached = self.redis.get(self._key(portfolio_id))
+        if cached is None:
+            return None
+
+        entry = json.loads(cached)
+        return {
+            "invoiced": Decimal(entry["invoiced"]),
+            "estimated": Decimal(entry["estimated"]),
+            "retrieved": pendulum.parse(entry["retrieved"]),
+        }
+
+    def set(self, portfolio_id, spending, retrieved):
+        entry = {
+            "invoiced": str(spending["invoiced"]),
+            "estimated": str(spending["estimated"]),
+            "retrieved": retrieved.isoformat(),
+        }
+        self.redis.setex(self._key(portfolio_id), self.ttl, json.dumps(entry))
+
+    def claim_refresh(self, portfolio_id):
+        """Returns True if no other refresh for the portfolio is in flight."""
+        return bool(
+            self.redis.set(
+                self._refresh_key(portfolio_id), 1, nx=True, ex=self.refresh_timeout
+            )
+        )
+
+    def release_refresh(self, portfolio_id):
+        self.redis.delete(self._refresh_key(portfolio_id))
+
+    def _key(self, portfolio_id):
+        return f"{self.key_prefix}:{portfolio_id}"
+
+    def _refresh_key(self, portfolio_id):
+        return f"{self.key_prefix}:refreshing:{portfolio_id}"
+
+
 class Reports:
     @classmethod
     def expired_task_orders(cls, portfolio):
@@ -33,3 +96,77 @@ class Reports:
             rows = response.properties.rows
 
         return prepare_azure_reporting_data(rows)
+
+    @classmethod
+    def get_cached_portfolio_spending(cls, portfolio):
+        """
+        Returns the portfolio's spending with the time it was `retrieved`.
+
+        When PORTFOLIO_SPENDING_CACHE_TTL is set, spending is read from the
+        cache and a refresh is requested on a miss, in which case `retrieved`
+        is None and the totals are zero until the refresh finishes. Otherwise
+        the Cost Management API is queried in the request.
+        """
+        if not portfolio.is_provisioned:
+            return {
+                **prepare_azure_reporting_data([]),
+                "retrieved": pendulum.now(tz="UTC"),
+            }
+
+        if not current_app.config.get("PORTFOLIO_SPENDING_CACHE_TTL"):
+            return {
+                **cls.get_portfolio_spending(portfolio),
+                "retrieved": pendulum.now(tz="UTC"),
+            }
+
+        try:
+            spending = current_app.portfolio_spending.get(portfolio.id)
+        except RedisError:
+            current_app.logger.warning("Could not read cached spending", exc_info=1)
+            spending = None
+
+        if spending is None:
+            cls.request_spending_refresh(portfolio.id)
+            return {**prepare_azure_reporting_data([]), "retrieved": None}
+
+        return spending
+
+    @classmethod
+    def request_spending_refresh(cls, portfolio_id):
+        """
+        Queues a refresh of the portfolio's cached spending, unless one is
+        already in flight. Returns True if a refresh was queued.
+        """
+        from atat.jobs import refresh_portfolio_spending
+
+        cache = current_app.portfolio_spending
+        try:
+            if not cache.claim_refresh(portfolio_id):
+                return False
+        except RedisError:
+            current_app.logger.warning("Could not claim spending refresh", exc_info=1)
+            return False
+
+        try:
+            refresh_portfolio_spending.delay(portfolio_id=portfolio_id)
+        except OperationalError:
+            current_app.logger.exception("Could not queue spending refresh")
+            cache.release_refresh(portfolio_id)
+            return False
+
+        return True
+
+    @classmethod
+    def refresh_portfolio_spending(cls, portfolio):
+        """
+        Fetches the portfolio's spending from the Cost Management API into the
+        cache and releases the refresh claim.
+        """
+        cache = current_app.portfolio_spending
+        try:
+            retrieved = pendulum.now(tz="UTC")
+            spending = cls.get_portfolio_spending(portfolio)
+            cache.set(portfolio.id, spending, retrieved)
+            return spending
+        finally:
+            cache.release_refresh(portfolio.id)
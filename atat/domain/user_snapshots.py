@@ -0,0 +1,172 @@
+import json
+from datetime import datetime
+from uuid import UUID
+
+from flask import current_app as app
+from flask import has_app_context
+from redis.exceptions import RedisError
+from sqlalchemy import DateTime, event, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from atat.database import db
+from atat.domain.authz.permission_index import (
+    PermissionIndex,
+    permission_index,
+    set_permission_index,
+)
+from atat.models import ApplicationRole, PermissionSet, PortfolioRole, User
+
+PENDING_INVALIDATIONS = "user_snapshots"
+ALL_USERS = "all"
+
+
+def _encode(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _decoder(column):
+    if isinstance(column.type, postgresql.UUID):
+        return UUID
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat
+    return lambda value: value
+
+
+class UserSnapshotCache(object):
+    """
+    Caches the columns of a user's row and their compiled permission index,
+    so that read-only requests can get and authorize the current user
+    without querying the database.
+
+    Each user has a version number that is incremented after a change to
+    their row, their roles or their roles' permission sets is committed, and
+    a generation number shared by all users is incremented after a change to
+    a permission set. Snapshots are stamped with the numbers that were
+    current when they were read, so a snapshot that was loaded while a
+    change was being committed is never used. A snapshot is rebuilt into a
+    `User` that is attached to the session without a query, and its index
+    is used for the request's permission checks; the user's relationships
+    are lazy-loaded as usual. If Redis is unavailable, the user is loaded
+    from the database.
+    """
+
+    def __init__(self, redis, ttl=0, key_prefix="user_snapshots"):
+        self.redis = redis
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self.decoders = {
+            column.key: _decoder(column) for column in User.__table__.columns
+        }
+
+    def get(self, user_id, load):
+        """Returns the user with `user_id`, calling `load` with the ID to get
+        them from the database when there is no current snapshot.
+        """
+        if not self.ttl:
+            return load(user_id)
+
+        try:
+            version, generation, cached = self.redis.mget(
+                self._version_key(user_id),
+                self._version_key(ALL_USERS),
+                self._user_key(user_id),
+            )
+        except RedisError:
+            app.logger.warning("Could not read user snapshot", exc_info=1)
+            return load(user_id)
+
+        version = [int(generation or 0), int(version or 0)]
+        if cached is not None:
+            snapshot = json.loads(cached)
+            if (
+                snapshot["version"] == version
+                and set(snapshot["columns"]) == set(self.decoders)
+                and "permissions" in snapshot
+            ):
+                user = self._restore(snapshot["columns"])
+                set_permission_index(
+                    user, PermissionIndex.load(snapshot["permissions"])
+                )
+                return user
+
+        user = load(user_id)
+        snapshot = {
+            "version": version,
+            "columns": {key: _encode(getattr(user, key)) for key in self.decoders},
+            "permissions": permission_index(user).dump(),
+        }
+        try:
+            self.redis.setex(self._user_key(user_id), self.ttl, json.dumps(snapshot))
+        except RedisError:
+            app.logger.warning("Could not cache user snapshot", exc_info=1)
+        return user
+
+    def invalidate(self, user_ids):
+        """Discards the snapshots of `user_ids`, which may include `ALL_USERS`
+        to discard every snapshot.
+        """
+        if not user_ids:
+            return
+        with self.redis.pipeline() as pipeline:
+            for user_id in user_ids:
+                pipeline.incr(self._version_key(user_id))
+                # Versions outlive any snapshot stamped before the increment.
+                pipeline.expire(self._version_key(user_id), self.ttl * 2 or 1)
+            pipeline.execute()
+
+    def _restore(self, columns):
+        user = User(
+            **{
+                key: None if value is None else self.decoders[key](value)
+                for key, value in columns.items()
+            }
+        )
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def _version_key(self, user_id):
+        return f"{self.key_prefix}:{user_id}:version"
+
+    def _user_key(self, user_id):
+        return f"{self.key_prefix}:{user_id}"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = session.info.setdefault(PENDING_INVALIDATIONS, set())
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, User):
+            pending.add(obj.id)
+        elif isinstance(obj, (PortfolioRole, ApplicationRole)):
+            # A role may have been moved from one user to another
+            pending.update(inspect(obj).attrs.user_id.history.sum())
+        elif isinstance(obj, PermissionSet):
+            pending.add(ALL_USERS)
+    pending.discard(None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session):
+    user_ids = session.info.pop(PENDING_INVALIDATIONS, None)
+    if not user_ids or not has_app_context():
+        return
+
+    cache = getattr(app, "user_snapshots", None)
+    if cache is None or not cache.ttl:
+        return
+
+    try:
+        cache.invalidate(user_ids)
+    except RedisError:
+        app.logger.warning("Could not invalidate user snapshots", exc_info=1)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_invalidations(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_INVALIDATIONS, None)
@@ -1,10 +1,11 @@
 import pendulum
 from flask import current_app as app
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.exc import NoResultFound
 
 from atat.database import db
-from atat.models import User
+from atat.models import ApplicationRole, PortfolioRole, User
 
 from .exceptions import AlreadyExistsError, NotFoundError, UnauthorizedError
 from .permission_sets import PermissionSets
@@ -20,6 +21,32 @@ class Users(object):
 
         return user
 
+    @classmethod
+    def get_with_roles(cls, user_id):
+        """Gets a user along with their permission sets, their portfolio and
+        application roles and each role's permission sets, in a fixed number
+        of queries rather than one per role.
+        """
+        try:
+            user = (
+                db.session.query(User)
+                .filter_by(id=user_id)
+                .options(
+                    selectinload(User.permission_sets),
+                    selectinload(User.portfolio_roles).selectinload(
+                        PortfolioRole.permission_sets
+                    ),
+                    selectinload(User.application_roles).selectinload(
+                        ApplicationRole.permission_sets
+                    ),
+                )
+                .one()
+            )
+        except NoResultFound:
+            raise NotFoundError("user")
+
+        return user
+
     @classmethod
     def get_by_dod_id(cls, dod_id):
         try:
@@ -1,3 +1,4 @@
+import os
 import re
 from decimal import DivisionByZero as DivisionByZeroException
 from decimal import InvalidOperation
@@ -7,14 +8,10 @@ from flask import render_template
 from jinja2 import contextfilter
 from jinja2.exceptions import TemplateNotFound
 
+from atat.utils.icons import IconRegistry
 from atat.utils.localization import translate
 
 
-def icon_svg(name):
-    with open("static/icons/" + name + ".svg") as contents:
-        return contents.read()
-
-
 def dollars(value):
     try:
         number_value = float(value)
@@ -75,7 +72,12 @@ def render_audit_event(event):
 
 
 def register_filters(app):
-    app.jinja_env.filters["iconSvg"] = icon_svg
+    app.icons = IconRegistry(
+        os.path.join(app.static_folder, "icons"),
+        minify=app.config.get("ICONS_MINIFY", False),
+        watch=app.config["DEBUG"],
+    )
+    app.jinja_env.filters["iconSvg"] = app.icons.get
     app.jinja_env.filters["dollars"] = dollars
     app.jinja_env.filters["usPhone"] = us_phone
     app.jinja_env.filters["formattedDate"] = formatted_date
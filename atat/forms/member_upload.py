@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+
+from flask_wtf import FlaskForm
+from werkzeug.datastructures import MultiDict
+from wtforms.fields import FormField
+from wtforms.fields.core import UnboundField
+
+from atat.utils.localization import translate
+
+# The columns that describe the member. Any other column names a permission,
+# without its form field's `perms_` prefix, and grants it when truthy.
+MEMBER_COLUMNS = (
+    "first_name",
+    "last_name",
+    "email",
+    "dod_id",
+    "phone_number",
+    "phone_ext",
+)
+TRUE_VALUES = {"1", "true", "y", "yes", "x"}
+MAX_MEMBER_ROWS = 1000
+
+
+class MemberUploadError(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+
+    @property
+    def message(self):
+        return "; ".join(self.errors)
+
+
+def read_member_upload(request):
+    """
+    Returns the rows of a member list, either posted as JSON or uploaded as
+    the `members_file` CSV or JSON file. JSON may be a list of members or an
+    object with a `members` list.
+    """
+    if request.is_json:
+        rows = request.get_json(silent=True)
+    else:
+        upload = request.files.get("members_file")
+        rows = _read_file(upload) if upload else None
+
+    if isinstance(rows, dict):
+        rows = rows.get("members")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise MemberUploadError([translate("invites.bulk_upload.errors.unreadable")])
+    if not rows:
+        raise MemberUploadError([translate("invites.bulk_upload.errors.empty")])
+    if len(rows) > MAX_MEMBER_ROWS:
+        raise MemberUploadError(
+            [
+                translate(
+                    "invites.bulk_upload.errors.too_many", {"limit": MAX_MEMBER_ROWS}
+                )
+            ]
+        )
+
+    return rows
+
+
+def _read_file(upload):
+    content = upload.read()
+    try:
+        if upload.filename.lower().endswith(".json"):
+            return json.loads(content)
+        return list(csv.DictReader(io.StringIO(content.decode("utf-8-sig"))))
+    except (ValueError, csv.Error):
+        return None
+
+
+def validate_member_rows(rows, form_class):
+    """
+    Validates every row with `form_class`, the form used to invite a single
+    member, and returns the forms' data. If any row is invalid, or a DoD ID
+    appears in more than one row, raises a MemberUploadError listing the
+    problems with every row so they can all be fixed at once.
+    """
+    members = []
+    errors = []
+    dod_ids = set()
+
+    # The upload itself was CSRF checked; its rows have no tokens of their own
+    without_csrf = _without_csrf(form_class)
+    for number, row in enumerate(rows, start=1):
+        form = form_class(formdata=_member_formdata(row), **without_csrf)
+        # FlaskForm's validate, which unlike BaseForm's does not flash
+        if not FlaskForm.validate(form):
+            errors.extend(_row_errors(number, form))
+            continue
+
+        dod_id = form.user_data.dod_id.data
+        if dod_id in dod_ids:
+            errors.append(
+                translate(
+                    "invites.bulk_upload.errors.duplicate",
+                    {"row": number, "dod_id": dod_id},
+                )
+            )
+        dod_ids.add(dod_id)
+        members.append(form.data)
+
+    if errors:
+        raise MemberUploadError(errors)
+
+    return members
+
+
+def _without_csrf(form_class):
+    """
+    Returns the keyword arguments that build `form_class`, and the forms of its
+    FormFields, without CSRF protection.
+    """
+    meta = {"csrf": False}
+    kwargs = {"meta": meta}
+    for name in dir(form_class):
+        field = getattr(form_class, name)
+        if isinstance(field, UnboundField) and issubclass(field.field_class, FormField):
+            # FormField builds its form with these as keyword arguments
+            kwargs[name] = {"meta": meta}
+
+    return kwargs
+
+
+def _member_formdata(row):
+    formdata = MultiDict()
+    for column, value in row.items():
+        if column is None:
+            # Values beyond the CSV header's columns
+            continue
+
+        column = str(column).strip().lower()
+        value = "" if value is None else str(value).strip()
+        if column in MEMBER_COLUMNS:
+            formdata[f"user_data-{column}"] = value
+        elif value.lower() in TRUE_VALUES:
+            formdata[f"perms_{column}"] = "y"
+
+    return formdata
+
+
+def _row_errors(number, form):
+    fields = []
+    for field in form:
+        if isinstance(field, FormField):
+            fields.extend(field.form)
+        else:
+            fields.append(field)
+
+    return [
+        translate(
+            "invites.bulk_upload.errors.row",
+            {"row": number, "field": field.label.text, "error": error},
+        )
+        for field in fields
+        for error in field.errors
+    ]
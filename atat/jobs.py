@@ -3,18 +3,25 @@ from smtplib import SMTPException
 
 import pendulum
 from azure.core.exceptions import AzureError
-from celery import Task
+from celery import Task, current_task, states
 from flask import current_app as app
 
 from atat.database import db
 from atat.domain.application_roles import ApplicationRoles
 from atat.domain.applications import Applications
 from atat.domain.csp.cloud import CloudProviderInterface
-from atat.domain.csp.cloud.exceptions import GeneralCSPException
+from atat.domain.csp.cloud.async_client import AsyncCSPClient
+from atat.domain.csp.cloud.exceptions import (
+    GeneralCSPException,
+    ResourceProvisioningError,
+    ThrottlingException,
+)
 from atat.domain.csp.cloud.models import (
     ApplicationCSPPayload,
     BillingInstructionCSPPayload,
     EnvironmentCSPPayload,
+    ManagementGroupOperationCSPPayload,
+    ManagementGroupOperationCSPResult,
     SubscriptionCreationCSPPayload,
     UserCSPPayload,
     UserRoleCSPPayload,
@@ -23,12 +30,19 @@ from atat.domain.csp.cloud.utils import generate_user_principal_name
 from atat.domain.environment_roles import EnvironmentRoles
 from atat.domain.environments import Environments
 from atat.domain.portfolios import Portfolios
+from atat.domain.reports import Reports
 from atat.domain.task_orders import TaskOrders
-from atat.models import CSPRole, JobFailure
+from atat.models import AuditEvent, CSPRole, Environment, JobFailure
 from atat.models.mixins.state_machines import PortfolioStates
-from atat.models.utils import claim_for_update, claim_many_for_update
+from atat.models.utils import (
+    claim_for_update,
+    claim_many_for_update,
+    release_claims,
+)
 from atat.queue import celery
+from atat.utils import camel_to_snake
 from atat.utils.localization import translate
+from atat.utils.mailer import MailBatchError
 
 
 class RecordFailure(celery.Task):
@@ -54,12 +68,97 @@ class RecordFailure(celery.Task):
             db.session.add(failure)
             db.session.commit()
 
+    def retry(self, *args, exc=None, countdown=None, eta=None, **kwargs):
+        # Wait as long as the CSP asked before retrying a throttled call,
+        # rather than adding to the load that got it throttled.
+        if isinstance(exc, ThrottlingException) and countdown is None and eta is None:
+            countdown = exc.retry_after
+        return super().retry(*args, exc=exc, countdown=countdown, eta=eta, **kwargs)
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        if status == states.RETRY or not app.config.get("DISPATCH_BATCHED"):
+            return
+
+        for value in kwargs.values():
+            app.dispatcher.release(self.name, value)
+
 
 @celery.task(ignore_result=True)
 def send_mail(recipients, subject, body, attachments=[]):
     app.mailer.send(recipients, subject, body, attachments)
 
 
+@celery.task(ignore_result=True)
+def send_mails(messages):
+    """
+    Sends several emails from one job. Each message is a dict with the
+    `recipients`, `subject` and `body` that `send_mail` takes. A message that
+    cannot be sent is logged and skipped, so the rest are still sent.
+    """
+    while messages:
+        try:
+            app.mailer.send_many(messages)
+        except MailBatchError as err:
+            app.logger.error(
+                "Could not send email to %s: %s",
+                messages[err.sent]["recipients"],
+                err.error,
+            )
+            messages = messages[err.sent + 1 :]
+        else:
+            break
+
+
+@celery.task(ignore_result=True)
+def send_queued_mail():
+    """
+    Sends the emails waiting in the mail outbox, MAIL_BATCH_SIZE at a time
+    over one connection each. If a batch cannot be sent, its unsent emails
+    are left in the outbox for the next run.
+    """
+    sent = 0
+    while True:
+        messages = app.mail_outbox.take()
+        if not messages:
+            break
+
+        try:
+            app.mailer.send_many(messages)
+        except MailBatchError as err:
+            sent += err.sent
+            dropped = app.mail_outbox.put_back(
+                messages[err.sent :], rejected=err.rejected
+            )
+            app.logger.warning(
+                "Could not send queued mail, %s messages left in the outbox: %s",
+                len(app.mail_outbox),
+                err.error,
+            )
+            if dropped is not None:
+                app.logger.error(
+                    "Dropped queued mail to %s after %s attempts",
+                    dropped["recipients"],
+                    dropped["attempts"],
+                )
+            break
+
+        sent += len(messages)
+
+    if sent:
+        app.logger.info("Sent %s queued emails", sent)
+
+
+def queue_mail(recipients, subject, body):
+    """
+    Send an email from a job: through the mail outbox when MAIL_BATCHED is
+    enabled, otherwise straight away.
+    """
+    if app.config.get("MAIL_BATCHED"):
+        app.mail_outbox.put(recipients, subject, body)
+    else:
+        send_mail(recipients=recipients, subject=subject, body=body)
+
+
 @celery.task(ignore_result=True)
 def send_notification_mail(recipients, subject, body):
     app.logger.info(
@@ -71,6 +170,12 @@ def send_notification_mail(recipients, subject, body):
     app.mailer.send(recipients, subject, body)
 
 
+@celery.task(ignore_result=True)
+def write_audit_events(events):
+    AuditEvent.save_many(db.session.connection(), events)
+    db.session.commit()
+
+
 def do_create_application(csp: CloudProviderInterface, application_id=None):
     application = Applications.get(application_id)
 
@@ -97,6 +202,16 @@ def do_create_application(csp: CloudProviderInterface, application_id=None):
         )
 
         app_result = csp.create_application(payload)
+        if isinstance(app_result, ManagementGroupOperationCSPResult):
+            application.csp_operation = {**app_result.dict(), "parent_id": parent_id}
+            db.session.add(application)
+            db.session.commit()
+            app.logger.info(
+                "Management group for application %s is still being created.",
+                application.id,
+            )
+            return
+
         application.cloud_id = (
             f"/providers/Microsoft.Management/managementGroups/{app_result.name}"
         )
@@ -111,48 +226,68 @@ def do_create_user(csp: CloudProviderInterface, application_role_ids=None):
     app_roles = ApplicationRoles.get_many(application_role_ids)
 
     with claim_many_for_update(app_roles) as app_roles:
+        _create_user(csp, app_roles)
 
-        for ar in app_roles:
-            if ar.cloud_id:
-                app.logger.warning(
-                    "Application role cloud ID %s already present.", ar.cloud_id
-                )
-                return
 
-        csp_details = app_roles[0].application.portfolio.csp_data
-        user = app_roles[0].user
-        cloud_id = ApplicationRoles.get_cloud_id_for_user(
-            user.dod_id, app_roles[0].portfolio_id
-        )
+def _create_user(csp: CloudProviderInterface, app_roles):
+    prepared = _prepare_user(app_roles)
+    if prepared is None:
+        return
 
-        payload = UserCSPPayload(
-            tenant_id=csp_details.get("tenant_id"),
-            tenant_host_name=csp_details.get("domain_name"),
-            display_name=user.full_name,
-            email=user.email,
-        )
+    payload, cloud_id = prepared
+    if cloud_id is None:
+        result = csp.create_user(payload)
+        cloud_id = result.id
 
-        if cloud_id is None:
-            result = csp.create_user(payload)
-            cloud_id = result.id
+    _finish_user(app_roles, payload, cloud_id)
 
-        for app_role in app_roles:
-            app_role.cloud_id = cloud_id
-            db.session.add(app_role)
 
-        db.session.commit()
-        username = payload.user_principal_name
-        send_mail(
-            recipients=[user.email],
-            subject=translate("email.app_role_created.subject"),
-            body=translate(
-                "email.app_role_created.body",
-                {"url": app.config.get("AZURE_LOGIN_URL"), "username": username},
-            ),
-        )
-        app.logger.info(
-            "Application role created notification email sent. User id: %s", user.id
-        )
+def _prepare_user(app_roles):
+    """Returns the payload for creating the user behind a group of application
+    roles and the user's existing cloud ID in the portfolio, if any. Returns
+    None if the roles have already been provisioned.
+    """
+    for ar in app_roles:
+        if ar.cloud_id:
+            app.logger.warning(
+                "Application role cloud ID %s already present.", ar.cloud_id
+            )
+            return None
+
+    csp_details = app_roles[0].application.portfolio.csp_data
+    user = app_roles[0].user
+    cloud_id = ApplicationRoles.get_cloud_id_for_user(
+        user.dod_id, app_roles[0].portfolio_id
+    )
+
+    payload = UserCSPPayload(
+        tenant_id=csp_details.get("tenant_id"),
+        tenant_host_name=csp_details.get("domain_name"),
+        display_name=user.full_name,
+        email=user.email,
+    )
+    return payload, cloud_id
+
+
+def _finish_user(app_roles, payload, cloud_id):
+    user = app_roles[0].user
+    for app_role in app_roles:
+        app_role.cloud_id = cloud_id
+        db.session.add(app_role)
+
+    db.session.commit()
+    username = payload.user_principal_name
+    queue_mail(
+        recipients=[user.email],
+        subject=translate("email.app_role_created.subject"),
+        body=translate(
+            "email.app_role_created.body",
+            {"url": app.config.get("AZURE_LOGIN_URL"), "username": username},
+        ),
+    )
+    app.logger.info(
+        "Application role created notification email sent. User id: %s", user.id
+    )
 
 
 def log_do_create_environment(portfolio_id, parent_id, tenant_id):
@@ -169,31 +304,48 @@ def do_create_environment(csp: CloudProviderInterface, environment_id=None):
     environment = Environments.get(environment_id)
 
     with claim_for_update(environment) as environment:
+        _create_environment(csp, environment)
 
-        if environment.cloud_id is not None:
-            app.logger.warning(
-                "Environment cloud ID %s already present.", environment.cloud_id
-            )
-            return
 
-        parent_id = environment.application.cloud_id
-        tenant_id = environment.portfolio.csp_data["tenant_id"]
+def _create_environment(csp: CloudProviderInterface, environment):
+    if environment.cloud_id is not None:
+        app.logger.warning(
+            "Environment cloud ID %s already present.", environment.cloud_id
+        )
+        return
 
-        log_do_create_environment(environment.portfolio.id, parent_id, tenant_id)
+    parent_id = environment.application.cloud_id
+    tenant_id = environment.portfolio.csp_data["tenant_id"]
 
-        payload = EnvironmentCSPPayload(
-            tenant_id=tenant_id, display_name=environment.name, parent_id=parent_id
-        )
-        env_result = csp.create_environment(payload)
-        Environments.update(environment, new_data={"cloud_id": env_result.id})
+    log_do_create_environment(environment.portfolio.id, parent_id, tenant_id)
 
-        app.logger.info("Created environment %s", env_result.name)
-        async_result = create_subscription.delay(environment_id=environment.id)
+    payload = EnvironmentCSPPayload(
+        tenant_id=tenant_id, display_name=environment.name, parent_id=parent_id
+    )
+    env_result = csp.create_environment(payload)
+    if isinstance(env_result, ManagementGroupOperationCSPResult):
+        Environments.update(
+            environment,
+            new_data={"csp_operation": {**env_result.dict(), "parent_id": parent_id}},
+        )
         app.logger.info(
-            "Attempting to create subscription for environment %s [Task ID: %s])",
-            env_result.name,
-            async_result.task_id,
+            "Management group for environment %s is still being created.",
+            environment.id,
         )
+        return
+
+    Environments.update(environment, new_data={"cloud_id": env_result.id})
+    _create_subscription_for(environment, env_result.name)
+
+
+def _create_subscription_for(environment, name):
+    app.logger.info("Created environment %s", name)
+    async_result = create_subscription.delay(environment_id=environment.id)
+    app.logger.info(
+        "Attempting to create subscription for environment %s [Task ID: %s])",
+        name,
+        async_result.task_id,
+    )
 
 
 @celery.task(bind=True, base=RecordFailure, autoretry_for=(GeneralCSPException,))
@@ -246,55 +398,276 @@ def do_create_environment_role(csp: CloudProviderInterface, environment_role_id=
     env_role = EnvironmentRoles.get_by_id(environment_role_id)
 
     with claim_for_update(env_role) as env_role:
+        _create_environment_role(csp, env_role)
 
-        if env_role.cloud_id is not None:
-            app.logger.warning(
-                "Attempting to create an environment role %s that already exists.",
-                env_role.cloud_id,
-            )
-            return
 
-        env = env_role.environment
-        csp_details = env.portfolio.csp_data
-        app_role = env_role.application_role
-
-        role = None
-        if env_role.role == CSPRole.ADMIN:
-            role = UserRoleCSPPayload.Roles.owner
-        elif env_role.role == CSPRole.BILLING_READ:
-            role = UserRoleCSPPayload.Roles.billing
-        elif env_role.role == CSPRole.CONTRIBUTOR:
-            role = UserRoleCSPPayload.Roles.contributor
-
-        payload = UserRoleCSPPayload(
-            tenant_id=csp_details.get("tenant_id"),
-            management_group_id=env.cloud_id,
-            user_object_id=app_role.cloud_id,
-            role=role,
+def _create_environment_role(csp: CloudProviderInterface, env_role):
+    payload = _prepare_environment_role(env_role)
+    if payload is None:
+        return
+
+    result = csp.create_user_role(payload)
+    _finish_environment_role(env_role, result)
+
+
+def _prepare_environment_role(env_role):
+    if env_role.cloud_id is not None:
+        app.logger.warning(
+            "Attempting to create an environment role %s that already exists.",
+            env_role.cloud_id,
         )
-        result = csp.create_user_role(payload)
-        EnvironmentRoles.activate(env_role, result.id)
+        return None
+
+    env = env_role.environment
+    csp_details = env.portfolio.csp_data
+    app_role = env_role.application_role
+
+    role = None
+    if env_role.role == CSPRole.ADMIN:
+        role = UserRoleCSPPayload.Roles.owner
+    elif env_role.role == CSPRole.BILLING_READ:
+        role = UserRoleCSPPayload.Roles.billing
+    elif env_role.role == CSPRole.CONTRIBUTOR:
+        role = UserRoleCSPPayload.Roles.contributor
+
+    payload = UserRoleCSPPayload(
+        tenant_id=csp_details.get("tenant_id"),
+        management_group_id=env.cloud_id,
+        user_object_id=app_role.cloud_id,
+        role=role,
+    )
+    return payload
+
+
+def _finish_environment_role(env_role, result):
+    EnvironmentRoles.activate(env_role, result.id)
 
-        app.logger.info("Created environment role %s", env_role.cloud_id)
+    app.logger.info("Created environment role %s", env_role.cloud_id)
 
-        user = env_role.application_role.user
-        domain_name = csp_details.get("domain_name")
-        username = generate_user_principal_name(
-            user.full_name,
-            domain_name,
+    user = env_role.application_role.user
+    domain_name = env_role.environment.portfolio.csp_data.get("domain_name")
+    username = generate_user_principal_name(
+        user.full_name,
+        domain_name,
+    )
+    queue_mail(
+        recipients=[user.email],
+        subject=translate("email.azure_account_update.subject"),
+        body=translate(
+            "email.azure_account_update.body",
+            {"url": app.config.get("AZURE_LOGIN_URL"), "username": username},
+        ),
+    )
+    app.logger.info(
+        "Notification email sent for environment role creation. User id: %s",
+        user.id,
+    )
+
+
+def _record_failures(resources):
+    """
+    Records a JobFailure for each resource that a batch task could not
+    provision, as `RecordFailure` does for the single-resource tasks.
+    """
+    task_id = current_task.request.id if current_task else None
+    if task_id is None:
+        return
+
+    for resource in resources:
+        failure = JobFailure(
+            entity=camel_to_snake(type(resource).__name__),
+            entity_id=str(resource.id),
+            task_id=task_id,
         )
-        send_mail(
-            recipients=[user.email],
-            subject=translate("email.azure_account_update.subject"),
-            body=translate(
-                "email.azure_account_update.body",
-                {"url": app.config.get("AZURE_LOGIN_URL"), "username": username},
-            ),
+        db.session.add(failure)
+    db.session.commit()
+
+
+def _process_claimed(create, csp: CloudProviderInterface, resources):
+    with release_claims(resources):
+        for resource in resources:
+            try:
+                create(csp, resource)
+            except GeneralCSPException:
+                app.logger.exception(
+                    "Unable to provision %s %s.",
+                    resource.__class__.__name__,
+                    resource.id,
+                )
+                _record_failures([resource])
+
+
+def _csp_client(csp: CloudProviderInterface):
+    return AsyncCSPClient(csp, max_concurrency=app.config.get("CSP_ASYNC_CONCURRENCY"))
+
+
+def _finish_concurrently(items, results, finish, message, resources_of):
+    """
+    Calls `finish` for every item whose CSP call succeeded. CSP errors are
+    logged and recorded as JobFailures so that the rest of the batch is still
+    recorded; the first unexpected error is raised once every success has
+    been saved.
+    """
+    error = None
+    for item, result in zip(items, results):
+        if isinstance(result, GeneralCSPException):
+            resources = resources_of(item)
+            app.logger.error(
+                message, [resource.id for resource in resources], exc_info=result
+            )
+            _record_failures(resources)
+        elif isinstance(result, Exception):
+            error = error or result
+        else:
+            finish(item, result)
+
+    if error is not None:
+        raise error
+
+
+def _create_users_concurrently(csp: CloudProviderInterface, groups):
+    to_create = []
+    for app_roles in groups:
+        prepared = _prepare_user(app_roles)
+        if prepared is None:
+            continue
+        payload, cloud_id = prepared
+        if cloud_id is None:
+            to_create.append((app_roles, payload))
+        else:
+            _finish_user(app_roles, payload, cloud_id)
+
+    payloads = [payload for _, payload in to_create]
+    if app.config.get("AZURE_GRAPH_BATCHING"):
+        results = csp.create_users(payloads)
+    else:
+        client = _csp_client(csp)
+        results = client.run([client.create_user(payload) for payload in payloads])
+    _finish_concurrently(
+        to_create,
+        results,
+        lambda item, result: _finish_user(item[0], item[1], result.id),
+        "Unable to create user for application roles %s.",
+        lambda item: item[0],
+    )
+
+
+def _create_environment_roles_concurrently(csp: CloudProviderInterface, env_roles):
+    to_create = []
+    for env_role in env_roles:
+        payload = _prepare_environment_role(env_role)
+        if payload is not None:
+            to_create.append((env_role, payload))
+
+    client = _csp_client(csp)
+    results = client.run([client.create_user_role(payload) for _, payload in to_create])
+    _finish_concurrently(
+        to_create,
+        results,
+        lambda item, result: _finish_environment_role(item[0], result),
+        "Unable to provision EnvironmentRoles %s.",
+        lambda item: [item[0]],
+    )
+
+
+def do_create_users_batch(csp: CloudProviderInterface, application_role_id_groups):
+    """
+    Creates the users for a whole list of application role groups, as returned
+    by `ApplicationRoles.get_pending_creation`, with their CSP calls made
+    concurrently in one event loop. Roles another worker has claimed are
+    skipped.
+    """
+    ids = [id_ for group in application_role_id_groups for id_ in group]
+    if not ids:
+        return []
+
+    groups = ApplicationRoles.claim_pending_creation(len(ids), ids=ids)
+    with release_claims([ar for group in groups for ar in group]):
+        _create_users_concurrently(csp, groups)
+    return [[ar.id for ar in group] for group in groups]
+
+
+def do_process_pending_environments(csp: CloudProviderInterface, limit=None):
+    environments = Environments.claim_pending_creation(pendulum.now(tz="UTC"), limit)
+    _process_claimed(_create_environment, csp, environments)
+    return [environment.id for environment in environments]
+
+
+def do_process_pending_users(csp: CloudProviderInterface, limit=None):
+    groups = ApplicationRoles.claim_pending_creation(limit)
+    if app.config.get("CSP_ASYNC_PROVISIONING"):
+        with release_claims([ar for group in groups for ar in group]):
+            _create_users_concurrently(csp, groups)
+        return [[ar.id for ar in group] for group in groups]
+
+    with release_claims([ar for group in groups for ar in group]):
+        for app_roles in groups:
+            try:
+                _create_user(csp, app_roles)
+            except GeneralCSPException:
+                app.logger.exception(
+                    "Unable to create user for application roles %s.",
+                    [ar.id for ar in app_roles],
+                )
+                _record_failures(app_roles)
+    return [[ar.id for ar in group] for group in groups]
+
+
+def do_process_pending_environment_roles(csp: CloudProviderInterface, limit=None):
+    env_roles = EnvironmentRoles.claim_pending_creation(limit)
+    if app.config.get("CSP_ASYNC_PROVISIONING"):
+        with release_claims(env_roles):
+            _create_environment_roles_concurrently(csp, env_roles)
+    else:
+        _process_claimed(_create_environment_role, csp, env_roles)
+    return [env_role.id for env_role in env_roles]
+
+
+def _poll_management_group_operation(csp: CloudProviderInterface, resource):
+    tenant_id = resource.portfolio.csp_data["tenant_id"]
+    payload = ManagementGroupOperationCSPPayload(
+        tenant_id=tenant_id, **resource.csp_operation
+    )
+    try:
+        result = csp.check_management_group_operation(payload)
+    except ResourceProvisioningError:
+        app.logger.exception(
+            "Management group creation failed for %s %s; it will be retried.",
+            resource.__class__.__name__,
+            resource.id,
         )
-        app.logger.info(
-            "Notification email sent for environment role creation. User id: %s",
-            user.id,
+        resource.csp_operation = None
+        db.session.add(resource)
+        db.session.commit()
+        return
+
+    if result is None:
+        return
+
+    resource.csp_operation = None
+    if isinstance(resource, Environment):
+        Environments.update(resource, new_data={"cloud_id": result.id})
+        _create_subscription_for(resource, result.name)
+    else:
+        resource.cloud_id = (
+            f"/providers/Microsoft.Management/managementGroups/{result.name}"
         )
+        db.session.add(resource)
+        db.session.commit()
+
+
+def do_poll_management_group_operations(csp: CloudProviderInterface, limit=None):
+    """
+    Check on the management groups that the CSP is still creating for
+    applications and environments, and finish provisioning the ones that are
+    done. Operations that are still running are left for the next poll.
+    """
+    polled = []
+    for domain in (Applications, Environments):
+        resources = domain.claim_pending_operations(limit)
+        _process_claimed(_poll_management_group_operation, csp, resources)
+        polled.extend(resource.id for resource in resources)
+    return polled
 
 
 def render_email(template_path, context):
@@ -306,7 +679,7 @@ def send_ppoc_email(portfolio_dict):
     user_id = portfolio_dict.get("user_id")
     domain_name = portfolio_dict.get("domain_name")
     username = generate_user_principal_name(user_id, domain_name)
-    send_mail(
+    queue_mail(
         recipients=[ppoc_email],
         subject=translate("email.portfolio_ready.subject"),
         body=translate(
@@ -367,6 +740,77 @@ def create_environment(self: Task, environment_id=None):
     return environment_id
 
 
+@celery.task(bind=True)
+def process_pending_environments(self: Task):
+    ids = do_process_pending_environments(
+        app.csp.cloud, limit=app.config.get("CLAIM_BATCH_SIZE")
+    )
+    return [str(id_) for id_ in ids]
+
+
+@celery.task(bind=True)
+def process_pending_users(self: Task):
+    groups = do_process_pending_users(
+        app.csp.cloud, limit=app.config.get("CLAIM_BATCH_SIZE")
+    )
+    return [[str(id_) for id_ in group] for group in groups]
+
+
+@celery.task(bind=True)
+def create_users_batch(self: Task, application_role_id_groups=None):
+    groups = do_create_users_batch(
+        app.csp.cloud, application_role_id_groups=application_role_id_groups or []
+    )
+    return [[str(id_) for id_ in group] for group in groups]
+
+
+@celery.task(bind=True)
+def process_pending_environment_roles(self: Task):
+    ids = do_process_pending_environment_roles(
+        app.csp.cloud, limit=app.config.get("CLAIM_BATCH_SIZE")
+    )
+    return [str(id_) for id_ in ids]
+
+
+@celery.task(bind=True)
+def poll_management_group_operations(self: Task):
+    ids = do_poll_management_group_operations(
+        app.csp.cloud, limit=app.config.get("MGMT_GROUP_POLL_BATCH_SIZE")
+    )
+    return [str(id_) for id_ in ids]
+
+
+def dispatch_claimers(task):
+    """
+    Enqueue CLAIM_CONCURRENCY copies of a `process_pending_*` task. Each one
+    claims its own disjoint batch of pending work.
+    """
+    for _ in range(app.config.get("CLAIM_CONCURRENCY")):
+        task.delay()
+
+
+def dispatch(task, kwarg_name, values):
+    """
+    Enqueue `task` once per value. When DISPATCH_BATCHED is enabled, tasks
+    are sent in chunked groups and values that already have a task in flight
+    are skipped.
+    """
+    if not app.config.get("DISPATCH_BATCHED"):
+        for value in values:
+            task.delay(**{kwarg_name: value})
+        return
+
+    metrics = app.dispatcher.dispatch(task, kwarg_name, values)
+    app.logger.info(
+        "Dispatched %s: %s found, %s enqueued, %s deduplicated",
+        task.name,
+        metrics.found,
+        metrics.enqueued,
+        metrics.deduplicated,
+        extra={"tags": ["dispatch"], "metrics": metrics._asdict()},
+    )
+
+
 @celery.task(bind=True)
 def dispatch_provision_portfolio(self: Task):
     """
@@ -375,45 +819,75 @@ def dispatch_provision_portfolio(self: Task):
     portfolio_ids = Portfolios.get_portfolios_pending_provisioning(
         pendulum.now(tz="UTC")
     )
-    for portfolio_id in portfolio_ids:
-        provision_portfolio.delay(portfolio_id=portfolio_id)
+    dispatch(provision_portfolio, "portfolio_id", portfolio_ids)
     return [str(portfolio_id) for portfolio_id in portfolio_ids]
 
 
 @celery.task(bind=True)
 def dispatch_create_application(self: Task):
     application_ids = Applications.get_applications_pending_creation()
-    for application_id in application_ids:
-        create_application.delay(application_id=application_id)
+    dispatch(create_application, "application_id", application_ids)
     return [str(application_id) for application_id in application_ids]
 
 
 @celery.task(bind=True)
 def dispatch_create_user(self: Task):
+    if app.config.get("CLAIM_PENDING_WORK"):
+        dispatch_claimers(process_pending_users)
+        return []
+
     application_role_id_groups = ApplicationRoles.get_pending_creation()
-    for application_role_ids in application_role_id_groups:
-        create_user.delay(application_role_ids=application_role_ids)
+    if app.config.get("CSP_ASYNC_PROVISIONING"):
+        if application_role_id_groups:
+            create_users_batch.delay(
+                application_role_id_groups=application_role_id_groups
+            )
+        return [
+            [str(role_id) for role_id in group] for group in application_role_id_groups
+        ]
+
+    dispatch(create_user, "application_role_ids", application_role_id_groups)
     return [[str(role_id) for role_id in group] for group in application_role_id_groups]
 
 
 @celery.task(bind=True)
 def dispatch_create_environment_role(self: Task):
+    if app.config.get("CLAIM_PENDING_WORK"):
+        dispatch_claimers(process_pending_environment_roles)
+        return []
+
     environment_role_ids = EnvironmentRoles.get_pending_creation()
-    for environment_role_id in environment_role_ids:
-        create_environment_role.delay(environment_role_id=environment_role_id)
+    dispatch(create_environment_role, "environment_role_id", environment_role_ids)
     return [str(role_id) for role_id in environment_role_ids]
 
 
 @celery.task(bind=True)
 def dispatch_create_environment(self: Task):
+    if app.config.get("CLAIM_PENDING_WORK"):
+        dispatch_claimers(process_pending_environments)
+        return []
+
     environment_ids = Environments.get_environments_pending_creation(
         pendulum.now(tz="UTC")
     )
-    for environment_id in environment_ids:
-        create_environment.delay(environment_id=environment_id)
+    dispatch(create_environment, "environment_id", environment_ids)
     return [str(environment_id) for environment_id in environment_ids]
 
 
+@celery.task(bind=True)
+def refresh_portfolio_spending(self: Task, portfolio_id=None):
+    portfolio = Portfolios.get_for_update(portfolio_id)
+    Reports.refresh_portfolio_spending(portfolio)
+
+
+@celery.task(bind=True)
+def dispatch_refresh_portfolio_spending(self: Task):
+    portfolio_ids = Portfolios.get_provisioned_portfolio_ids()
+    for portfolio_id in portfolio_ids:
+        Reports.request_spending_refresh(portfolio_id)
+    return [str(portfolio_id) for portfolio_id in portfolio_ids]
+
+
 @celery.task(bind=True)
 def send_task_order_files(self: Task):
     task_orders = TaskOrders.get_for_send_task_order_files()
@@ -18,6 +18,7 @@ from .portfolio import Portfolio
 from .portfolio_invitation import PortfolioInvitation
 from .portfolio_role import PortfolioRole
 from .portfolio_role import Status as PortfolioRoleStatus
+from .portfolio_stage_run import PortfolioStageRun, StageOutcome
 from .portfolio_state_machine import PortfolioStateMachine, PortfolioStates
 from .task_order import TaskOrder
 from .user import User
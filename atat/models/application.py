@@ -14,6 +14,7 @@ class Application(
     mixins.AuditableMixin,
     mixins.DeletableMixin,
     mixins.ClaimableMixin,
+    mixins.CSPOperationMixin,
 ):
     __tablename__ = "applications"
 
@@ -147,6 +147,14 @@ Index(
     unique=True,
 )
 
+Index(
+    "application_role_user_status",
+    ApplicationRole.user_id,
+    ApplicationRole.status,
+    ApplicationRole.application_id,
+    postgresql_where=ApplicationRole.deleted == False,
+)
+
 
 listen(
     ApplicationRole.permission_sets,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, String, inspect
+from sqlalchemy import Column, ForeignKey, Index, String, inspect
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -15,12 +15,10 @@ class AuditEvent(Base, TimestampsMixin):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     user = relationship("User", backref="audit_events")
 
-    portfolio_id = Column(UUID(as_uuid=True), ForeignKey("portfolios.id"), index=True)
+    portfolio_id = Column(UUID(as_uuid=True), ForeignKey("portfolios.id"))
     portfolio = relationship("Portfolio", backref="audit_events")
 
-    application_id = Column(
-        UUID(as_uuid=True), ForeignKey("applications.id"), index=True
-    )
+    application_id = Column(UUID(as_uuid=True), ForeignKey("applications.id"))
     application = relationship("Application", backref="audit_events")
 
     changed_state = Column(JSONB())
@@ -50,7 +48,34 @@ class AuditEvent(Base, TimestampsMixin):
 
         connection.execute(self.__table__.insert(), **attrs)
 
+    @classmethod
+    def save_many(cls, connection, events, batch_size=500):
+        """Inserts audit events, given as dicts of column values, with one
+        multi-row INSERT for each `batch_size` events.
+        """
+        for start in range(0, len(events), batch_size):
+            connection.execute(
+                cls.__table__.insert().values(events[start : start + batch_size])
+            )
+
     def __repr__(self):  # pragma: no cover
         return "<AuditEvent(name='{}', action='{}', id='{}')>".format(
             self.display_name, self.action, self.id
         )
+
+
+Index("audit_event_time_created", AuditEvent.time_created, AuditEvent.id)
+
+Index(
+    "audit_event_portfolio_time_created",
+    AuditEvent.portfolio_id,
+    AuditEvent.time_created,
+    AuditEvent.id,
+)
+
+Index(
+    "audit_event_application_time_created",
+    AuditEvent.application_id,
+    AuditEvent.time_created,
+    AuditEvent.id,
+)
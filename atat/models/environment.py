@@ -12,6 +12,7 @@ class Environment(
     mixins.AuditableMixin,
     mixins.DeletableMixin,
     mixins.ClaimableMixin,
+    mixins.CSPOperationMixin,
 ):
     __tablename__ = "environments"
 
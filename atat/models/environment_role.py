@@ -75,7 +75,8 @@ class EnvironmentRole(
 
     @property
     def displayname(self):
-        return self.role
+        # The role is a CSPRole once loaded, but may be set with its name
+        return self.role.value if isinstance(self.role, CSPRole) else self.role
 
     @property
     def is_disabled(self):
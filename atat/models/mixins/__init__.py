@@ -1,5 +1,6 @@
 from .auditable import AuditableMixin
 from .claimable import ClaimableMixin
+from .csp_operation import CSPOperationMixin
 from .deletable import DeletableMixin
 from .invites import InvitesMixin
 from .permissions import PermissionsMixin
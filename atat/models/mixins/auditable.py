@@ -1,7 +1,10 @@
 from flask import current_app as app
-from flask import g
+from flask import g, has_app_context
+from kombu.exceptions import OperationalError
 from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 
+from atat.database import db
 from atat.models.audit_event import AuditEvent
 from atat.utils import camel_to_snake, getattr_path
 
@@ -9,6 +12,12 @@ ACTION_CREATE = "create"
 ACTION_UPDATE = "update"
 ACTION_DELETE = "delete"
 
+# Audit events created since the session last flushed
+PENDING_AUDIT_EVENTS = "pending_audit_events"
+# Flushed audit events waiting for the transaction to commit, when
+# AUDIT_LOG_ASYNC is enabled
+QUEUED_AUDIT_EVENTS = "queued_audit_events"
+
 
 class AuditableMixin(object):
     @staticmethod
@@ -40,8 +49,11 @@ class AuditableMixin(object):
         )
 
         if app.config.get("USE_AUDIT_LOG", False):
-            audit_event = AuditEvent(**log_data)
-            audit_event.save(connection)
+            session = object_session(resource)
+            if session is None:
+                AuditEvent(**log_data).save(connection)
+            else:
+                session.info.setdefault(PENDING_AUDIT_EVENTS, []).append(log_data)
 
     @classmethod
     def __declare_last__(cls):
@@ -74,9 +86,16 @@ class AuditableMixin(object):
         There may be more than one item in the dictionary, but that is not expected.
         """
         previous_state = {}
-        attrs = inspect(self).mapper.column_attrs
+        state = inspect(self)
+        # Only attributes that have been set since the object was loaded
+        # can have changes.
+        attrs = [
+            attr
+            for attr in state.mapper.column_attrs
+            if attr.key in state.committed_state
+        ]
         for attr in attrs:
-            history = getattr(inspect(self).attrs, attr.key).history
+            history = state.attrs[attr.key].history
             if history.has_changes():
                 deleted = history.deleted.pop() if history.deleted else None
                 added = history.added.pop() if history.added else None
@@ -121,3 +140,64 @@ def record_permission_sets_updates(instance_state, permission_sets, initiator):
             ACTION_UPDATE,
             changed_state=changed_state,
         )
+
+
+def _within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _write_audit_events(session, flush_context):
+    """
+    Writes the audit events created during a flush with one multi-row INSERT
+    per batch, in the flush's transaction. When AUDIT_LOG_ASYNC is enabled
+    they are held until the transaction commits and written by a worker
+    instead.
+    """
+    events = session.info.pop(PENDING_AUDIT_EVENTS, None)
+    if not events:
+        return
+
+    if app.config.get("AUDIT_LOG_ASYNC", False):
+        transaction = session.get_nested_transaction() or session.get_transaction()
+        session.info.setdefault(QUEUED_AUDIT_EVENTS, []).append((transaction, events))
+    else:
+        AuditEvent.save_many(session.connection(), events)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_audit_events(session):
+    queued = session.info.pop(QUEUED_AUDIT_EVENTS, None)
+    if not queued or not has_app_context():
+        return
+
+    from atat.jobs import write_audit_events
+
+    events = [audit_event for _, events in queued for audit_event in events]
+    try:
+        write_audit_events.delay(events)
+    except OperationalError:
+        app.logger.exception(
+            "Could not queue %s audit events; writing them directly", len(events)
+        )
+        with db.engine.begin() as connection:
+            AuditEvent.save_many(connection, events)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_audit_events(session, previous_transaction):
+    # Events still pending are from a flush that failed, whichever
+    # transaction is rolled back
+    session.info.pop(PENDING_AUDIT_EVENTS, None)
+    if previous_transaction.parent is None:
+        session.info.pop(QUEUED_AUDIT_EVENTS, None)
+    elif QUEUED_AUDIT_EVENTS in session.info:
+        session.info[QUEUED_AUDIT_EVENTS] = [
+            (transaction, events)
+            for transaction, events in session.info[QUEUED_AUDIT_EVENTS]
+            if not _within(transaction, previous_transaction)
+        ]
@@ -0,0 +1,9 @@
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class CSPOperationMixin(object):
+    # An asynchronous CSP operation that was started for this resource but has
+    # not finished yet, e.g. the status and result URLs of a management group
+    # that is still being created.
+    csp_operation = Column(JSONB(none_as_null=True))
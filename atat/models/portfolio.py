@@ -14,6 +14,7 @@ from atat.domain.csp.cloud.utils import generate_mail_nickname
 from atat.domain.permission_sets import PermissionSets
 from atat.models.base import Base
 from atat.models.mixins.state_machines import PortfolioStates
+from atat.models.portfolio_funding import funding_summary
 from atat.models.portfolio_role import PortfolioRole
 from atat.models.portfolio_role import Status as PortfolioRoleStatus
 from atat.utils import first_or_none
@@ -109,21 +110,17 @@ class Portfolio(
     def active_task_orders(self):
         return [task_order for task_order in self.task_orders if task_order.is_active]
 
+    @property
+    def funding_summary(self):
+        return funding_summary(self)
+
     @property
     def total_obligated_funds(self):
-        return sum(
-            (task_order.total_obligated_funds for task_order in self.active_task_orders)
-        )
+        return self.funding_summary.obligated
 
     @property
     def upcoming_obligated_funds(self):
-        return sum(
-            (
-                task_order.total_obligated_funds
-                for task_order in self.task_orders
-                if task_order.is_upcoming
-            )
-        )
+        return self.funding_summary.upcoming
 
     @property
     def funding_duration(self):
@@ -132,22 +129,8 @@ class Portfolio(
         of performance end date for all active task orders in a portfolio.
         @return: (datetime.date or None, datetime.date or None)
         """
-        start_dates = (
-            task_order.start_date
-            for task_order in self.task_orders
-            if task_order.is_active
-        )
-
-        end_dates = (
-            task_order.end_date
-            for task_order in self.task_orders
-            if task_order.is_active
-        )
-
-        earliest_pop_start_date = min(start_dates, default=None)
-        latest_pop_end_date = max(end_dates, default=None)
-
-        return (earliest_pop_start_date, latest_pop_end_date)
+        summary = self.funding_summary
+        return (summary.start_date, summary.end_date)
 
     @property
     def days_to_funding_expiration(self):
@@ -155,14 +138,7 @@ class Portfolio(
         Returns the number of days between today and the lastest period performance
         end date of all active Task Orders
         """
-        return max(
-            (
-                task_order.days_to_expiration
-                for task_order in self.task_orders
-                if task_order.is_active
-            ),
-            default=0,
-        )
+        return self.funding_summary.days_to_expiration
 
     @property
     def members(self):
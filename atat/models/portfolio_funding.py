@@ -0,0 +1,106 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, NamedTuple, Optional
+from uuid import UUID
+
+import pendulum
+from flask import g, has_request_context
+from sqlalchemy import and_, event, func, select
+from sqlalchemy.orm import Session
+
+from atat.database import db
+from atat.models.clin import CLIN
+from atat.models.task_order import TaskOrder
+
+
+class FundingSummary(NamedTuple):
+    """
+    Funding totals for a portfolio's signed task orders. A task order is
+    active when today falls within the period of performance of its CLINs,
+    and upcoming when its CLINs have not started yet.
+    """
+
+    obligated: Decimal = Decimal(0)
+    upcoming: Decimal = Decimal(0)
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    days_to_expiration: int = 0
+
+
+def funding_summaries(
+    portfolio_ids: Iterable[UUID], today: date = None
+) -> Dict[UUID, FundingSummary]:
+    """
+    Computes the funding summary of each portfolio with one aggregate query.
+    Portfolios without signed task orders get an empty summary.
+    """
+    portfolio_ids = list(portfolio_ids)
+    today = today or pendulum.today(tz="UTC").date()
+
+    task_orders = (
+        select(
+            TaskOrder.portfolio_id,
+            func.min(CLIN.start_date).label("start_date"),
+            func.max(CLIN.end_date).label("end_date"),
+            func.sum(CLIN.obligated_amount).label("obligated"),
+        )
+        .join(CLIN, CLIN.task_order_id == TaskOrder.id)
+        .where(TaskOrder.signed_at.isnot(None))
+        .where(TaskOrder.portfolio_id.in_(portfolio_ids))
+        .group_by(TaskOrder.id)
+        .subquery()
+    )
+    is_active = and_(task_orders.c.start_date <= today, task_orders.c.end_date >= today)
+    is_upcoming = task_orders.c.start_date > today
+
+    rows = db.session.execute(
+        select(
+            task_orders.c.portfolio_id,
+            func.sum(task_orders.c.obligated).filter(is_active),
+            func.sum(task_orders.c.obligated).filter(is_upcoming),
+            func.min(task_orders.c.start_date).filter(is_active),
+            func.max(task_orders.c.end_date).filter(is_active),
+        ).group_by(task_orders.c.portfolio_id)
+    )
+
+    summaries = {portfolio_id: FundingSummary() for portfolio_id in portfolio_ids}
+    for portfolio_id, obligated, upcoming, start_date, end_date in rows:
+        summaries[portfolio_id] = FundingSummary(
+            obligated=obligated or Decimal(0),
+            upcoming=upcoming or Decimal(0),
+            start_date=start_date,
+            end_date=end_date,
+            days_to_expiration=(end_date - today).days if end_date else 0,
+        )
+    return summaries
+
+
+def funding_summary(portfolio) -> FundingSummary:
+    """Returns the funding summary for a portfolio. Within a request the
+    summary is computed once and reused until a task order or CLIN is
+    changed; outside a request it is computed for each call.
+    """
+    if portfolio.id is None:
+        return FundingSummary()
+    if not has_request_context():
+        return funding_summaries([portfolio.id])[portfolio.id]
+
+    summaries = g.get("funding_summaries")
+    if summaries is None:
+        summaries = g.funding_summaries = {}
+
+    if portfolio.id not in summaries:
+        summaries.update(funding_summaries([portfolio.id]))
+    return summaries[portfolio.id]
+
+
+def clear_funding_summaries():
+    if has_request_context():
+        g.pop("funding_summaries", None)
+
+
+@event.listens_for(Session, "after_flush")
+def _clear_on_funding_changes(session, flush_context):
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, (TaskOrder, CLIN)) for obj in changed):
+        clear_funding_summaries()
@@ -141,6 +141,13 @@ Index(
     unique=True,
 )
 
+Index(
+    "portfolio_role_user_status",
+    PortfolioRole.user_id,
+    PortfolioRole.status,
+    PortfolioRole.portfolio_id,
+)
+
 
 listen(
     PortfolioRole.permission_sets,
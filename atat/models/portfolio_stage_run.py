@@ -0,0 +1,43 @@
+from enum import Enum
+
+from sqlalchemy import Column
+from sqlalchemy import Enum as SQLAEnum
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+
+import atat.models.mixins as mixins
+import atat.models.types as types
+from atat.models.base import Base
+
+
+class StageOutcome(Enum):
+    FINISHED = "finished"
+    RESET = "reset"
+    FAILED = "failed"
+
+
+class PortfolioStageRun(Base, mixins.TimestampsMixin):
+    """One run of a PortfolioStateMachine provisioning stage: how long the
+    CSP call took, how it ended, and which attempt at the stage it was.
+    """
+
+    __tablename__ = "portfolio_stage_runs"
+
+    id = types.Id()
+    portfolio_state_machine_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_state_machines.id"),
+        nullable=False,
+        index=True,
+    )
+    stage = Column(String(), nullable=False)
+    outcome = Column(
+        SQLAEnum(StageOutcome, native_enum=False, create_constraint=False),
+        nullable=False,
+    )
+    attempt = Column(Integer(), nullable=False)
+    duration_ms = Column(Integer(), nullable=False)
+
+    @property
+    def retries(self):
+        return self.attempt - 1
@@ -1,9 +1,10 @@
 import importlib
+import time
 
 from flask import current_app as app
 from sqlalchemy import Column
 from sqlalchemy import Enum as SQLAEnum
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Integer, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import reconstructor, relationship
 from transitions import Machine
@@ -20,6 +21,7 @@ from atat.models.mixins.state_machines import (
     StateMachineMisconfiguredError,
     _build_transitions,
 )
+from atat.models.portfolio_stage_run import PortfolioStageRun, StageOutcome
 from atat.models.types import Id
 
 
@@ -68,6 +70,9 @@ class PortfolioStateMachine(
         nullable=False,
     )
 
+    # Runs of the current stage so far, including resets and failures
+    stage_attempts = Column(Integer(), server_default=text("0"), nullable=False)
+
     def __init__(self, portfolio, cloud=None, **kwargs):
         self.portfolio = portfolio
         self.attach_machine()
@@ -157,16 +162,70 @@ class PortfolioStateMachine(
         db.session.add(self.portfolio)
         db.session.commit()
 
+    def _record_stage_run(self, stage, outcome, started):
+        """Records how a stage run ended. The run is committed along with the
+        transition that follows it. Recording is best-effort: an error is
+        logged and never changes the transition.
+        """
+        try:
+            duration_ms = round((time.perf_counter() - started) * 1000)
+            attempt = (self.stage_attempts or 0) + 1
+            # The next stage starts counting its own attempts
+            self.stage_attempts = 0 if outcome is StageOutcome.FINISHED else attempt
+            db.session.add(
+                PortfolioStageRun(
+                    portfolio_state_machine_id=self.id,
+                    stage=stage,
+                    outcome=outcome,
+                    attempt=attempt,
+                    duration_ms=duration_ms,
+                )
+            )
+            app.logger.info(
+                "Portfolio %s stage %s %s in %sms (attempt %s)",
+                self.portfolio_id,
+                stage,
+                outcome.value,
+                duration_ms,
+                attempt,
+                extra={
+                    "tags": ["portfolio_stage"],
+                    "metrics": {
+                        "stage": stage,
+                        "outcome": outcome.value,
+                        "duration_ms": duration_ms,
+                        "attempt": attempt,
+                        "retries": attempt - 1,
+                    },
+                },
+            )
+        except Exception:
+            app.logger.warning(
+                "Could not record portfolio %s stage %s run",
+                self.portfolio_id,
+                stage,
+                exc_info=1,
+            )
+
     def after_in_progress_callback(self, event):
+        stage = self.current_stage
+        started = time.perf_counter()
+        outcome = None
         try:
             payload = event.kwargs.get("csp_data")
             response = self._do_provisioning_stage(payload)
             if response.reset_stage:
+                outcome = StageOutcome.RESET
+                self._record_stage_run(stage, outcome, started)
                 self.reset_stage()
             else:
                 self._update_csp_data(response.dict())
+                outcome = StageOutcome.FINISHED
+                self._record_stage_run(stage, outcome, started)
                 self.finish_stage()
         except:
+            if outcome is None:
+                self._record_stage_run(stage, StageOutcome.FAILED, started)
             self.fail_stage()
             raise
 
@@ -1,12 +1,23 @@
 from contextlib import contextmanager
 from typing import List
 
-from sqlalchemy import Interval, and_, func, or_, sql
+from sqlalchemy import Interval, and_, func, or_, select, sql, update
 
 from atat.database import db
 from atat.domain.exceptions import ClaimFailedException
 
 
+def _claim_until(minutes):
+    return func.now() + func.cast(sql.functions.concat(minutes, " MINUTES"), Interval)
+
+
+def _release_claims(model, ids):
+    db.session.query(model).filter(model.id.in_(ids)).filter(
+        model.claimed_until != None
+    ).update({"claimed_until": None}, synchronize_session="fetch")
+    db.session.commit()
+
+
 @contextmanager
 def claim_for_update(resource, minutes=30):
     """
@@ -19,9 +30,7 @@ def claim_for_update(resource, minutes=30):
     """
     model = resource.__class__
 
-    claim_until = func.now() + func.cast(
-        sql.functions.concat(minutes, " MINUTES"), Interval
-    )
+    claim_until = _claim_until(minutes)
 
     # Optimistically query for and update the resource in question. If it's
     # already claimed, `rows_updated` will be 0 and we can give up.
@@ -49,10 +58,7 @@ def claim_for_update(resource, minutes=30):
         yield claimed
     finally:
         # Release the claim.
-        db.session.query(model).filter(model.id == resource.id).filter(
-            model.claimed_until != None
-        ).update({"claimed_until": None}, synchronize_session="fetch")
-        db.session.commit()
+        _release_claims(model, (resource.id,))
 
 
 @contextmanager
@@ -67,9 +73,7 @@ def claim_many_for_update(resources: List, minutes=30):
     """
     model = resources[0].__class__
 
-    claim_until = func.now() + func.cast(
-        sql.functions.concat(minutes, " MINUTES"), Interval
-    )
+    claim_until = _claim_until(minutes)
 
     ids = tuple(r.id for r in resources)
 
@@ -100,7 +104,118 @@ def claim_many_for_update(resources: List, minutes=30):
         yield claimed
     finally:
         # Release the claim.
-        db.session.query(model).filter(model.id.in_(ids)).filter(
-            model.claimed_until != None
-        ).update({"claimed_until": None}, synchronize_session="fetch")
-        db.session.commit()
+        _release_claims(model, ids)
+
+
+def claim_batch(query, limit, minutes=30) -> List:
+    """
+    Claim an expiring hold on up to `limit` unclaimed rows matched by `query`
+    in a single round trip.
+
+    Candidate rows are selected with `FOR UPDATE SKIP LOCKED`, so concurrent
+    workers claiming from the same query receive disjoint batches instead of
+    colliding. The claims are committed before returning; release them with
+    `release_claims` once the work is done.
+
+    Args:
+        query:      A query whose first entity is a SQLAlchemy model with a
+                    `claimed_until` attribute. Joined entities are not locked.
+        limit:      The maximum number of rows to claim.
+        minutes:    The maximum amount of time, in minutes, to hold the claims.
+    """
+    model = query.column_descriptions[0]["entity"]
+
+    # Select the candidates in a CTE rather than an `IN (subquery)`, which
+    # Postgres may re-evaluate and so lock and claim more than `limit` rows.
+    candidates = (
+        query.with_entities(model.id)
+        .filter(or_(model.claimed_until.is_(None), model.claimed_until <= func.now()))
+        .limit(limit)
+        .with_for_update(of=model, skip_locked=True)
+        .cte("candidates")
+    )
+    claim = (
+        update(model)
+        .where(model.id == candidates.c.id)
+        .values(claimed_until=_claim_until(minutes))
+        .returning(*model.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = db.session.execute(select(model).from_statement(claim)).scalars().all()
+    db.session.commit()
+
+    return claimed
+
+
+def claim_batch_by_owner(query, owner_id, owner, limit, minutes=30, columns=()):
+    """
+    Like `claim_batch`, but claim every unclaimed row matched by `query` that
+    belongs to up to `limit` owners, so that the rows of one owner are never
+    split between workers.
+
+    The owners' rows are selected with `FOR UPDATE SKIP LOCKED` while the
+    claim is made, and owners that already have a claimed row are skipped
+    until it is released.
+
+    Args:
+        query:      A query whose first entity is a SQLAlchemy model with a
+                    `claimed_until` attribute.
+        owner_id:   The column of that model that references its owner, such
+                    as `ApplicationRole.user_id`.
+        owner:      The owner's model.
+        limit:      The maximum number of owners whose rows are claimed.
+        minutes:    The maximum amount of time, in minutes, to hold the claims.
+        columns:    Other columns of `query` to return with each claimed row.
+
+    Returns a list of (row, *columns) tuples.
+    """
+    model = query.column_descriptions[0]["entity"]
+    unclaimed = or_(model.claimed_until.is_(None), model.claimed_until <= func.now())
+
+    owners = (
+        db.session.query(owner.id)
+        .filter(owner.id.in_(query.filter(unclaimed).with_entities(owner_id)))
+        .filter(
+            owner.id.notin_(
+                query.filter(model.claimed_until > func.now()).with_entities(owner_id)
+            )
+        )
+        .limit(limit)
+        .with_for_update(of=owner, skip_locked=True)
+        .cte("owners")
+    )
+    candidates = (
+        query.filter(unclaimed)
+        .filter(owner_id.in_(select(owners.c.id)))
+        .with_entities(
+            model.id, *[column.label(f"c{i}") for i, column in enumerate(columns)]
+        )
+        .cte("candidates")
+    )
+    extra = [candidates.c[f"c{i}"] for i in range(len(columns))]
+    claim = (
+        update(model)
+        # Postgres re-checks this on rows another worker claimed after this
+        # statement's snapshot was taken, so they are not claimed twice.
+        .where(and_(model.id == candidates.c.id, unclaimed))
+        .values(claimed_until=_claim_until(minutes))
+        .returning(*model.__table__.columns, *extra)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = db.session.execute(select(model, *extra).from_statement(claim)).all()
+    db.session.commit()
+
+    return claimed
+
+
+@contextmanager
+def release_claims(resources: List):
+    """
+    Release the holds taken by `claim_batch` on a group of resources once the
+    wrapped block exits, whether or not it succeeded.
+    """
+    try:
+        yield resources
+    finally:
+        if resources:
+            _release_claims(resources[0].__class__, [r.id for r in resources])
@@ -27,6 +27,10 @@ def update_celery(celery, app):
             "task": "atat.jobs.dispatch_create_environment_role",
             "schedule": schedule_value,
         },
+        "beat-poll_management_group_operations": {
+            "task": "atat.jobs.poll_management_group_operations",
+            "schedule": schedule_value,
+        },
         "beat-send_task_order_files": {
             "task": "atat.jobs.send_task_order_files",
             "schedule": schedule_value,
@@ -35,6 +39,14 @@ def update_celery(celery, app):
             "task": "atat.jobs.create_billing_instruction",
             "schedule": schedule_value,
         },
+        "beat-send_queued_mail": {
+            "task": "atat.jobs.send_queued_mail",
+            "schedule": app.config.get("MAIL_BATCH_INTERVAL", 10),
+        },
+        "beat-dispatch_refresh_portfolio_spending": {
+            "task": "atat.jobs.dispatch_refresh_portfolio_spending",
+            "schedule": app.config.get("PORTFOLIO_SPENDING_REFRESH_INTERVAL", 3600),
+        },
     }
 
     class ContextTask(celery.Task):
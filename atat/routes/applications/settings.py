@@ -1,4 +1,4 @@
-from flask import g, redirect, render_template
+from flask import g, jsonify, redirect, render_template
 from flask import request as http_request
 from flask import url_for
 
@@ -8,7 +8,7 @@ from atat.domain.audit_log import AuditLog
 from atat.domain.authz.decorator import user_can_access_decorator as user_can
 from atat.domain.common import Paginator
 from atat.domain.csp.cloud.exceptions import GeneralCSPException
-from atat.domain.environment_roles import EnvironmentRoles
+from atat.domain.environment_roles import EnvironmentRoleIndex, EnvironmentRoles
 from atat.domain.environments import Environments
 from atat.domain.exceptions import AlreadyExistsError
 from atat.domain.invitations import ApplicationInvitations
@@ -19,8 +19,13 @@ from atat.forms.application_member import NewForm as NewMemberForm
 from atat.forms.application_member import UpdateMemberForm
 from atat.forms.data import ENV_ROLE_NO_ACCESS as NO_ACCESS
 from atat.forms.member import NewForm as MemberForm
+from atat.forms.member_upload import (
+    MemberUploadError,
+    read_member_upload,
+    validate_member_rows,
+)
 from atat.jobs import create_subscription as create_subscription_job
-from atat.jobs import send_mail
+from atat.jobs import send_mail, send_mails
 from atat.models.permissions import Permissions
 from atat.routes.errors import log_error
 from atat.utils.flash import formatted_flash as flash
@@ -31,7 +36,8 @@ from .blueprint import applications_bp
 _APPLICATION_SETTINGS = "applications.settings"
 
 
-def get_environments_obj_for_app(application):
+def get_environments_obj_for_app(application, index=None):
+    index = index or EnvironmentRoles.index_for_application(application)
     return sorted(
         [
             {
@@ -39,19 +45,19 @@ def get_environments_obj_for_app(application):
                 "name": env.name,
                 "pending": env.is_pending,
                 "edit_form": EditEnvironmentForm(obj=env),
-                "member_count": len(env.roles),
+                "member_count": len(index.roles_for_environment(env)),
                 "members": sorted(
                     [
                         {
                             "user_name": env_role.application_role.user_name,
                             "status": env_role.status.value,
                         }
-                        for env_role in env.roles
+                        for env_role in index.roles_for_environment(env)
                     ],
                     key=lambda env_role: env_role["user_name"],
                 ),
             }
-            for env in application.environments
+            for env in index.environments
         ],
         key=lambda env: env["name"],
     )
@@ -84,7 +90,8 @@ def filter_env_roles_data(roles):
     )
 
 
-def filter_env_roles_form_data(member, environments):
+def filter_env_roles_form_data(member, environments, index=None):
+    index = index or EnvironmentRoleIndex.for_member(member, environments)
     env_roles_form_data = []
     for env in environments:
         env_data = {
@@ -93,10 +100,9 @@ def filter_env_roles_form_data(member, environments):
             "role": NO_ACCESS,
             "disabled": False,
         }
-        env_roles_set = set(env.roles).intersection(set(member.environment_roles))
+        env_role = index.get(member, env)
 
-        if len(env_roles_set) == 1:
-            (env_role,) = env_roles_set
+        if env_role:
             env_data["disabled"] = env_role.is_disabled
             if env_role.role:
                 env_data["role"] = env_role.role.name
@@ -106,14 +112,14 @@ def filter_env_roles_form_data(member, environments):
     return env_roles_form_data
 
 
-def get_members_data(application):
+def get_members_data(application, index=None):
+    index = index or EnvironmentRoles.index_for_application(application)
     members_data = []
-    for member in application.members:
+    for member in index.members:
         permission_sets = filter_perm_sets_data(member)
-        roles = EnvironmentRoles.get_for_application_member(member.id)
-        environment_roles = filter_env_roles_data(roles)
+        environment_roles = filter_env_roles_data(index.roles_for_member(member))
         env_roles_form_data = filter_env_roles_form_data(
-            member, application.environments
+            member, index.environments, index
         )
         form = UpdateMemberForm(
             environment_roles=env_roles_form_data, **permission_sets
@@ -152,12 +158,13 @@ def get_new_member_form(application):
 
 
 def render_settings_page(application, **kwargs):
-    environments_obj = get_environments_obj_for_app(application=application)
+    index = EnvironmentRoles.index_for_application(application)
+    environments_obj = get_environments_obj_for_app(application, index)
     new_env_form = EditEnvironmentForm()
     pagination_opts = Paginator.get_pagination_opts(http_request)
     audit_events = AuditLog.get_application_events(application, pagination_opts)
     new_member_form = get_new_member_form(application)
-    members = get_members_data(application)
+    members = get_members_data(application, index)
 
     if "application_form" not in kwargs:
         kwargs["application_form"] = NameAndDescriptionForm(
@@ -187,6 +194,24 @@ def send_application_invitation(invitee_email, inviter_name, token):
     )
 
 
+def send_application_invitations(invitations, inviter_name):
+    subject = translate("email.application_invite", {"inviter_name": inviter_name})
+    send_mails.delay(
+        [
+            {
+                "recipients": [email],
+                "subject": subject,
+                "body": render_template(
+                    "emails/application/invitation.txt",
+                    owner=inviter_name,
+                    token=token,
+                ),
+            }
+            for email, token in invitations
+        ]
+    )
+
+
 def handle_create_member(application_id, form_data):
     application = Applications.get(application_id)
     form = NewMemberForm(form_data)
@@ -411,6 +436,44 @@ def create_member(application_id):
     )
 
 
+@applications_bp.route("/application/<application_id>/members/bulk", methods=["POST"])
+@user_can(
+    Permissions.CREATE_APPLICATION_MEMBER, message="create new application members"
+)
+def create_members(application_id):
+    """
+    Invites every member in an uploaded CSV or JSON member list, or in a JSON
+    request body. Nobody is invited unless every member is valid. Environment
+    roles are assigned afterwards, as for any other member.
+    """
+    application = Applications.get(application_id)
+
+    try:
+        rows = read_member_upload(http_request)
+        members_data = validate_member_rows(rows, NewMemberForm)
+    except MemberUploadError as error:
+        if http_request.is_json:
+            return jsonify(errors=error.errors), 400
+        flash("bulk_invite_error", errors=error.message)
+    else:
+        invitations = Applications.invite_many(
+            application, g.current_user, members_data
+        )
+        send_application_invitations(invitations, g.current_user.full_name)
+        if http_request.is_json:
+            return jsonify(invited=len(invitations)), 201
+        flash("bulk_invite_sent", count=len(invitations))
+
+    return redirect(
+        url_for(
+            _APPLICATION_SETTINGS,
+            application_id=application_id,
+            fragment="application-members",
+            _anchor="application-members",
+        )
+    )
+
+
 @applications_bp.route(
     "/applications/<application_id>/members/<application_role_id>/delete",
     methods=["POST"],
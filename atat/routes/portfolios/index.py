@@ -1,4 +1,3 @@
-import pendulum
 from flask import g, redirect, render_template
 from flask import request as http_request
 from flask import url_for
@@ -6,6 +5,7 @@ from flask import url_for
 from atat.domain.authz.decorator import user_can_access_decorator as user_can
 from atat.domain.portfolios import Portfolios
 from atat.domain.reports import Reports
+from atat.forms.forms import BaseForm
 from atat.forms.portfolio import PortfolioCreationForm
 from atat.models.permissions import Permissions
 from atat.utils.flash import formatted_flash as flash
@@ -36,7 +36,8 @@ def create_portfolio():
 @user_can(Permissions.VIEW_PORTFOLIO_REPORTS, message="view portfolio reports")
 def reports(portfolio_id):
     portfolio = Portfolios.get(g.current_user, portfolio_id)
-    spending = {"invoiced": 1, "estimated": 1}
+    spending = Reports.get_cached_portfolio_spending(portfolio)
+    retrieved = spending.pop("retrieved")
     obligated = portfolio.total_obligated_funds
     remaining = obligated - (spending["invoiced"] + spending["estimated"])
 
@@ -56,5 +57,15 @@ def reports(portfolio_id):
         total_portfolio_value=str(portfolio.total_obligated_funds),
         current_obligated_funds=current_obligated_funds,
         expired_task_orders=Reports.expired_task_orders(portfolio),
-        retrieved=pendulum.now(tz="UTC"),  # mocked datetime of reporting data retrival
+        retrieved=retrieved,
+        refresh_form=BaseForm(),
     )
+
+
+@portfolios_bp.route("/portfolios/<portfolio_id>/reports/refresh", methods=["POST"])
+@user_can(Permissions.VIEW_PORTFOLIO_REPORTS, message="refresh portfolio reports")
+def refresh_reports(portfolio_id):
+    portfolio = Portfolios.get(g.current_user, portfolio_id)
+    if portfolio.is_provisioned:
+        Reports.request_spending_refresh(portfolio.id)
+    return redirect(url_for("portfolios.reports", portfolio_id=portfolio.id))
@@ -1,4 +1,4 @@
-from flask import g, redirect, render_template
+from flask import g, jsonify, redirect, render_template
 from flask import request as http_request
 from flask import url_for
 
@@ -7,7 +7,12 @@ from atat.domain.authz.decorator import user_can_access_decorator as user_can
 from atat.domain.exceptions import AlreadyExistsError
 from atat.domain.invitations import PortfolioInvitations
 from atat.domain.portfolios import Portfolios
-from atat.jobs import send_mail
+from atat.forms.member_upload import (
+    MemberUploadError,
+    read_member_upload,
+    validate_member_rows,
+)
+from atat.jobs import send_mail, send_mails
 from atat.models import Permissions
 from atat.utils.flash import formatted_flash as flash
 from atat.utils.localization import translate
@@ -28,6 +33,24 @@ def send_portfolio_invitation(invitee_email, inviter_name, token):
     )
 
 
+def send_portfolio_invitations(invitations, inviter_name):
+    subject = translate("email.portfolio_invite", {"inviter_name": inviter_name})
+    send_mails.delay(
+        [
+            {
+                "recipients": [email],
+                "subject": subject,
+                "body": render_template(
+                    "emails/portfolio/invitation.txt",
+                    owner=inviter_name,
+                    token=token,
+                ),
+            }
+            for email, token in invitations
+        ]
+    )
+
+
 @portfolios_bp.route("/portfolios/invitations/<portfolio_token>", methods=["GET"])
 def accept_invitation(portfolio_token):
     invite = PortfolioInvitations.accept(g.current_user, portfolio_token)
@@ -125,3 +148,36 @@ def invite_member(portfolio_id):
             _anchor="portfolio-members",
         )
     )
+
+
+@portfolios_bp.route("/portfolios/<portfolio_id>/members/bulk", methods=["POST"])
+@user_can(Permissions.CREATE_PORTFOLIO_USERS, message="create new portfolio members")
+def invite_members(portfolio_id):
+    """
+    Invites every member in an uploaded CSV or JSON member list, or in a JSON
+    request body. Nobody is invited unless every member is valid.
+    """
+    portfolio = Portfolios.get(g.current_user, portfolio_id)
+
+    try:
+        rows = read_member_upload(http_request)
+        members_data = validate_member_rows(rows, member_forms.NewForm)
+    except MemberUploadError as error:
+        if http_request.is_json:
+            return jsonify(errors=error.errors), 400
+        flash("bulk_invite_error", errors=error.message)
+    else:
+        invitations = Portfolios.invite_many(portfolio, g.current_user, members_data)
+        send_portfolio_invitations(invitations, g.current_user.full_name)
+        if http_request.is_json:
+            return jsonify(invited=len(invitations)), 201
+        flash("bulk_invite_sent", count=len(invitations))
+
+    return redirect(
+        url_for(
+            _PORTFOLIO_ADMIN_URL,
+            portfolio_id=portfolio_id,
+            fragment="portfolio-members",
+            _anchor="portfolio-members",
+        )
+    )
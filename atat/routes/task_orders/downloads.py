@@ -1,5 +1,10 @@
+from datetime import timezone
+
 from flask import Response
 from flask import current_app as app
+from flask import request
+from werkzeug.datastructures import ContentRange
+from werkzeug.http import quote_etag
 
 from atat.domain.authz.decorator import user_can_access_decorator as user_can
 from atat.domain.exceptions import NotFoundError
@@ -9,14 +14,73 @@ from atat.models.permissions import Permissions
 from .blueprint import task_orders_bp
 
 
+def _range_applies(properties):
+    """
+    A Range request with an If-Range header is only honoured while the file
+    still matches the validator the client already has.
+    """
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == properties.etag
+    if if_range.date is not None:
+        if properties.last_modified is None:
+            return False
+        last_modified = _as_utc(properties.last_modified).replace(microsecond=0)
+        return _as_utc(if_range.date) == last_modified
+    return True
+
+
+def _as_utc(value):
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
 def send_file(attachment):
-    generator = app.csp.files.download(attachment.object_name)
-    return Response(
-        generator,
-        headers={
-            "Content-Disposition": "attachment; filename={}".format(attachment.filename)
-        },
+    """
+    Streams a stored file in chunks, so that memory use does not depend on the
+    file's size. Supports conditional requests with If-None-Match and single
+    byte ranges with Range and If-Range.
+    """
+    files = app.csp.files
+    properties = files.get_properties(attachment.object_name)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": "attachment; filename={}".format(attachment.filename),
+        "ETag": quote_etag(properties.etag),
+    }
+
+    if request.if_none_match.contains_weak(properties.etag):
+        return Response(status=304, headers=headers)
+
+    status = 200
+    offset, length = 0, properties.size
+    byte_range = request.range
+    if byte_range is not None and _range_applies(properties):
+        bounds = byte_range.range_for_length(properties.size)
+        if bounds is None:
+            headers["Content-Range"] = "bytes */{}".format(properties.size)
+            return Response(status=416, headers=headers)
+
+        start, stop = bounds
+        status = 206
+        offset, length = start, stop - start
+        headers["Content-Range"] = ContentRange(
+            "bytes", start, stop, properties.size
+        ).to_header()
+
+    chunks = files.stream(
+        attachment.object_name, offset=offset, length=length, etag=properties.etag
+    )
+    response = Response(
+        chunks,
+        status=status,
+        headers=headers,
+        mimetype=properties.content_type,
+        direct_passthrough=True,
     )
+    response.content_length = length
+    response.last_modified = properties.last_modified
+    return response
 
 
 @task_orders_bp.route("/task_orders/<task_order_id>/pdf")
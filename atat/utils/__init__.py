@@ -47,3 +47,8 @@ def commit_or_raise_already_exists_error(message):
 def sha256_hex(string):
     hsh = hashlib.sha256(string.encode())
     return hsh.digest().hex()
+
+
+def chunks(lst, size):
+    for i in range(0, len(lst), size):
+        yield lst[i : i + size]
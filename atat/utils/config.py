@@ -96,6 +96,7 @@ def map_config(config):
     return {
         **config["default"],
         "USE_AUDIT_LOG": config["default"].getboolean("USE_AUDIT_LOG"),
+        "AUDIT_LOG_ASYNC": config["default"].getboolean("AUDIT_LOG_ASYNC"),
         "DEBUG": config["default"].getboolean("DEBUG"),
         "DEBUG_MAILER": config["default"].getboolean("DEBUG_MAILER"),
         "DEBUG_SMTP": int(config["default"]["DEBUG_SMTP"]),
@@ -116,6 +117,25 @@ def map_config(config):
             "default", "PERMANENT_SESSION_LIFETIME"
         ),
         "LOG_JSON": config.getboolean("default", "LOG_JSON"),
+        "MAIL_BATCHED": config.getboolean("default", "MAIL_BATCHED"),
+        "MAIL_BATCH_INTERVAL": config.getint("default", "MAIL_BATCH_INTERVAL"),
+        "MAIL_BATCH_SIZE": config.getint("default", "MAIL_BATCH_SIZE"),
+        "MAIL_HEALTH_CHECK_INTERVAL": config.getint(
+            "default", "MAIL_HEALTH_CHECK_INTERVAL"
+        ),
+        "MAIL_POOL_SIZE": config.getint("default", "MAIL_POOL_SIZE"),
+        "FILE_DOWNLOAD_CHUNK_SIZE": config.getint(
+            "default", "FILE_DOWNLOAD_CHUNK_SIZE"
+        ),
+        "PORTFOLIO_SUMMARY_CACHE_TTL": config.getint(
+            "default", "PORTFOLIO_SUMMARY_CACHE_TTL"
+        ),
+        "PORTFOLIO_SPENDING_CACHE_TTL": config.getint(
+            "default", "PORTFOLIO_SPENDING_CACHE_TTL"
+        ),
+        "PORTFOLIO_SPENDING_REFRESH_INTERVAL": config.getint(
+            "default", "PORTFOLIO_SPENDING_REFRESH_INTERVAL"
+        ),
         "LIMIT_CONCURRENT_SESSIONS": config.getboolean(
             "default", "LIMIT_CONCURRENT_SESSIONS"
         ),
@@ -125,9 +145,57 @@ def map_config(config):
         # with a Beat job once a day)
         "CELERY_RESULT_EXPIRES": 0,
         "CELERY_RESULT_EXTENDED": True,
+        "AZURE_CIRCUIT_BREAKER_COOLDOWN": config.getint(
+            "default", "AZURE_CIRCUIT_BREAKER_COOLDOWN"
+        ),
+        "AZURE_CIRCUIT_BREAKER_THRESHOLD": config.getint(
+            "default", "AZURE_CIRCUIT_BREAKER_THRESHOLD"
+        ),
+        "AZURE_CREDENTIAL_CACHE_SIZE": config.getint(
+            "default", "AZURE_CREDENTIAL_CACHE_SIZE"
+        ),
+        "AZURE_CREDENTIAL_CACHE_TTL": config.getint(
+            "default", "AZURE_CREDENTIAL_CACHE_TTL"
+        ),
+        "AZURE_GRAPH_BATCHING": config.getboolean("default", "AZURE_GRAPH_BATCHING"),
+        "AZURE_HTTP_BACKOFF_FACTOR": config.getfloat(
+            "default", "AZURE_HTTP_BACKOFF_FACTOR"
+        ),
+        "AZURE_HTTP_MAX_RETRIES": config.getint("default", "AZURE_HTTP_MAX_RETRIES"),
+        "AZURE_HTTP_POOL_SIZE": config.getint("default", "AZURE_HTTP_POOL_SIZE"),
+        "AZURE_HTTP_TIMEOUT": config.getfloat("default", "AZURE_HTTP_TIMEOUT"),
+        "AZURE_NONBLOCKING_MGMT_GROUPS": config.getboolean(
+            "default", "AZURE_NONBLOCKING_MGMT_GROUPS"
+        ),
+        "AZURE_RATE_LIMIT_ARM": config.getfloat("default", "AZURE_RATE_LIMIT_ARM"),
+        "AZURE_RATE_LIMIT_BILLING": config.getfloat(
+            "default", "AZURE_RATE_LIMIT_BILLING"
+        ),
+        "AZURE_RATE_LIMIT_GRAPH": config.getfloat("default", "AZURE_RATE_LIMIT_GRAPH"),
+        "AZURE_RATE_LIMIT_MAX_WAIT": config.getfloat(
+            "default", "AZURE_RATE_LIMIT_MAX_WAIT"
+        ),
+        "AZURE_THROTTLING": config.getboolean("default", "AZURE_THROTTLING"),
+        "AZURE_TOKEN_CACHE_REDIS": config.getboolean(
+            "default", "AZURE_TOKEN_CACHE_REDIS"
+        ),
+        "AZURE_TOKEN_REFRESH_MARGIN": config.getint(
+            "default", "AZURE_TOKEN_REFRESH_MARGIN"
+        ),
         "CELERYBEAT_SCHEDULE_VALUE": config.getint(
             "default", "CELERYBEAT_SCHEDULE_VALUE"
         ),
+        "CLAIM_BATCH_SIZE": config.getint("default", "CLAIM_BATCH_SIZE"),
+        "CLAIM_CONCURRENCY": config.getint("default", "CLAIM_CONCURRENCY"),
+        "CLAIM_PENDING_WORK": config.getboolean("default", "CLAIM_PENDING_WORK"),
+        "CSP_ASYNC_CONCURRENCY": config.getint("default", "CSP_ASYNC_CONCURRENCY"),
+        "CSP_ASYNC_PROVISIONING": config.getboolean(
+            "default", "CSP_ASYNC_PROVISIONING"
+        ),
+        "CSP_LAZY_INIT": config.getboolean("default", "CSP_LAZY_INIT"),
+        "CURRENT_USER_SNAPSHOT_TTL": config.getint(
+            "default", "CURRENT_USER_SNAPSHOT_TTL"
+        ),
         "CONTRACT_START_DATE": pendulum.from_format(
             config.get("default", "CONTRACT_START_DATE"), "YYYY-MM-DD"
         ).date(),
@@ -137,6 +205,13 @@ def map_config(config):
         "SESSION_COOKIE_SECURE": config.getboolean("default", "SESSION_COOKIE_SECURE"),
         "ALLOW_LOCAL_ACCESS": config.getboolean("default", "ALLOW_LOCAL_ACCESS"),
         "SAML_SSL_VERIFY": config.getboolean("default", "SAML_SSL_VERIFY"),
+        "DISPATCH_BATCHED": config.getboolean("default", "DISPATCH_BATCHED"),
+        "DISPATCH_CHUNK_SIZE": config.getint("default", "DISPATCH_CHUNK_SIZE"),
+        "DISPATCH_INFLIGHT_TTL": config.getint("default", "DISPATCH_INFLIGHT_TTL"),
+        "ICONS_MINIFY": config.getboolean("default", "ICONS_MINIFY"),
+        "MGMT_GROUP_POLL_BATCH_SIZE": config.getint(
+            "default", "MGMT_GROUP_POLL_BATCH_SIZE"
+        ),
     }
 
 
@@ -0,0 +1,75 @@
+import time
+from typing import NamedTuple
+
+from celery import group
+
+from atat.utils import chunks
+
+INFLIGHT_KEY_PREFIX = "dispatch:inflight"
+
+
+class DispatchMetrics(NamedTuple):
+    found: int
+    enqueued: int
+    deduplicated: int
+
+
+def inflight_member(value):
+    if isinstance(value, (list, tuple)):
+        return ",".join(sorted(str(v) for v in value))
+    return str(value)
+
+
+class BatchDispatcher(object):
+    """
+    Enqueues Celery tasks for a list of IDs in chunked groups, skipping any ID
+    that already has a task in flight.
+
+    In-flight IDs are tracked per task in a Redis sorted set scored by the
+    time the entry expires, so a task lost by a crashed worker is dispatched
+    again once its entry's TTL has passed.
+    """
+
+    def __init__(self, redis, chunk_size=100, inflight_ttl=3600):
+        self.redis = redis
+        self.chunk_size = chunk_size
+        self.inflight_ttl = inflight_ttl
+
+    def dispatch(self, task, kwarg_name, values):
+        to_enqueue = self._mark_inflight(task.name, values)
+
+        for i, chunk in enumerate(chunks(to_enqueue, self.chunk_size)):
+            try:
+                group([task.s(**{kwarg_name: value}) for value in chunk]).apply_async()
+            except Exception:
+                for value in to_enqueue[i * self.chunk_size :]:
+                    self.release(task.name, value)
+                raise
+
+        return DispatchMetrics(
+            found=len(values),
+            enqueued=len(to_enqueue),
+            deduplicated=len(values) - len(to_enqueue),
+        )
+
+    def release(self, task_name, value):
+        self.redis.zrem(self._key(task_name), inflight_member(value))
+
+    def _mark_inflight(self, task_name, values):
+        key = self._key(task_name)
+        now = time.time()
+
+        pipeline = self.redis.pipeline()
+        pipeline.zremrangebyscore(key, "-inf", now)
+        for value in values:
+            pipeline.zadd(
+                key, {inflight_member(value): now + self.inflight_ttl}, nx=True
+            )
+        pipeline.expire(key, self.inflight_ttl)
+        added = pipeline.execute()[1:-1]
+
+        return [value for value, was_added in zip(values, added) if was_added]
+
+    @staticmethod
+    def _key(task_name):
+        return f"{INFLIGHT_KEY_PREFIX}:{task_name}"
@@ -59,6 +59,16 @@ MESSAGES = {
         "message": "flash.application.name_error.message",
         "category": "error",
     },
+    "bulk_invite_error": {
+        "title": "flash.bulk_invite.error.title",
+        "message": "flash.bulk_invite.error.message",
+        "category": "error",
+    },
+    "bulk_invite_sent": {
+        "title": "flash.bulk_invite.sent.title",
+        "message": "flash.bulk_invite.sent.message",
+        "category": "success",
+    },
     "ccpo_user_added": {
         "title": _FLASH_SUCCESS,
         "message": "flash.ccpo_user.added.message",
@@ -0,0 +1,70 @@
+import os
+import re
+import time
+from types import MappingProxyType
+
+ICONS_DIRECTORY = "static/icons"
+
+_COMMENTS = re.compile(r"<!--.*?-->", re.DOTALL)
+_WHITESPACE_BETWEEN_TAGS = re.compile(r">\s+<")
+
+
+def minify_svg(svg):
+    """Removes comments and the whitespace between tags from an SVG."""
+    svg = _COMMENTS.sub("", svg)
+    return _WHITESPACE_BETWEEN_TAGS.sub("><", svg).strip()
+
+
+class IconRegistry(object):
+    """
+    Holds the contents of every SVG icon, keyed by file name without the
+    extension, so that rendering an icon does not touch the filesystem.
+
+    The icons are loaded once, when the registry is created. With `watch`
+    enabled, as in development, the directory is checked for changes at most
+    once every `watch_interval` seconds and reloaded if any icon was added,
+    removed or edited.
+    """
+
+    def __init__(self, directory=ICONS_DIRECTORY, minify=False, watch=False):
+        self.directory = directory
+        self.minify = minify
+        self.watch = watch
+        self.watch_interval = 1
+        self._checked_at = time.monotonic()
+        self._signature = self._scan()
+        self.icons = self._load()
+
+    def get(self, name):
+        if self.watch:
+            self._reload_if_changed()
+        try:
+            return self.icons[name]
+        except KeyError:
+            raise FileNotFoundError(f"No icon named {name} in {self.directory}")
+
+    def _load(self):
+        icons = {}
+        for filename in self._signature:
+            with open(os.path.join(self.directory, filename)) as contents:
+                svg = contents.read()
+            icons[filename[: -len(".svg")]] = minify_svg(svg) if self.minify else svg
+        return MappingProxyType(icons)
+
+    def _scan(self):
+        return {
+            entry.name: entry.stat().st_mtime_ns
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".svg") and entry.is_file()
+        }
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.watch_interval:
+            return
+        self._checked_at = now
+
+        signature = self._scan()
+        if signature != self._signature:
+            self._signature = signature
+            self.icons = self._load()
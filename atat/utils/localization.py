@@ -1,9 +1,13 @@
-from functools import lru_cache
+import json
+import os
+import tempfile
+import time
+from string import Formatter
 
 import yaml
 from flask import current_app as app
 
-from atat.utils import getattr_path
+DEFAULT_TRANSLATIONS_FILE = "translations.yaml"
 
 
 class LocalizationInvalidKeyError(Exception):
@@ -17,43 +21,161 @@ class LocalizationInvalidKeyError(Exception):
         )
 
 
-@lru_cache(maxsize=None)
-def _translations_file():
-    file_name = "translations.yaml"
+class TranslationCatalogue(object):
+    """
+    The translations file compiled into flat lookups by dotted key. Newlines
+    are stripped from every string when it is compiled. Strings without
+    replacement fields are formatted once, so they can be returned as they
+    are; the others keep a bound `str.format` to fill in their variables.
+    """
+
+    # Bump when the cached layout changes, so that old caches are rebuilt
+    CACHE_VERSION = 1
+
+    def __init__(self, static, templates, mtime_ns=None):
+        self.static = static
+        self.templates = templates
+        self.mtime_ns = mtime_ns
+        self._formatters = {key: value.format for key, value in templates.items()}
+
+    @classmethod
+    def compile(cls, translations, mtime_ns=None):
+        static = {}
+        templates = {}
+        for key, value in _flatten(translations):
+            value = value.replace("\n", "")
+            if any(field is not None for _, field, _, _ in Formatter().parse(value)):
+                templates[key] = value
+            else:
+                static[key] = value.format()
+        return cls(static, templates, mtime_ns=mtime_ns)
+
+    def keys(self):
+        return [*self.static, *self.templates]
+
+    def translate(self, key, variables=None):
+        value = self.static.get(key)
+        if value is not None:
+            return value
+
+        formatter = self._formatters.get(key)
+        if formatter is None:
+            raise LocalizationInvalidKeyError(key, variables or {})
+        return formatter(**(variables or {}))
+
+    def to_dictionary(self):
+        return {
+            "version": self.CACHE_VERSION,
+            "static": self.static,
+            "templates": self.templates,
+            "mtime_ns": self.mtime_ns,
+        }
+
+    @classmethod
+    def from_dictionary(cls, data):
+        if data.get("version") != cls.CACHE_VERSION:
+            raise ValueError("Translation cache was written by another version")
+        static, templates = data["static"], data["templates"]
+        if not all(
+            isinstance(value, str) for value in [*static.values(), *templates.values()]
+        ):
+            raise ValueError("Translation cache holds a value that is not a string")
+        return cls(static, templates, data["mtime_ns"])
+
+
+def _flatten(translations, prefix=""):
+    for name, value in translations.items():
+        key = prefix + str(name)
+        if isinstance(value, dict):
+            yield from _flatten(value, key + ".")
+        else:
+            yield key, value
 
-    if app:
-        file_name = app.config.get("DEFAULT_TRANSLATIONS_FILE", file_name)
+
+def _read_cache(cache_file, mtime_ns):
+    try:
+        with open(cache_file, encoding="utf-8") as cache:
+            catalogue = TranslationCatalogue.from_dictionary(json.load(cache))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+    if catalogue.mtime_ns == mtime_ns:
+        return catalogue
+    return None
+
+
+def _write_cache(cache_file, catalogue):
+    # Write to a temporary file first so other workers never read half a cache
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(cache_file))
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as cache:
+            json.dump(catalogue.to_dictionary(), cache)
+        os.replace(temp_path, cache_file)
+    except OSError:
+        if temp_path and os.path.exists(temp_path):
+            os.unlink(temp_path)
+        if app:
+            app.logger.warning("Could not write translation cache to %s", cache_file)
+
+
+def load_catalogue(file_name, cache_file=None):
+    """
+    Compiles the translations file. When `cache_file` is given, the compiled
+    catalogue is read from it if it was built from the file's current
+    version, and written to it otherwise.
+    """
+    mtime_ns = os.stat(file_name).st_mtime_ns
+
+    if cache_file:
+        catalogue = _read_cache(cache_file, mtime_ns)
+        if catalogue is not None:
+            return catalogue
 
     # Non-ASCII characters such as smart quotes may be used in the translations
     # file and therefore it should be parsed as UTF-8
     with open(file_name, encoding="utf-8") as translations_file:
-        return yaml.safe_load(translations_file)
+        catalogue = TranslationCatalogue.compile(
+            yaml.safe_load(translations_file), mtime_ns=mtime_ns
+        )
 
+    if cache_file:
+        _write_cache(cache_file, catalogue)
+    return catalogue
 
-def all_keys():
-    translations = _translations_file()
-    keys = []
 
-    def _recursive_key_lookup(chain):
-        results = getattr_path(translations, chain)
-        if isinstance(results, str):
-            keys.append(chain)
-        else:
-            [_recursive_key_lookup(".".join([chain, result])) for result in results]
+_catalogues = {}
+_checked_at = {}
 
-    [_recursive_key_lookup(key) for key in translations]
 
-    return keys
+def get_catalogue():
+    file_name = DEFAULT_TRANSLATIONS_FILE
+    cache_file = None
+    reload = False
 
+    if app:
+        file_name = app.config.get("DEFAULT_TRANSLATIONS_FILE", file_name)
+        cache_file = app.config.get("TRANSLATIONS_CACHE_FILE")
+        reload = app.config.get("DEBUG", False)
 
-def translate(key, variables=None):
-    translations = _translations_file()
-    value = getattr_path(translations, key)
+    catalogue = _catalogues.get(file_name)
+    if catalogue is None:
+        catalogue = _catalogues[file_name] = load_catalogue(file_name, cache_file)
+        _checked_at[file_name] = time.monotonic()
+    elif reload and time.monotonic() - _checked_at[file_name] >= 1:
+        # In development, pick up edits to the translations file
+        _checked_at[file_name] = time.monotonic()
+        if os.stat(file_name).st_mtime_ns != catalogue.mtime_ns:
+            catalogue = _catalogues[file_name] = load_catalogue(file_name, cache_file)
 
-    if variables is None:
-        variables = {}
+    return catalogue
 
-    if value is None:
-        raise LocalizationInvalidKeyError(key, variables)
 
-    return value.format(**variables).replace("\n", "")
+def all_keys():
+    return get_catalogue().keys()
+
+
+def translate(key, variables=None):
+    return get_catalogue().translate(key, variables)
@@ -40,6 +40,7 @@ class JsonFormatter(logging.Formatter):
         ("severity", lambda r: r.levelname),
         ("tags", lambda r: r.__dict__.get("tags")),
         ("audit_event", lambda r: r.__dict__.get("audit_event")),
+        ("metrics", lambda r: r.__dict__.get("metrics")),
     ]
 
     def __init__(self, *args, source="atat", **kwargs):
@@ -1,13 +1,49 @@
+import atexit
 import io
+import json
+import os
 import smtplib
+import threading
+import time
 from contextlib import contextmanager
 from email.message import EmailMessage
 
+OUTBOX_KEY = "mail:outbox"
+
+
+class MailBatchError(Exception):
+    """
+    Raised when a message in a batch could not be sent. `sent` is the number
+    of messages sent before it; the rest were not attempted.
+    """
+
+    def __init__(self, sent, error):
+        super().__init__(f"Sent {sent} messages before an error: {error}")
+        self.sent = sent
+        self.error = error
+
+    @property
+    def rejected(self):
+        """
+        Whether the server rejected the message itself, rather than the
+        connection failing, so that sending it again may never succeed.
+        """
+        return isinstance(
+            self.error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)
+        )
+
 
 class MailConnection(object):
     def send(self, message):
         raise NotImplementedError()
 
+    def send_many(self, messages):
+        for sent, message in enumerate(messages):
+            try:
+                self.send(message)
+            except Exception as error:
+                raise MailBatchError(sent, error) from error
+
     @property
     def messages(self):
         raise NotImplementedError()
@@ -22,10 +58,7 @@ class SMTPConnection(MailConnection):
         self.use_tls = use_tls
         self.debug_smtp = debug_smtp
 
-    @contextmanager
-    def _connected_host(self):
-        host = None
-
+    def _connect(self):
         if self.use_tls:
             host = smtplib.SMTP(self.server, self.port)
             host.starttls()
@@ -35,9 +68,22 @@ class SMTPConnection(MailConnection):
         host.set_debuglevel(self.debug_smtp)
         host.login(self.username, self.password)
 
-        yield host
+        return host
 
-        host.quit()
+    @staticmethod
+    def _quit(host):
+        try:
+            host.quit()
+        except (smtplib.SMTPException, OSError):
+            host.close()
+
+    @contextmanager
+    def _connected_host(self):
+        host = self._connect()
+        try:
+            yield host
+        finally:
+            self._quit(host)
 
     @property
     def messages(self):
@@ -47,6 +93,117 @@ class SMTPConnection(MailConnection):
         with self._connected_host() as host:
             host.send_message(message)
 
+    def send_many(self, messages):
+        sent = 0
+        try:
+            with self._connected_host() as host:
+                for message in messages:
+                    host.send_message(message)
+                    sent += 1
+        except Exception as error:
+            raise MailBatchError(sent, error) from error
+
+
+class PooledSMTPConnection(SMTPConnection):
+    """
+    An SMTPConnection that keeps up to `pool_size` logged in connections open
+    between messages, rather than connecting and logging in for each one.
+
+    A connection that has been idle for `health_check_interval` seconds is
+    checked with a NOOP before it is reused, and replaced if the server has
+    dropped it. A connection that fails while sending is closed, and a
+    message that fails because the server disconnected is retried once on a
+    new connection. Connections opened before a worker forks are not reused
+    by the child.
+    """
+
+    def __init__(self, *args, pool_size=1, health_check_interval=30, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_size = pool_size
+        self.health_check_interval = health_check_interval
+        self._pool = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        atexit.register(self.close)
+
+    def _checkout(self, reuse=True):
+        with self._lock:
+            if self._pid != os.getpid():
+                # The parent process's sessions; leave them for it to close
+                self._pool = []
+                self._pid = os.getpid()
+            pooled = self._pool.pop() if reuse and self._pool else None
+
+        if pooled is not None:
+            host, idle_since = pooled
+            if time.monotonic() - idle_since < self.health_check_interval:
+                return host
+            if self._is_alive(host):
+                return host
+            host.close()
+
+        return self._connect()
+
+    def _checkin(self, host):
+        with self._lock:
+            if self._pid == os.getpid() and len(self._pool) < self.pool_size:
+                self._pool.append((host, time.monotonic()))
+                return
+
+        self._quit(host)
+
+    @staticmethod
+    def _is_alive(host):
+        try:
+            return host.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @contextmanager
+    def _connected_host(self, reuse=True):
+        host = self._checkout(reuse)
+        try:
+            yield host
+        except BaseException:
+            host.close()
+            raise
+
+        self._checkin(host)
+
+    def _with_host(self, send):
+        try:
+            with self._connected_host() as host:
+                send(host)
+        except smtplib.SMTPServerDisconnected:
+            # The server may close an idle connection between health checks
+            with self._connected_host(reuse=False) as host:
+                send(host)
+
+    def send(self, message):
+        self._with_host(lambda host: host.send_message(message))
+
+    def send_many(self, messages):
+        sent = 0
+
+        def send_unsent(host):
+            nonlocal sent
+            for message in messages[sent:]:
+                host.send_message(message)
+                sent += 1
+
+        try:
+            self._with_host(send_unsent)
+        except Exception as error:
+            raise MailBatchError(sent, error) from error
+
+    def close(self):
+        with self._lock:
+            pool = self._pool if self._pid == os.getpid() else []
+            self._pool = []
+
+        for host, _ in pool:
+            self._quit(host)
+
 
 class RedisConnection(MailConnection):
     def __init__(self, redis, **kwargs):
@@ -96,6 +253,31 @@ class Mailer(object):
             filename: string,
         }
         """
+        self.connection.send(
+            self._build_message_with_attachments(recipients, subject, body, attachments)
+        )
+
+    def send_many(self, messages):
+        """
+        Send several messages, each a dictionary of the arguments `send` takes,
+        over one connection where the mail connection supports it. Raises a
+        MailBatchError if a message could not be sent.
+        """
+        self.connection.send_many(
+            [
+                self._build_message_with_attachments(
+                    message["recipients"],
+                    message["subject"],
+                    message["body"],
+                    message.get("attachments", []),
+                )
+                for message in messages
+            ]
+        )
+
+    def _build_message_with_attachments(
+        self, recipients, subject, body, attachments=[]
+    ):
         message = self._build_message(recipients, subject, body)
         if attachments:
             message.make_mixed()
@@ -107,8 +289,67 @@ class Mailer(object):
                     maintype=attachment.get("maintype", "application"),
                     subtype=attachment.get("subtype", "octet-stream"),
                 )
-        self.connection.send(message)
+        return message
 
     @property
     def messages(self):
         return self.connection.messages
+
+
+class MailOutbox(object):
+    """
+    A Redis list of messages waiting to be sent by the `send_queued_mail` job,
+    which sends them `batch_size` at a time over one connection rather than
+    with a job and a connection each.
+
+    When a batch cannot be sent, its unsent messages are returned to the
+    front of the outbox. A message the server rejects is dropped once it has
+    been rejected `max_attempts` times.
+
+    `take` removes a batch from the outbox before it is sent, so the batch
+    is lost if the worker dies while sending it. Moving the batch to a
+    processing list and removing it once sent would avoid that, at the cost
+    of sending it twice if the worker dies after sending.
+    """
+
+    def __init__(self, redis, batch_size=50, max_attempts=3):
+        self.redis = redis
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+    def __len__(self):
+        return self.redis.llen(OUTBOX_KEY)
+
+    def put(self, recipients, subject, body):
+        message = {"recipients": recipients, "subject": subject, "body": body}
+        self.redis.rpush(OUTBOX_KEY, json.dumps(message))
+
+    def take(self):
+        pipeline = self.redis.pipeline()
+        pipeline.lrange(OUTBOX_KEY, 0, self.batch_size - 1)
+        pipeline.ltrim(OUTBOX_KEY, self.batch_size, -1)
+        messages, _ = pipeline.execute()
+
+        return [json.loads(message) for message in messages]
+
+    def put_back(self, messages, rejected=False):
+        """
+        Return the unsent messages of a batch, starting with the one that
+        failed, to the front of the outbox. If the server `rejected` that
+        message, it counts as an attempt, and the message is dropped and
+        returned once it has run out of attempts.
+        """
+        failed, *unsent = messages
+        dropped = None
+        if rejected:
+            failed = {**failed, "attempts": failed.get("attempts", 0) + 1}
+            if failed["attempts"] >= self.max_attempts:
+                dropped = failed
+        if dropped is None:
+            unsent.insert(0, failed)
+
+        if unsent:
+            self.redis.lpush(
+                OUTBOX_KEY, *[json.dumps(message) for message in reversed(unsent)]
+            )
+        return dropped
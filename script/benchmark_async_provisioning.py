@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Compare provisioning users and role assignments one call at a time, the way
+the per-ID Celery tasks do, with provisioning them as a batch through
+`AsyncCSPClient`.
+
+Calls go to a `MockCloudProvider` that sleeps for `--latency-ms` before each
+response to stand in for a Graph or ARM round trip, so no Azure credentials
+are needed. Users are spread evenly over `--tenants` tenants.
+
+    python script/benchmark_async_provisioning.py --users 200 --concurrency 8
+"""
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import time
+
+from flask import Flask
+
+from atat.domain.csp.cloud import MockCloudProvider
+from atat.domain.csp.cloud.async_client import AsyncCSPClient
+from atat.domain.csp.cloud.models import UserCSPPayload, UserRoleCSPPayload
+
+
+class LatentCloudProvider(MockCloudProvider):
+    def __init__(self, latency):
+        super().__init__({}, with_delay=False, with_failure=False)
+        self.latency = latency
+
+    def create_user(self, payload):
+        time.sleep(self.latency)
+        return super().create_user(payload)
+
+    def create_user_role(self, payload):
+        time.sleep(self.latency)
+        return super().create_user_role(payload)
+
+
+def make_payloads(users, tenants):
+    payloads = []
+    for i in range(users):
+        tenant_id = f"tenant-{i % tenants}"
+        user = UserCSPPayload(
+            tenant_id=tenant_id,
+            tenant_host_name="benchmark",
+            display_name=f"User {i}",
+            email=f"user{i}@example.com",
+        )
+        role = UserRoleCSPPayload(
+            tenant_id=tenant_id,
+            management_group_id=f"/providers/Microsoft.Management/managementGroups/{i}",
+            user_object_id=f"user-{i}",
+            role="owner",
+        )
+        payloads.append((user, role))
+    return payloads
+
+
+def run_sequential(csp, payloads):
+    for user, role in payloads:
+        csp.create_user(user)
+        csp.create_user_role(role)
+
+
+def run_async(csp, payloads, concurrency, workers):
+    client = AsyncCSPClient(csp, max_concurrency=concurrency, max_workers=workers)
+    client.run([client.create_user(user) for user, _ in payloads])
+    client.run([client.create_user_role(role) for _, role in payloads])
+
+
+def report(label, calls, elapsed, baseline=None):
+    speedup = f"{baseline / elapsed:>8.1f}x" if baseline else f"{'':>9}"
+    print(f"{label:<12} {calls:>6} {elapsed:>9.2f} {calls / elapsed:>10.1f} {speedup}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tenants", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    csp = LatentCloudProvider(args.latency_ms / 1000)
+    payloads = make_payloads(args.users, args.tenants)
+    calls = len(payloads) * 2
+
+    print(f"{'mode':<12} {'calls':>6} {'seconds':>9} {'calls/s':>10} {'speedup':>9}")
+    with Flask(__name__).app_context():
+        start = time.perf_counter()
+        run_sequential(csp, payloads)
+        sequential = time.perf_counter() - start
+        report("sequential", calls, sequential)
+
+        start = time.perf_counter()
+        run_async(csp, payloads, args.concurrency, args.workers)
+        report("async", calls, time.perf_counter() - start, sequential)
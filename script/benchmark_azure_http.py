@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Compare the latency of Azure API calls made with bare `requests` calls, which
+open a new TCP and TLS connection every time, with calls routed through the
+pooled, keep-alive `PooledHTTPClient` used by `AzureSDKProvider`.
+
+Requests go to a local HTTPS stub server with a throwaway self-signed
+certificate (generated with the `openssl` CLI), so no Azure credentials are
+needed. `--delay-ms` adds server-side think time to each response.
+
+    python script/benchmark_azure_http.py --requests 500 --threads 4
+"""
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import json
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from urllib3.exceptions import InsecureRequestWarning
+
+from atat.domain.csp.cloud.http_client import PooledHTTPClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment so Nagle's algorithm does not add a
+    # delayed-ACK stall to every keep-alive response.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    delay = 0
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        time.sleep(self.delay)
+        body = json.dumps({"access_token": "token", "id": "id"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+    do_PUT = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(cert_dir, delay):
+    cert = os.path.join(cert_dir, "cert.pem")
+    key = os.path.join(cert_dir, "key.pem")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-subj",
+            "/CN=localhost",
+            "-days",
+            "1",
+            "-keyout",
+            key,
+            "-out",
+            cert,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, http, url, total, threads):
+    latencies = []
+    lock = threading.Lock()
+    per_thread = total // threads
+
+    def worker():
+        timings = []
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            response = http.post(url, json={"value": "x"}, verify=False, timeout=30)
+            response.raise_for_status()
+            timings.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(timings)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p95 = latencies_ms[int(len(latencies_ms) * 0.95) - 1]
+    print(
+        f"{label:<10} {len(latencies_ms):>8} {statistics.mean(latencies_ms):>9.2f}"
+        f" {statistics.median(latencies_ms):>9.2f} {p95:>9.2f}"
+        f" {len(latencies_ms) / elapsed:>10.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", InsecureRequestWarning)
+
+    with tempfile.TemporaryDirectory() as cert_dir:
+        server = start_stub_server(cert_dir, args.delay_ms / 1000)
+        url = f"https://127.0.0.1:{server.server_address[1]}/v1.0/users"
+        pooled = PooledHTTPClient(pool_size=args.threads, max_retries=0)
+
+        print(f"{'client':<10} {'requests':>8} {'mean ms':>9} {'p50 ms':>9}", end="")
+        print(f" {'p95 ms':>9} {'req/sec':>10}")
+        try:
+            run("requests", requests, url, args.requests, args.threads)
+            run("pooled", pooled, url, args.requests, args.threads)
+        finally:
+            pooled.close()
+            server.shutdown()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+"""
+Compare the throughput of the SKIP LOCKED batch claiming used by the
+`process_pending_*` tasks with the per-row `claim_for_update` path, using 1,
+4 and 16 concurrent workers against the configured Postgres database.
+
+Each worker simulates provisioning by sleeping for `--work-ms` per row. The
+seeded environment roles are soft-deleted when the benchmark finishes so they
+are never picked up as real pending work.
+
+    python script/benchmark_claiming.py --rows 1000 --batch-size 50
+"""
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import queue
+import random
+import threading
+import time
+
+from atat.app import make_app
+from atat.database import db
+from atat.domain.environment_roles import EnvironmentRoles
+from atat.domain.exceptions import ClaimFailedException
+from atat.models import (
+    ApplicationRoleStatus,
+    CSPRole,
+    Environment,
+    EnvironmentRole,
+)
+from atat.models.utils import claim_for_update, release_claims
+from atat.utils.config import make_config
+from tests.factories import ApplicationFactory, ApplicationRoleFactory, UserFactory
+
+WORKER_COUNTS = [1, 4, 16]
+
+
+def seed(rows):
+    application = ApplicationFactory.build(cloud_id="benchmark")
+    app_role = ApplicationRoleFactory.build(
+        application=application,
+        user=UserFactory.build(dod_id=f"{random.randrange(10 ** 10):010d}"),
+        status=ApplicationRoleStatus.ACTIVE,
+        cloud_id="benchmark",
+    )
+    env_roles = []
+    for i in range(rows):
+        environment = Environment(
+            application=application,
+            name=f"benchmark-{i}",
+            cloud_id="benchmark",
+            creator=app_role.user,
+        )
+        env_roles.append(
+            EnvironmentRole(
+                environment=environment,
+                application_role=app_role,
+                role=CSPRole.CONTRIBUTOR,
+            )
+        )
+    db.session.add_all(env_roles)
+    db.session.commit()
+    return [env_role.id for env_role in env_roles]
+
+
+def reset(ids):
+    db.session.query(EnvironmentRole).filter(EnvironmentRole.id.in_(ids)).update(
+        {"cloud_id": None, "claimed_until": None}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+def soft_delete(ids):
+    db.session.query(EnvironmentRole).filter(EnvironmentRole.id.in_(ids)).update(
+        {"deleted": True, "claimed_until": None}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+def batch_worker(app, batch_size, work_seconds, stats):
+    with app.app_context():
+        while True:
+            env_roles = EnvironmentRoles.claim_pending_creation(batch_size)
+            if not env_roles:
+                break
+            with release_claims(env_roles):
+                for env_role in env_roles:
+                    time.sleep(work_seconds)
+                    env_role.cloud_id = "benchmark"
+                db.session.commit()
+            with stats["lock"]:
+                stats["processed"] += len(env_roles)
+        db.session.remove()
+
+
+def per_row_worker(app, ids, work_seconds, stats):
+    with app.app_context():
+        while True:
+            try:
+                id_ = ids.get_nowait()
+            except queue.Empty:
+                break
+            env_role = EnvironmentRoles.get_by_id(id_)
+            try:
+                with claim_for_update(env_role) as env_role:
+                    # Like `do_create_environment_role`, skip rows that a
+                    # duplicate message has already provisioned.
+                    if env_role.cloud_id is not None:
+                        continue
+                    time.sleep(work_seconds)
+                    env_role.cloud_id = "benchmark"
+                    db.session.commit()
+                with stats["lock"]:
+                    stats["processed"] += 1
+            except ClaimFailedException:
+                with stats["lock"]:
+                    stats["collisions"] += 1
+        db.session.remove()
+
+
+def run(app, mode, workers, ids, batch_size, work_seconds):
+    reset(ids)
+    stats = {"processed": 0, "collisions": 0, "lock": threading.Lock()}
+
+    if mode == "skip-locked":
+        targets = [(batch_worker, (app, batch_size, work_seconds, stats))] * workers
+    else:
+        # Mimic the broker: one message per row, plus a duplicate for every row
+        # as happens when a beat tick fires before the first task finishes.
+        messages = queue.Queue()
+        for id_ in ids + ids:
+            messages.put(id_)
+        targets = [(per_row_worker, (app, messages, work_seconds, stats))] * workers
+
+    threads = [threading.Thread(target=fn, args=args) for fn, args in targets]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{mode:<12} {workers:>7} {stats['processed']:>9} {elapsed:>9.2f}"
+        f" {stats['processed'] / elapsed:>10.1f} {stats['collisions']:>10}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--work-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    config = make_config({"default": {"DEBUG": False}})
+    config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_size"] = max(WORKER_COUNTS) + 2
+    app = make_app(config)
+
+    with app.app_context():
+        ids = seed(args.rows)
+        print(f"{'mode':<12} {'workers':>7} {'processed':>9} {'seconds':>9}", end="")
+        print(f" {'rows/sec':>10} {'collisions':>10}")
+        try:
+            for mode in ["per-row", "skip-locked"]:
+                for workers in WORKER_COUNTS:
+                    run(app, mode, workers, ids, args.batch_size, args.work_ms / 1000)
+        finally:
+            soft_delete(ids)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Compare the latency of rendering the most icon-heavy pages -- application
+settings, portfolio admin and the activity log -- when the `iconSvg` filter
+reads each icon from disk, as it used to, and when it is served from the
+preloaded icon registry.
+
+Requests are made with Flask's test client against the configured Postgres
+and Redis. The portfolio, application and members used by the benchmark are
+created in a transaction that is rolled back when it finishes.
+
+    python script/benchmark_icon_rendering.py --requests 50
+"""
+
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import statistics
+import time
+
+from atat.app import make_app
+from atat.database import db
+from atat.models import CSPRole
+from atat.utils.config import make_config
+from tests import factories
+from tests.factories import (
+    ApplicationFactory,
+    EnvironmentFactory,
+    PortfolioFactory,
+    UserFactory,
+)
+
+MEMBER_COUNT = 10
+
+
+def icon_from_disk(name):
+    with open("static/icons/" + name + ".svg") as contents:
+        return contents.read()
+
+
+def use_session(session):
+    for cls in factories.__dict__.values():
+        if isinstance(cls, type) and cls.__module__ == "tests.factories":
+            cls._meta.sqlalchemy_session = session
+            cls._meta.sqlalchemy_session_persistence = "commit"
+
+
+def seed():
+    user = UserFactory.create_ccpo()
+    portfolio = PortfolioFactory.create(
+        owner=user,
+        members=[{"role_name": "member"} for _ in range(MEMBER_COUNT)],
+    )
+    application = ApplicationFactory.create(portfolio=portfolio)
+    for _ in range(3):
+        EnvironmentFactory.create(
+            application=application,
+            members=[{"role_name": CSPRole.ADMIN} for _ in range(MEMBER_COUNT)],
+        )
+
+    return user.id, {
+        "application settings": f"/applications/{application.id}/settings",
+        "portfolio admin": f"/portfolios/{portfolio.id}/admin",
+        "activity log": "/activity-history",
+    }
+
+
+def time_requests(client, url, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    return timings
+
+
+def run(app, user_id, pages, requests):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["last_login"] = None
+
+    results = {}
+    for page, url in pages.items():
+        for mode, icon_svg in [("disk", icon_from_disk), ("registry", app.icons.get)]:
+            app.jinja_env.filters["iconSvg"] = icon_svg
+            time_requests(client, url, 1)
+            results[(page, mode)] = time_requests(client, url, requests)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    config = make_config(
+        {
+            "default": {
+                "DEBUG": False,
+                "LIMIT_CONCURRENT_SESSIONS": False,
+                "USE_AUDIT_LOG": True,
+            }
+        }
+    )
+    app = make_app(config)
+
+    with app.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        db.session = db.create_scoped_session(options=dict(bind=connection, binds={}))
+        use_session(db.session)
+        try:
+            user_id, pages = seed()
+            results = run(app, user_id, pages, args.requests)
+        finally:
+            transaction.rollback()
+            connection.close()
+
+    print(f"{'page':<21} {'mode':<9} {'mean ms':>9} {'p95 ms':>9} {'speedup':>8}")
+    for page in pages:
+        disk = statistics.mean(results[(page, "disk")])
+        for mode in ("disk", "registry"):
+            timings = results[(page, mode)]
+            mean = statistics.mean(timings)
+            p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+            speedup = f"{disk / mean:>7.1f}x" if mode == "registry" else ""
+            print(f"{page:<21} {mode:<9} {mean:>9.2f} {p95:>9.2f} {speedup:>8}")
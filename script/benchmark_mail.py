@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Compare the throughput of sending email with a new SMTP connection for each
+message, with a pooled connection, and in batches over a pooled connection,
+against a local aiosmtpd server standing in for the SMTP relay.
+
+The server requires STARTTLS and a login, like the relay, using a throwaway
+self-signed certificate made with openssl. aiosmtpd is not a dependency of
+ATAT, so install it first:
+
+    pip install aiosmtpd
+    python script/benchmark_mail.py --messages 200 --batch-size 50
+"""
+
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import logging
+import socket
+import ssl
+import subprocess
+import tempfile
+import time
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from atat.utils import chunks
+from atat.utils.mailer import Mailer, PooledSMTPConnection, SMTPConnection
+
+
+class CountingHandler(object):
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def accept_any_login(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def make_tls_context(directory):
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-keyout",
+            key,
+            "-out",
+            cert,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_mailer(connection_class, port):
+    connection = connection_class(
+        "127.0.0.1", port, "atat@example.com", "password", use_tls=True
+    )
+    return Mailer(connection, "atat@example.com")
+
+
+def messages(count):
+    return [
+        {
+            "recipients": [f"member-{i}@example.com"],
+            "subject": "ATAT notification",
+            "body": "You have been invited to a portfolio.\n" * 20,
+        }
+        for i in range(count)
+    ]
+
+
+def send_each(mailer, to_send, batch_size):
+    for message in to_send:
+        mailer.send(**message)
+
+
+def send_batches(mailer, to_send, batch_size):
+    for batch in chunks(to_send, batch_size):
+        mailer.send_many(batch)
+
+
+MODES = {
+    "per message": (SMTPConnection, send_each),
+    "pooled": (PooledSMTPConnection, send_each),
+    "pooled, batched": (PooledSMTPConnection, send_batches),
+}
+
+
+def main(count, batch_size):
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+    handler = CountingHandler()
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        controller = Controller(
+            handler,
+            hostname="127.0.0.1",
+            port=port,
+            tls_context=make_tls_context(directory),
+            require_starttls=True,
+            authenticator=accept_any_login,
+        )
+        controller.start()
+
+    try:
+        print(f"{'mode':<16} {'seconds':>8} {'msg/s':>8} {'speedup':>8}")
+        baseline = None
+        for mode, (connection_class, send) in MODES.items():
+            mailer = make_mailer(connection_class, port)
+            received = handler.received
+            start = time.perf_counter()
+            send(mailer, messages(count), batch_size)
+            elapsed = time.perf_counter() - start
+            if connection_class is PooledSMTPConnection:
+                mailer.connection.close()
+
+            assert handler.received - received == count
+            baseline = baseline or elapsed
+            print(
+                f"{mode:<16} {elapsed:>8.2f} {count / elapsed:>8.0f} "
+                f"{baseline / elapsed:>7.1f}x"
+            )
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+    main(args.messages, args.batch_size)
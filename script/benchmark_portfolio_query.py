@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+"""
+Compare query plans and execution times for the portfolios visible to a user,
+using the original nested IN query and the UNION of EXISTS lookups in
+`PortfoliosQuery.for_user_query`, with and without the (user_id, status) role
+indexes.
+
+Users, portfolios, applications and roles are seeded into the configured
+Postgres in a single transaction, which is rolled back when the benchmark
+finishes, so nothing is left behind.
+
+    python script/benchmark_portfolio_query.py --portfolios 5000 --plans
+"""
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import random
+import re
+import statistics
+import uuid
+
+from sqlalchemy import or_, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from atat.app import make_app
+from atat.database import db
+from atat.domain.portfolios.query import PortfoliosQuery
+from atat.models import (
+    Application,
+    ApplicationRole,
+    ApplicationRoleStatus,
+    Portfolio,
+    PortfolioRole,
+    PortfolioRoleStatus,
+    User,
+)
+from atat.utils.config import make_config
+
+ROLE_INDEXES = [
+    ("portfolio_role_user_status", "portfolio_roles"),
+    ("application_role_user_status", "application_roles"),
+]
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (ANALYZE, BUFFERS) " + compiler.process(element.statement, **kw)
+
+
+def legacy_query(user):
+    """The query `PortfoliosQuery.get_for_user` used before it was rewritten."""
+    return (
+        db.session.query(Portfolio)
+        .filter(
+            or_(
+                Portfolio.id.in_(
+                    db.session.query(Portfolio.id)
+                    .join(Application)
+                    .filter(Portfolio.id == Application.portfolio_id)
+                    .filter(
+                        Application.id.in_(
+                            db.session.query(Application.id)
+                            .join(ApplicationRole)
+                            .filter(ApplicationRole.application_id == Application.id)
+                            .filter(ApplicationRole.user_id == user.id)
+                            .filter(
+                                ApplicationRole.status == ApplicationRoleStatus.ACTIVE
+                            )
+                            .filter(ApplicationRole.deleted == False)
+                            .subquery()
+                        )
+                    )
+                ),
+                Portfolio.id.in_(
+                    db.session.query(Portfolio.id)
+                    .join(PortfolioRole)
+                    .filter(PortfolioRole.user == user)
+                    .filter(PortfolioRole.status == PortfolioRoleStatus.ACTIVE)
+                    .subquery()
+                ),
+            )
+        )
+        .filter(Portfolio.deleted == False)
+        .order_by(Portfolio.name.asc())
+    )
+
+
+def insert(connection, model, rows):
+    for start in range(0, len(rows), 5000):
+        connection.execute(model.__table__.insert(), rows[start : start + 5000])
+
+
+def seed(connection, user_count, portfolio_count, members):
+    """Seeds portfolios with three applications each, and gives each
+    portfolio and application `members` roles held by random users, a
+    mixture of active, pending and disabled. Returns the ID of the user with
+    the most roles.
+    """
+    users = [
+        {"id": uuid.uuid4(), "dod_id": f"{random.randrange(10 ** 10):010d}"}
+        for _ in range(user_count)
+    ]
+    portfolios = [
+        {
+            "id": uuid.uuid4(),
+            "name": f"Benchmark {i:06d}",
+            "defense_component": ["army"],
+            "deleted": random.random() < 0.05,
+        }
+        for i in range(portfolio_count)
+    ]
+    applications = [
+        {"id": uuid.uuid4(), "name": f"Application {i}", "portfolio_id": p["id"]}
+        for p in portfolios
+        for i in range(3)
+    ]
+
+    portfolio_statuses = list(PortfolioRoleStatus)
+    application_statuses = list(ApplicationRoleStatus)
+    portfolio_roles = [
+        {
+            "id": uuid.uuid4(),
+            "portfolio_id": p["id"],
+            "user_id": user["id"],
+            "status": random.choice(portfolio_statuses),
+        }
+        for p in portfolios
+        for user in random.sample(users, members)
+    ]
+    application_roles = [
+        {
+            "id": uuid.uuid4(),
+            "application_id": a["id"],
+            "user_id": user["id"],
+            "status": random.choice(application_statuses),
+            "deleted": random.random() < 0.1,
+        }
+        for a in applications
+        for user in random.sample(users, members)
+    ]
+
+    insert(connection, User, users)
+    insert(connection, Portfolio, portfolios)
+    insert(connection, Application, applications)
+    insert(connection, PortfolioRole, portfolio_roles)
+    insert(connection, ApplicationRole, application_roles)
+    for table in ["users", "portfolios", "applications"] + [
+        table for _, table in ROLE_INDEXES
+    ]:
+        connection.execute(text(f"ANALYZE {table}"))
+
+    role_counts = statistics.multimode(
+        [role["user_id"] for role in portfolio_roles + application_roles]
+    )
+    return role_counts[0]
+
+
+def explain(connection, query, runs):
+    timings = []
+    for _ in range(runs):
+        plan = [row[0] for row in connection.execute(Explain(query.statement))]
+        match = re.search(r"Execution Time: ([\d.]+) ms", plan[-1])
+        timings.append(float(match.group(1)))
+    return statistics.median(timings), "\n".join(plan)
+
+
+def benchmark(connection, user, runs):
+    queries = [
+        ("legacy", legacy_query(user)),
+        ("union", PortfoliosQuery.for_user_query(user)),
+    ]
+    assert {p.id for p in queries[0][1]} == {p.id for p in queries[1][1]}
+
+    results = []
+    for indexes in ["with", "without"]:
+        savepoint = connection.begin_nested()
+        try:
+            if indexes == "without":
+                for name, _ in ROLE_INDEXES:
+                    connection.execute(text(f"DROP INDEX {name}"))
+            for name, query in queries:
+                results.append((name, indexes, *explain(connection, query, runs)))
+        finally:
+            savepoint.rollback()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--portfolios", type=int, default=5000)
+    parser.add_argument(
+        "--members", type=int, default=5, help="roles per portfolio and application"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--plans", action="store_true", help="print the EXPLAIN ANALYZE output"
+    )
+    args = parser.parse_args()
+
+    app = make_app(make_config({"default": {"DEBUG": False}}))
+    with app.app_context():
+        connection = db.session.connection()
+        try:
+            user_id = seed(connection, args.users, args.portfolios, args.members)
+            user = db.session.query(User).get(user_id)
+            results = benchmark(connection, user, args.runs)
+        finally:
+            db.session.rollback()
+
+    print(f"{'query':<8} {'indexes':<8} {'median ms':>10}")
+    for name, indexes, median, plan in results:
+        print(f"{name:<8} {indexes:<8} {median:>10.3f}")
+    if args.plans:
+        for name, indexes, median, plan in results:
+            print(f"\n-- {name}, {indexes} role indexes\n{plan}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Compare the latency of rendering the home page, whose sidebar lists the
+user's portfolios, with and without the Redis portfolio summary cache, for
+users who can see 1, 50 and 500 portfolios.
+
+Requests are made with Flask's test client against the configured Postgres
+and Redis. The seeded users and portfolios are deleted when the benchmark
+finishes, since soft-deleted portfolios would still be listed for CCPO users.
+
+    python script/benchmark_sidebar_portfolios.py --requests 50
+"""
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import random
+import statistics
+import time
+
+from atat.app import make_app
+from atat.database import db
+from atat.models import Portfolio, PortfolioRole, PortfolioRoleStatus, User
+from atat.utils.config import make_config
+from tests.factories import UserFactory
+
+PORTFOLIO_COUNTS = [1, 50, 500]
+
+
+def seed(portfolio_count):
+    user = UserFactory.build(dod_id=f"{random.randrange(10 ** 10):010d}")
+    roles = [
+        PortfolioRole(
+            user=user,
+            portfolio=Portfolio(name=f"Benchmark {i:04d}", defense_component=["army"]),
+            status=PortfolioRoleStatus.ACTIVE,
+        )
+        for i in range(portfolio_count)
+    ]
+    db.session.add_all(roles)
+    db.session.commit()
+    return user.id, [role.portfolio_id for role in roles]
+
+
+def delete(user_id, portfolio_ids):
+    db.session.query(PortfolioRole).filter(
+        PortfolioRole.portfolio_id.in_(portfolio_ids)
+    ).delete(synchronize_session=False)
+    db.session.query(Portfolio).filter(Portfolio.id.in_(portfolio_ids)).delete(
+        synchronize_session=False
+    )
+    db.session.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def time_requests(client, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get("/home")
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+    return timings
+
+
+def run(app, user_id, requests):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["last_login"] = None
+
+    results = {}
+    for mode, ttl in [("uncached", 0), ("cached", 300)]:
+        app.portfolio_summaries.ttl = ttl
+        time_requests(client, 1)
+        results[mode] = time_requests(client, requests)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    config = make_config(
+        {"default": {"DEBUG": False, "LIMIT_CONCURRENT_SESSIONS": False}}
+    )
+    app = make_app(config)
+
+    print(f"{'portfolios':>10} {'mode':<9} {'mean ms':>9} {'p95 ms':>9} {'speedup':>8}")
+    with app.app_context():
+        for count in PORTFOLIO_COUNTS:
+            user_id, portfolio_ids = seed(count)
+            try:
+                results = run(app, user_id, args.requests)
+            finally:
+                delete(user_id, portfolio_ids)
+
+            uncached = statistics.mean(results["uncached"])
+            for mode, timings in results.items():
+                mean = statistics.mean(timings)
+                p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+                speedup = f"{uncached / mean:>7.1f}x" if mode == "cached" else ""
+                print(f"{count:>10} {mode:<9} {mean:>9.2f} {p95:>9.2f} {speedup:>8}")
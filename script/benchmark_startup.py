@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Compare how long it takes to start the web app with eager and lazy CSP
+initialisation, and to start a Celery worker's app, by building each one in
+a fresh interpreter run with `python -X importtime`.
+
+For each mode the benchmark reports the wall time to build the app, the
+number of modules imported, the time spent importing them and the packages
+that took the longest to import. Building an app does not connect to
+Postgres or Redis, so neither needs to be running.
+
+    python script/benchmark_startup.py --runs 5 --csp azure
+"""
+
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import re
+import statistics
+import subprocess
+from collections import defaultdict
+
+MODES = {
+    "web": ("make_app", "false"),
+    "web, lazy": ("make_app", "true"),
+    "worker, lazy": ("make_worker_app", "true"),
+}
+
+STARTUP = """
+import time
+start = time.perf_counter()
+from atat.app import {factory}
+from atat.utils.config import make_config
+{factory}(make_config())
+print((time.perf_counter() - start) * 1000)
+"""
+
+# import time: self [us] | cumulative | imported package
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def start(factory, lazy, csp):
+    env = {**os.environ, "CSP_LAZY_INIT": lazy}
+    if csp:
+        env["CSP"] = csp
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP.format(factory=factory)],
+        cwd=parent_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    packages = defaultdict(int)
+    modules = 0
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match is None:
+            continue
+        self_us, _, _, name = match.groups()
+        modules += 1
+        packages[name.split(".")[0]] += int(self_us)
+
+    return float(result.stdout.splitlines()[-1]), modules, packages
+
+
+def main(runs, csp, top):
+    print(f"{'mode':<14} {'wall ms':>9} {'modules':>8} {'import ms':>10}  slowest")
+    for mode, (factory, lazy) in MODES.items():
+        timings = []
+        for _ in range(runs):
+            elapsed, modules, packages = start(factory, lazy, csp)
+            timings.append(elapsed)
+
+        import_ms = sum(packages.values()) / 1000
+        slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        slowest = ", ".join(f"{name} {us / 1000:.0f}" for name, us in slowest[:top])
+        print(
+            f"{mode:<14} {statistics.median(timings):>9.1f} {modules:>8} "
+            f"{import_ms:>10.1f}  {slowest}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--csp", help="the CSP mode to start in, as in CSP")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+    main(args.runs, args.csp, args.top)
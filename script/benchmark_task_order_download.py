@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Compare the peak memory and time of reading a task order PDF whole, as
+`download_task_order` does, with streaming it in chunks, as the task order
+download route does, for files of 1, 25 and 100 MB.
+
+Files are written to a temporary directory and served by the mock file
+service, so no storage account is needed.
+
+    python script/benchmark_task_order_download.py --chunk-size 1048576
+"""
+
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from atat.domain.csp.files import MockFileService
+
+FILE_SIZES_MB = [1, 25, 100]
+
+
+def measure(read):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = read()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def read_whole(files, object_name):
+    return len(files.download_task_order(object_name)["content"])
+
+
+def read_streamed(files, object_name):
+    return sum(len(chunk) for chunk in files.stream(object_name))
+
+
+def main(chunk_size):
+    with tempfile.TemporaryDirectory() as storage_path:
+        files = MockFileService(
+            {
+                "MOCK_FILE_STORAGE_PATH": storage_path,
+                "FILE_DOWNLOAD_CHUNK_SIZE": chunk_size,
+            }
+        )
+
+        print(f"{'size':>8} {'mode':>8} {'time (ms)':>10} {'peak (MB)':>10}")
+        for size_mb in FILE_SIZES_MB:
+            object_name = f"benchmark-{size_mb}"
+            with open(os.path.join(storage_path, object_name), "wb") as file_:
+                file_.write(os.urandom(size_mb * 1024 * 1024))
+
+            for mode, read in (("whole", read_whole), ("streamed", read_streamed)):
+                size, elapsed, peak = measure(lambda: read(files, object_name))
+                assert size == size_mb * 1024 * 1024
+                print(
+                    f"{size_mb:>6}MB {mode:>8} {elapsed * 1000:>10.1f} "
+                    f"{peak / 1024 / 1024:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunk-size", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+    main(args.chunk_size)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Summarise how long each portfolio provisioning stage takes, and how often it
+is reset or fails, from the runs recorded in `portfolio_stage_runs`.
+
+    python script/portfolio_stage_timings.py --days 30 --percentiles 50,90,99
+    python script/portfolio_stage_timings.py --format prometheus > stages.prom
+"""
+# Add root application dir to the python path
+import os
+import sys
+
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+import argparse
+
+import pendulum
+
+from atat.app import make_app
+from atat.domain.portfolios.stage_runs import PortfolioStageRuns, prometheus_metrics
+from atat.utils.config import make_config
+
+
+def print_table(timings, quantiles):
+    headers = [f"p{quantile * 100:g}" for quantile in quantiles]
+    print(
+        f"{'stage':<40} {'runs':>6} {'reset':>6} {'failed':>6} {'max try':>7}",
+        *[f"{header + ' s':>9}" for header in headers],
+    )
+    for timing in timings:
+        print(
+            f"{timing.stage:<40} {timing.runs:>6} {timing.reset:>6}"
+            f" {timing.failed:>6} {timing.max_attempt:>7}",
+            *[f"{timing.percentiles_ms[q] / 1000:>9.2f}" for q in quantiles],
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--days", type=int, help="only include runs from the last DAYS days"
+    )
+    parser.add_argument("--percentiles", default="50,90,99")
+    parser.add_argument("--format", choices=["table", "prometheus"], default="table")
+    args = parser.parse_args()
+
+    quantiles = tuple(float(p) / 100 for p in args.percentiles.split(","))
+    since = pendulum.now(tz="UTC").subtract(days=args.days) if args.days else None
+
+    app = make_app(make_config({"default": {"DEBUG": False}}))
+    with app.app_context():
+        timings = PortfolioStageRuns.timings(since=since, quantiles=quantiles)
+
+    if args.format == "prometheus":
+        sys.stdout.write(prometheus_metrics(timings))
+    else:
+        print_table(timings, quantiles)
@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import Counter
+from unittest.mock import Mock
+
+from flask import current_app
+
+from atat.domain.csp.cloud.async_client import AsyncCSPClient
+from atat.domain.csp.cloud.exceptions import UserProvisioningException
+from atat.domain.csp.cloud.models import UserCSPPayload, UserCSPResult
+
+
+def make_payload(tenant_id, name):
+    return UserCSPPayload(
+        tenant_id=tenant_id,
+        tenant_host_name="host",
+        display_name=name,
+        email=f"{name}@example.com",
+    )
+
+
+class SlowCSP:
+    def __init__(self):
+        self.in_flight = Counter()
+        self.peak = Counter()
+        self.lock = threading.Lock()
+
+    def create_user(self, payload):
+        assert current_app
+        with self.lock:
+            self.in_flight[payload.tenant_id] += 1
+            self.peak[payload.tenant_id] = max(
+                self.peak[payload.tenant_id], self.in_flight[payload.tenant_id]
+            )
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight[payload.tenant_id] -= 1
+        return UserCSPResult(id=payload.display_name)
+
+
+def test_bounds_concurrency_per_tenant(app):
+    csp = SlowCSP()
+    client = AsyncCSPClient(csp, max_concurrency=2)
+    payloads = [
+        make_payload(tenant, f"{tenant}-{i}") for tenant in "ab" for i in range(6)
+    ]
+
+    results = client.run([client.create_user(payload) for payload in payloads])
+
+    assert [result.id for result in results] == [p.display_name for p in payloads]
+    assert csp.peak == {"a": 2, "b": 2}
+
+
+def test_returns_exceptions_in_place(app):
+    error = UserProvisioningException("nope")
+    csp = Mock(create_user=Mock(side_effect=[UserCSPResult(id="1"), error]))
+    client = AsyncCSPClient(csp)
+
+    results = client.run(
+        [client.create_user(make_payload("a", name)) for name in ("one", "two")]
+    )
+
+    assert results[0].id == "1"
+    assert results[1] is error
+
+
+def test_role_and_disable_calls(app):
+    csp = Mock()
+    client = AsyncCSPClient(csp)
+
+    client.run([client.disable_user("tenant", "assignment")])
+
+    csp.disable_user.assert_called_once_with("tenant", "assignment")
+    assert client.run([]) == []
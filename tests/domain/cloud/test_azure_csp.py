@@ -15,6 +15,7 @@ from atat.domain.csp.cloud.exceptions import (
     ConnectionException,
     DomainNameException,
     ResourceProvisioningError,
+    ThrottlingException,
     UnknownServerException,
     UserProvisioningException,
 )
@@ -40,6 +41,8 @@ from atat.domain.csp.cloud.models import (
     InitialMgmtGroupVerificationCSPPayload,
     InitialMgmtGroupVerificationCSPResult,
     KeyVaultCredentials,
+    ManagementGroupOperationCSPPayload,
+    ManagementGroupOperationCSPResult,
     PoliciesCSPPayload,
     PoliciesCSPResult,
     PrincipalAdminRoleCSPPayload,
@@ -77,6 +80,7 @@ from atat.domain.csp.cloud.models import (
 from tests.factories import ApplicationFactory, EnvironmentFactory
 from tests.mock_azure import (  # pylint: disable=W0611
     AZURE_CONFIG,
+    KEYVAULT_SECRET,
     MOCK_ACCESS_TOKEN,
     mock_azure,
 )
@@ -165,6 +169,20 @@ class TestLogAndRaiseExceptions:
             some_func(mock_azure)
         assert mock_logger.messages[0] == "500 error calling some_func"
 
+    def test_raises_throttling_exception_for_429(self, mock_azure: AzureCloudProvider):
+        @log_and_raise_exceptions
+        def some_func(mock_azure):
+            raise mock_azure.sdk.requests.exceptions.HTTPError(
+                "429 Too Many Requests",
+                response=mock_requests_response(
+                    status=429, headers={"Retry-After": "90"}
+                ),
+            )
+
+        with pytest.raises(ThrottlingException) as excinfo:
+            some_func(mock_azure)
+        assert excinfo.value.retry_after == 90
+
 
 def test_create_environment_succeeds(mock_azure: AzureCloudProvider, monkeypatch):
     monkeypatch.setattr(
@@ -1325,6 +1343,49 @@ def test_create_user(mock_azure: AzureCloudProvider, mock_http_error_response):
     assert result.id == "id"
 
 
+class TestCreateUsers:
+    def make_payload(self, tenant_id, name):
+        return UserCSPPayload(
+            tenant_id=tenant_id,
+            display_name=name,
+            tenant_host_name="testtenant",
+            email=f"{name}@testerson.test",
+        )
+
+    def batch_response(self, url, headers=None, json=None, timeout=None):
+        responses = []
+        for request in json["requests"]:
+            email = request["body"]["invitedUserEmailAddress"]
+            if email.startswith("fail"):
+                body = {"error": {"code": "Request_BadRequest", "message": "no"}}
+                responses.append({"id": request["id"], "status": 400, "body": body})
+            else:
+                body = {"invitedUser": {"id": email}}
+                responses.append({"id": request["id"], "status": 201, "body": body})
+        return mock_requests_response(json_data={"responses": responses})
+
+    def test_batches_invitations_per_tenant(self, mock_azure: AzureCloudProvider):
+        mock_azure.sdk.requests.post.side_effect = self.batch_response
+        payloads = [self.make_payload("a", f"user{i}") for i in range(25)]
+        payloads.insert(3, self.make_payload("b", "fail"))
+
+        results = mock_azure.create_users(payloads)
+
+        assert mock_azure.sdk.requests.post.call_count == 3
+        assert mock_azure.sdk.requests.post.call_args.args[0].endswith("v1.0/$batch")
+        assert results[0].id == "user0@testerson.test"
+        assert isinstance(results[3], UserProvisioningException)
+        assert results[-1].id == "user24@testerson.test"
+
+    def test_raises_when_the_batch_fails(
+        self, mock_azure: AzureCloudProvider, mock_http_error_response
+    ):
+        mock_azure.sdk.requests.post.return_value = mock_http_error_response
+
+        with pytest.raises(UnknownServerException):
+            mock_azure.create_users([self.make_payload("a", "user")])
+
+
 def test_create_user_role(mock_azure: AzureCloudProvider):
 
     mock_result_create = mock_requests_response(json_data={"id": "id"})
@@ -1399,6 +1460,62 @@ def test_create_billing_owner(monkeypatch, mock_azure: AzureCloudProvider):
     assert result.billing_owner_id == final_result
 
 
+class TestCreateBillingOwnerWithGraphBatching:
+    @pytest.fixture
+    def payload(self):
+        return BillingOwnerCSPPayload(
+            tenant_id=uuid4().hex,
+            domain_name="rebelalliance",
+            password_recovery_email_address="many@bothans.org",
+        )
+
+    @pytest.fixture(autouse=True)
+    def graph_batching(self, mock_azure):
+        mock_azure.graph_batching = True
+        mock_azure.sdk.requests.get.side_effect = [
+            mock_requests_response(status=404),
+            mock_requests_response(
+                json_data={
+                    "value": [{"displayName": "Billing Administrator", "id": "4567"}]
+                }
+            ),
+        ]
+
+    def test_creates_user_and_email_in_one_request(self, mock_azure, payload):
+        mock_azure.sdk.requests.post.side_effect = [
+            mock_requests_response(
+                json_data={
+                    "responses": [
+                        {"id": "1", "status": 201, "body": {"id": "1-2-3"}},
+                        {"id": "2", "status": 204},
+                    ]
+                }
+            ),
+            mock_requests_response(),
+        ]
+
+        result = mock_azure.create_billing_owner(payload)
+
+        assert result.billing_owner_id == "1-2-3"
+        batch = mock_azure.sdk.requests.post.call_args_list[0].kwargs["json"]
+        assert batch["requests"][1]["dependsOn"] == ["1"]
+        assert batch["requests"][1]["body"] == {"otherMails": ["many@bothans.org"]}
+        mock_azure.sdk.requests.patch.assert_not_called()
+
+    def test_maps_failed_items_to_provisioning_errors(self, mock_azure, payload):
+        mock_azure.sdk.requests.post.return_value = mock_requests_response(
+            json_data={
+                "responses": [
+                    {"id": "1", "status": 400, "body": {"error": {"code": "bad"}}},
+                    {"id": "2", "status": 424},
+                ]
+            }
+        )
+
+        with pytest.raises(UserProvisioningException, match="status 400: bad"):
+            mock_azure.create_billing_owner(payload)
+
+
 def test_create_billing_owner_uses_existing_resources(mock_azure: AzureCloudProvider):
     # mock POST so that it returns a message for an already existing role assignment
     mock_azure.sdk.requests.post.return_value = mock_requests_response(
@@ -1450,6 +1567,51 @@ def test_update_tenant_creds(mock_azure: AzureCloudProvider, monkeypatch):
     assert updated_secret == KeyVaultCredentials(**{**existing_secrets, **new_secrets})
 
 
+class TestCredentialCaching:
+    def test_tenant_creds_are_cached(self, mock_azure):
+        assert mock_azure._source_tenant_creds("mock_tenant_id") == (
+            mock_azure._source_tenant_creds("mock_tenant_id")
+        )
+        assert mock_azure.get_secret.call_count == 1
+
+    def test_update_tenant_creds_reads_fresh_creds_and_invalidates(self, mock_azure):
+        mock_azure._source_tenant_creds("mock_tenant_id")
+        mock_azure.update_tenant_creds(
+            "mock_tenant_id", KeyVaultCredentials(**KEYVAULT_SECRET)
+        )
+        mock_azure._source_tenant_creds("mock_tenant_id")
+        assert mock_azure.get_secret.call_count == 3
+
+    def test_tenant_principal_token_rereads_creds_without_principal(
+        self, mock_azure, monkeypatch
+    ):
+        admin_secrets = {
+            key: value
+            for key, value in KEYVAULT_SECRET.items()
+            if not key.startswith("tenant_sp")
+        }
+        monkeypatch.setattr(
+            mock_azure,
+            "get_secret",
+            Mock(side_effect=[json.dumps(admin_secrets), json.dumps(KEYVAULT_SECRET)]),
+        )
+        mock_azure._source_tenant_creds("mock_tenant_id")
+
+        assert mock_azure._get_tenant_principal_token("mock_tenant_id") == (
+            MOCK_ACCESS_TOKEN
+        )
+        assert mock_azure.get_secret.call_count == 2
+
+    def test_keyvault_token_is_cached(self, mock_azure):
+        mock_azure.sdk.requests.get.return_value = mock_requests_response(
+            json_data={"access_token": "kv_token", "expires_in": "3599"}
+        )
+
+        assert AzureCloudProvider._get_keyvault_token(mock_azure) == "kv_token"
+        assert AzureCloudProvider._get_keyvault_token(mock_azure) == "kv_token"
+        assert mock_azure.sdk.requests.get.call_count == 1
+
+
 def test_get_calculator_url(mock_azure: AzureCloudProvider):
     mock_result = mock_requests_response(
         status=200,
@@ -1530,13 +1692,49 @@ def test_create_policies(mock_azure: AzureCloudProvider, monkeypatch):
 def test_get_service_principal_token_fails(mock_azure, monkeypatch):
     monkeypatch.setattr(
         atat.domain.csp.cloud.azure_cloud_provider,
-        "get_principal_auth_token",
-        Mock(return_value=None),
+        "get_principal_auth_token_response",
+        Mock(return_value={}),
     )
     with pytest.raises(AuthenticationException):
         mock_azure._get_service_principal_token("tenant_id", "client", "secret")
 
 
+class TestTokenCaching:
+    def test_service_principal_token_is_cached_by_scope(self, mock_azure):
+        mock_azure._get_service_principal_token("tenant_id", "client", "secret")
+        mock_azure._get_service_principal_token("tenant_id", "client", "secret")
+        mock_azure._get_service_principal_token(
+            "tenant_id", "client", "secret", scope="https://graph.microsoft.com/"
+        )
+
+        fetch = (
+            atat.domain.csp.cloud.azure_cloud_provider.get_principal_auth_token_response
+        )
+        assert fetch.call_count == 2
+
+    def test_elevated_access_token_is_not_taken_from_cache(self, mock_azure):
+        mock_azure._remove_tenant_admin_elevated_access = Mock()
+        with mock_azure._get_elevated_access_token("tenant_id", "user_object_id"):
+            pass
+
+        fetch = (
+            atat.domain.csp.cloud.azure_cloud_provider.get_principal_auth_token_response
+        )
+        assert fetch.call_count == 2
+
+    def test_writing_tenant_creds_invalidates_tokens(self, mock_azure):
+        mock_azure._get_tenant_principal_token("mock_tenant_id")
+        mock_azure.create_tenant_creds(
+            "mock_tenant_id", KeyVaultCredentials(**KEYVAULT_SECRET)
+        )
+        mock_azure._get_tenant_principal_token("mock_tenant_id")
+
+        fetch = (
+            atat.domain.csp.cloud.azure_cloud_provider.get_principal_auth_token_response
+        )
+        assert fetch.call_count == 2
+
+
 class TestCreateManagementGroup:
     def test_status_code_200(self, mock_azure: AzureCloudProvider, monkeypatch):
         mock_session_object = Mock()
@@ -1578,6 +1776,33 @@ class TestCreateManagementGroup:
             "http://status_url.com", "http://result_url.com", mock_session_object
         )
 
+    def test_status_code_202_nonblocking(self, mock_azure: AzureCloudProvider):
+        mock_azure.nonblocking_mgmt_groups = True
+        mock_session_object = Mock()
+        mock_session_object.put = Mock(
+            return_value=mock_requests_response(
+                status=202,
+                headers={
+                    "Azure-AsyncOperation": "http://status_url.com",
+                    "Location": "http://result_url.com",
+                },
+            )
+        )
+        mock_azure.sdk.requests.Session.return_value = mock_session_object
+        mock_azure._poll_management_group_creation_job = Mock()
+
+        result = mock_azure._create_management_group(
+            "management_group_id", "display_name", "tenant_id", "parent_id"
+        )
+
+        assert result == ManagementGroupOperationCSPResult(
+            management_group_name="management_group_id",
+            status_url="http://status_url.com",
+            result_url="http://result_url.com",
+        )
+        mock_azure._poll_management_group_creation_job.assert_not_called()
+        mock_session_object.patch.assert_not_called()
+
     def test_raises_exceptions(
         self, mock_azure: AzureCloudProvider, mock_http_error_response
     ):
@@ -1688,6 +1913,82 @@ class TestPollManagementGroupCreationJob:
             )
 
 
+class TestCheckManagementGroupOperation:
+    @pytest.fixture
+    def payload(self):
+        return ManagementGroupOperationCSPPayload(
+            tenant_id="tenant_id",
+            management_group_name="group",
+            status_url="status_url",
+            result_url="result_url",
+            parent_id="parent",
+        )
+
+    @pytest.fixture
+    def session(self, mock_azure):
+        session = Mock()
+        mock_azure.sdk.requests.Session.return_value = session
+        return session
+
+    def test_in_progress(self, mock_azure, payload, session):
+        session.get.return_value = mock_requests_response(
+            json_data={"status": "In Progress"}
+        )
+
+        assert mock_azure.check_management_group_operation(payload) is None
+        session.get.assert_called_once_with("status_url")
+        session.patch.assert_not_called()
+
+    def test_succeeded_applies_parent(self, mock_azure, payload, session):
+        session.get.side_effect = [
+            mock_requests_response(json_data={"status": "Succeeded"}),
+            mock_requests_response(
+                json_data={
+                    "id": "/providers/Microsoft.Management/managementGroups/group",
+                    "name": "group",
+                }
+            ),
+        ]
+        session.patch.return_value = mock_requests_response()
+
+        result = mock_azure.check_management_group_operation(payload)
+
+        assert result.name == "group"
+        session.patch.assert_called_once()
+        assert session.patch.call_args.kwargs["json"] == {
+            "parentId": "/providers/Microsoft.Management/managementGroups/parent"
+        }
+
+    def test_failed(self, mock_azure, payload, session):
+        session.get.return_value = mock_requests_response(
+            json_data={
+                "status": "Failed",
+                "error": {"code": "11234", "message": "An error occured"},
+            }
+        )
+
+        with pytest.raises(ResourceProvisioningError):
+            mock_azure.check_management_group_operation(payload)
+
+    def test_initial_verification_resets_stage_while_in_progress(
+        self, mock_azure, session
+    ):
+        session.get.return_value = mock_requests_response(
+            json_data={"status": "In Progress"}
+        )
+        payload = InitialMgmtGroupVerificationCSPPayload(
+            tenant_id="tenant_id",
+            management_group_name="group",
+            user_object_id="user_object_id",
+            initial_management_group_status_url="status_url",
+            initial_management_group_result_url="result_url",
+        )
+
+        result = mock_azure.create_initial_mgmt_group_verification(payload)
+
+        assert result.reset_stage
+
+
 class TestGetBillingAdminRoleTemplateId:
     def test_returns_template_id(self, mock_azure):
         mock_azure.sdk.requests.get.return_value = mock_requests_response(
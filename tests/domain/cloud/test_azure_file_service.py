@@ -1,7 +1,11 @@
+from types import SimpleNamespace
+
+import azure.core.exceptions
 import azure.storage.blob
 import pytest
 
 from atat.domain.csp.files import AzureFileService
+from atat.domain.exceptions import NotFoundError
 
 
 @pytest.fixture
@@ -110,3 +114,48 @@ def test_download_task_order(mocker, file_service, mock_blob_class):
     assert task_order_download["name"] == "object_name"
     assert task_order_download["content"] == b"some_bytes"
     assert task_order_download["filename"] == "filename.pdf"
+
+
+def test_get_properties(mocker, file_service):
+    mocker.patch("azure.storage.blob.BlobClient")
+    get_blob_properties = azure.storage.blob.BlobClient.return_value.get_blob_properties
+    get_blob_properties.return_value = SimpleNamespace(
+        metadata={"filename": "filename.pdf"},
+        size=1234,
+        etag='"0x8D9"',
+        last_modified=None,
+        content_settings=SimpleNamespace(content_type="application/pdf"),
+    )
+
+    properties = file_service.get_properties("object_name")
+    assert properties.filename == "filename.pdf"
+    assert properties.size == 1234
+    assert properties.etag == "0x8D9"
+    assert properties.content_type == "application/pdf"
+
+
+def test_stream_reads_range_in_chunks(mocker, file_service):
+    mocker.patch("azure.storage.blob.BlobClient")
+    blob_client = azure.storage.blob.BlobClient.return_value
+    blob_client.download_blob.return_value.chunks.return_value = iter([b"a", b"b"])
+
+    chunks = file_service.stream("object_name", offset=10, length=2, etag="0x8D9")
+
+    assert list(chunks) == [b"a", b"b"]
+    _, kwargs = azure.storage.blob.BlobClient.call_args
+    assert kwargs["max_chunk_get_size"] == file_service.chunk_size
+    _, kwargs = blob_client.download_blob.call_args
+    assert kwargs["offset"] == 10
+    assert kwargs["length"] == 2
+    assert kwargs["etag"] == '"0x8D9"'
+
+
+def test_stream_missing_blob(mocker, file_service):
+    mocker.patch("azure.storage.blob.BlobClient")
+    blob_client = azure.storage.blob.BlobClient.return_value
+    blob_client.download_blob.side_effect = (
+        azure.core.exceptions.ResourceNotFoundError()
+    )
+
+    with pytest.raises(NotFoundError):
+        file_service.stream("object_name")
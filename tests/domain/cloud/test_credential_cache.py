@@ -0,0 +1,63 @@
+from unittest.mock import Mock
+
+import pytest
+
+from atat.domain.csp.cloud.credential_cache import CredentialCache
+
+
+@pytest.fixture
+def now():
+    return Mock(return_value=1000.0)
+
+
+def test_caches_until_ttl(now):
+    cache = CredentialCache(ttl=60, timer=now)
+    load = Mock(side_effect=["first", "second"])
+
+    assert cache.get("tenant", load) == "first"
+    now.return_value += 59
+    assert cache.get("tenant", load) == "first"
+    now.return_value += 2
+    assert cache.get("tenant", load) == "second"
+    assert cache.metrics() == {"hits": 1, "misses": 2, "size": 1}
+
+
+def test_evicts_least_recently_used():
+    cache = CredentialCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a", Mock())
+    cache.set("c", 3)
+
+    load = Mock(return_value="reloaded")
+    assert cache.get("a", load) == 1
+    assert cache.get("b", load) == "reloaded"
+
+
+def test_invalidate_and_refresh_reload():
+    cache = CredentialCache()
+    load = Mock(side_effect=["first", "second", "third"])
+    cache.get("tenant", load)
+
+    cache.invalidate("tenant")
+    assert cache.get("tenant", load) == "second"
+    assert cache.get("tenant", load, refresh=True) == "third"
+    assert cache.get("tenant", load) == "third"
+
+
+def test_disabled_cache_always_loads():
+    cache = CredentialCache(maxsize=0)
+    load = Mock(return_value="creds")
+    cache.get("tenant", load)
+    cache.get("tenant", load)
+    assert load.call_count == 2
+
+
+def test_does_not_log_on_miss(mock_logger):
+    cache = CredentialCache()
+    cache.get("tenant", Mock(return_value="creds"))
+    cache.get("tenant", Mock())
+    cache.get("other", Mock(return_value="creds"))
+
+    assert mock_logger.messages == []
+    assert cache.metrics() == {"hits": 1, "misses": 2, "size": 2}
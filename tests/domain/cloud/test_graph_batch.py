@@ -0,0 +1,82 @@
+import pytest
+
+from atat.domain.csp.cloud.exceptions import UserProvisioningException
+from atat.domain.csp.cloud.graph_batch import (
+    GraphBatch,
+    is_success,
+    provisioning_error,
+)
+
+
+def test_add_builds_requests():
+    batch = GraphBatch()
+    first = batch.add("POST", "/users", {"displayName": "Han"})
+    second = batch.add("PATCH", "/users/han", {"otherMails": []}, depends_on=[first])
+
+    assert batch.requests == [
+        {
+            "id": "1",
+            "method": "POST",
+            "url": "/users",
+            "body": {"displayName": "Han"},
+            "headers": {"Content-Type": "application/json"},
+        },
+        {
+            "id": second,
+            "method": "PATCH",
+            "url": "/users/han",
+            "body": {"otherMails": []},
+            "headers": {"Content-Type": "application/json"},
+            "dependsOn": ["1"],
+        },
+    ]
+
+
+def test_chunks_respect_the_batch_limit():
+    batch = GraphBatch()
+    for _ in range(45):
+        batch.add("GET", "/me")
+
+    assert [len(chunk) for chunk in batch.chunks()] == [20, 20, 5]
+
+
+def test_chunks_keep_dependent_requests_together():
+    batch = GraphBatch()
+    for _ in range(3):
+        batch.add("GET", "/me")
+    for _ in range(2):
+        create = batch.add("POST", "/users", {})
+        batch.add("PATCH", "/users/x", {}, depends_on=[create])
+
+    chunks = batch.chunks(size=4)
+
+    assert [[request["id"] for request in chunk] for chunk in chunks] == [
+        ["1", "2", "3"],
+        ["4", "5", "6", "7"],
+    ]
+
+
+def test_chunks_reject_oversized_dependency_chains():
+    batch = GraphBatch()
+    previous = batch.add("GET", "/me")
+    for _ in range(2):
+        previous = batch.add("GET", "/me", depends_on=[previous])
+
+    with pytest.raises(ValueError):
+        batch.chunks(size=2)
+
+
+def test_maps_failed_responses_to_provisioning_errors():
+    assert is_success({"id": "1", "status": 201})
+    assert not is_success({"id": "1", "status": 400})
+
+    error = provisioning_error(
+        {
+            "id": "1",
+            "status": 400,
+            "body": {"error": {"code": "Request_BadRequest", "message": "Bad email"}},
+        }
+    )
+    assert isinstance(error, UserProvisioningException)
+    assert "Request_BadRequest Bad email" in str(error)
+    assert "depends on failed" in str(provisioning_error({"id": "2", "status": 424}))
@@ -0,0 +1,100 @@
+from unittest.mock import Mock
+
+import pytest
+
+from atat.domain.csp.cloud.http_client import AzureRetry, PooledHTTPClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = PooledHTTPClient(pool_size=2, max_retries=1, timeout=5)
+    monkeypatch.setattr(
+        client, "_make_session", Mock(side_effect=lambda: Mock(request=Mock()))
+    )
+    return client
+
+
+def test_reuses_one_session_per_host(client):
+    management = client.session_for("https://management.azure.com/providers")
+    assert client.session_for("https://management.azure.com/tenants") is management
+    assert client.session_for("https://graph.microsoft.com/v1.0/users") is not (
+        management
+    )
+    assert client._make_session.call_count == 2
+
+
+def test_session_is_recreated_after_fork(client, monkeypatch):
+    session = client.session_for("https://management.azure.com/")
+    monkeypatch.setattr(client, "_pid", -1)
+    assert client.session_for("https://management.azure.com/") is not session
+
+
+def test_applies_default_timeout_unless_given(client):
+    url = "https://graph.microsoft.com/v1.0/users"
+    session = client.session_for(url)
+
+    client.post(url, json={})
+    session.request.assert_called_with("POST", url, json={}, timeout=5)
+
+    client.get(url, timeout=30)
+    session.request.assert_called_with("GET", url, timeout=30)
+
+
+def test_consults_throttle_around_requests(client):
+    url = "https://graph.microsoft.com/v1.0/users"
+    headers = {"Authorization": "Bearer token"}
+    client.throttle = Mock()
+
+    response = client.get(url, headers=headers)
+
+    client.throttle.before_request.assert_called_once_with(url, headers)
+    client.throttle.after_response.assert_called_once_with(url, headers, response)
+
+
+def test_pooled_session_merges_default_headers(client):
+    url = "https://management.azure.com/providers"
+    session = client.Session()
+    session.headers = {"Authorization": "Bearer token"}
+
+    session.put(url, headers={"Content-Type": "application/json"})
+
+    _, kwargs = client.session_for(url).request.call_args
+    assert kwargs["headers"] == {
+        "Authorization": "Bearer token",
+        "Content-Type": "application/json",
+    }
+    assert kwargs["timeout"] == 5
+
+
+def test_pooled_http_client_mounts_retrying_adapter():
+    client = PooledHTTPClient(pool_size=3, max_retries=2)
+    adapter = client.session_for("https://management.azure.com/").get_adapter(
+        "https://management.azure.com/"
+    )
+    assert adapter._pool_maxsize == 3
+    assert isinstance(adapter.max_retries, AzureRetry)
+    assert adapter.max_retries.total == 2
+
+
+class TestAzureRetry:
+    def test_retries_throttled_requests_for_any_method(self):
+        retry = AzureRetry(total=3, status_forcelist=AzureRetry.STATUS_FORCELIST)
+        assert retry.is_retry("POST", 429)
+        assert retry.is_retry("POST", 503, has_retry_after=True)
+
+    def test_retries_server_errors_only_for_idempotent_methods(self):
+        retry = AzureRetry(total=3, status_forcelist=AzureRetry.STATUS_FORCELIST)
+        assert retry.is_retry("PUT", 500)
+        assert not retry.is_retry("POST", 500)
+        assert not retry.is_retry("GET", 404)
+
+    def test_caps_retry_after(self):
+        retry = AzureRetry(total=3)
+        response = Mock(getheader=Mock(return_value="3600"))
+        assert retry.get_retry_after(response) == AzureRetry.BACKOFF_MAX
+
+        response = Mock(getheader=Mock(return_value="2"))
+        assert retry.get_retry_after(response) == 2
+
+        response = Mock(getheader=Mock(return_value=None))
+        assert retry.get_retry_after(response) is None
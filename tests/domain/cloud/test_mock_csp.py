@@ -105,3 +105,16 @@ class CspTestError(unittest.TestCase):
         """
         with self.assertRaises(ValueError):
             CSP("Foo", {})
+
+
+def test_csp_builds_services_on_first_use():
+    csp = CSP("mock-test", {}, with_delay=False, with_failure=False)
+    assert "cloud" not in csp.__dict__
+
+    assert isinstance(csp.cloud, MockCloudProvider)
+    assert csp.cloud is csp.cloud
+
+
+def test_csp_rejects_unknown_modes():
+    with pytest.raises(ValueError):
+        CSP("aws", {})
@@ -0,0 +1,152 @@
+import base64
+import json
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+from redis.exceptions import RedisError
+
+from atat.domain.csp.cloud.exceptions import ThrottlingException
+from atat.domain.csp.cloud.throttling import (
+    AzureThrottle,
+    CircuitBreaker,
+    RateLimiter,
+    api_family,
+    retry_after,
+    tenant_from_headers,
+)
+
+ARM_URL = (
+    "https://management.azure.com/providers/Microsoft.Management/managementGroups/a"
+)
+
+
+def bearer(claims):
+    encoded = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return {"Authorization": f"Bearer header.{encoded.decode()}.signature"}
+
+
+def response(status_code, headers=None):
+    return Mock(status_code=status_code, headers=headers or {})
+
+
+@pytest.fixture
+def prefix():
+    return f"test:{uuid4().hex}"
+
+
+@pytest.fixture
+def sleep(monkeypatch):
+    sleep = Mock()
+    monkeypatch.setattr("atat.domain.csp.cloud.throttling.time.sleep", sleep)
+    return sleep
+
+
+@pytest.mark.parametrize(
+    "url,family",
+    [
+        ("https://graph.microsoft.com/v1.0/users", "graph"),
+        (ARM_URL, "arm"),
+        (
+            "https://management.azure.com/providers/Microsoft.Billing/billingAccounts/1",
+            "billing",
+        ),
+        ("https://login.microsoftonline.com/tenant/oauth2/v2.0/token", None),
+    ],
+)
+def test_api_family(url, family):
+    assert api_family(url) == family
+
+
+def test_retry_after():
+    assert retry_after(response(429, {"Retry-After": "5"}), 30) == 5
+    assert retry_after(response(429, {"Retry-After": "120"}), 30) == 120
+    assert retry_after(response(429), 30) == 30
+    assert retry_after(response(429, {"Retry-After": "soon"}), 30) == 30
+
+
+def test_tenant_from_headers():
+    assert tenant_from_headers(bearer({"tid": "tenant"})) == "tenant"
+    assert tenant_from_headers({"Authorization": "Bearer not-a-jwt"}) is None
+    assert tenant_from_headers({}) is None
+    assert tenant_from_headers(None) is None
+
+
+def test_rate_limiter_waits_for_a_token(app, prefix, sleep):
+    limiter = RateLimiter(app.redis, {"arm": 2}, max_wait=10, key_prefix=prefix)
+
+    limiter.acquire("tenant", "arm")
+    limiter.acquire("tenant", "arm")
+    sleep.assert_not_called()
+
+    sleep.side_effect = lambda seconds: app.redis.delete(f"{prefix}:arm:tenant")
+    limiter.acquire("tenant", "arm")
+    assert 0 < sleep.call_args[0][0] <= 0.5
+
+    limiter.acquire("other-tenant", "arm")
+    limiter.acquire("tenant", "graph")
+    assert sleep.call_count == 1
+
+
+def test_rate_limiter_raises_rather_than_waiting_too_long(app, prefix, sleep):
+    limiter = RateLimiter(app.redis, {"billing": 0.1}, max_wait=1, key_prefix=prefix)
+
+    limiter.acquire("tenant", "billing")
+    with pytest.raises(ThrottlingException) as excinfo:
+        limiter.acquire("tenant", "billing")
+
+    assert excinfo.value.retry_after > 1
+    sleep.assert_not_called()
+
+
+def test_circuit_opens_after_threshold(app, prefix):
+    breaker = CircuitBreaker(app.redis, threshold=2, cooldown=30, key_prefix=prefix)
+
+    breaker.record("tenant", "graph", response(503))
+    breaker.check("tenant", "graph")
+    breaker.record("tenant", "graph", response(429, {"Retry-After": "120"}))
+
+    with pytest.raises(ThrottlingException) as excinfo:
+        breaker.check("tenant", "graph")
+    assert 119 < excinfo.value.retry_after <= 120
+    breaker.check("other-tenant", "graph")
+    breaker.check("tenant", "arm")
+
+
+def test_success_resets_failure_count(app, prefix):
+    breaker = CircuitBreaker(app.redis, threshold=2, cooldown=30, key_prefix=prefix)
+
+    breaker.record("tenant", "arm", response(429))
+    breaker.record("tenant", "arm", response(200))
+    breaker.record("tenant", "arm", response(429))
+
+    breaker.check("tenant", "arm")
+
+
+def test_throttle_keys_requests_by_tenant_and_family(app, prefix):
+    limiter = Mock()
+    breaker = Mock()
+    throttle = AzureThrottle(limiter, breaker)
+    headers = bearer({"tid": "tenant"})
+    ok = response(200)
+
+    throttle.before_request(ARM_URL, headers)
+    throttle.after_response(ARM_URL, headers, ok)
+
+    breaker.check.assert_called_once_with("tenant", "arm")
+    limiter.acquire.assert_called_once_with("tenant", "arm")
+    breaker.record.assert_called_once_with("tenant", "arm", ok)
+
+    throttle.before_request("https://vault.azure.net/secrets/a", headers)
+    assert limiter.acquire.call_count == 1
+
+
+def test_throttle_fails_open_when_redis_is_unavailable(app):
+    limiter = Mock(acquire=Mock(side_effect=RedisError))
+    breaker = Mock(record=Mock(side_effect=RedisError))
+    throttle = AzureThrottle(limiter, breaker)
+
+    throttle.before_request(ARM_URL, {})
+    throttle.after_response(ARM_URL, {}, response(500))
+
+    limiter.acquire.assert_called_once_with("unknown", "arm")
@@ -0,0 +1,125 @@
+import threading
+import time
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+from cryptography.fernet import Fernet
+from redis.exceptions import RedisError
+
+from atat.domain.csp.cloud.token_cache import TokenCache
+
+
+@pytest.fixture
+def key():
+    return (uuid4().hex, "client_id", "https://management.azure.com/.default")
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = Mock(return_value=1000.0)
+    monkeypatch.setattr("atat.domain.csp.cloud.token_cache.time", Mock(time=clock))
+    return clock
+
+
+def test_caches_token_until_refresh_margin(key, now):
+    cache = TokenCache(refresh_margin=300)
+    fetch = Mock(side_effect=[("first", 3600), ("second", 3600)])
+
+    assert cache.get(key, fetch) == "first"
+    now.return_value += 3299
+    assert cache.get(key, fetch) == "first"
+    now.return_value += 1
+    assert cache.get(key, fetch) == "second"
+    assert fetch.call_count == 2
+
+
+def test_does_not_cache_missing_or_short_lived_tokens(key):
+    cache = TokenCache(refresh_margin=300)
+    fetch = Mock(side_effect=[(None, None), ("short", 60), ("token", 3600)])
+
+    assert cache.get(key, fetch) is None
+    assert cache.get(key, fetch) == "short"
+    assert cache.get(key, fetch) == "token"
+    assert cache.get(key, fetch) == "token"
+    assert fetch.call_count == 3
+
+
+def test_refresh_ignores_cached_token(key):
+    cache = TokenCache()
+    fetch = Mock(side_effect=[("first", 3600), ("second", 3600)])
+
+    cache.get(key, fetch)
+    assert cache.get(key, fetch, refresh=True) == "second"
+    assert cache.get(key, fetch) == "second"
+
+
+def test_invalidate_drops_tokens_for_tenant(key):
+    cache = TokenCache()
+    other_key = (uuid4().hex, "client_id", "scope")
+    fetch = Mock(return_value=("token", 3600))
+    cache.get(key, fetch)
+    cache.get(other_key, fetch)
+
+    cache.invalidate(key[0])
+
+    cache.get(key, fetch)
+    cache.get(other_key, fetch)
+    assert fetch.call_count == 3
+
+
+def test_concurrent_refreshes_are_single_flighted(key):
+    cache = TokenCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return "token", 3600
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get(key, fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["token"] * 8
+    assert len(calls) == 1
+
+
+def test_redis_requires_encryption_key(app):
+    with pytest.raises(ValueError):
+        TokenCache(redis=app.redis)
+
+
+def test_shares_encrypted_tokens_through_redis(app, key):
+    encryption_key = Fernet.generate_key()
+    first = TokenCache(redis=app.redis, encryption_key=encryption_key)
+    second = TokenCache(redis=app.redis, encryption_key=encryption_key)
+
+    assert first.get(key, Mock(return_value=("token", 3600))) == "token"
+
+    fetch = Mock()
+    assert second.get(key, fetch) == "token"
+    fetch.assert_not_called()
+    assert b"token" not in app.redis.get(first._redis_key(key))
+
+
+def test_ignores_tokens_encrypted_with_another_key(app, key):
+    first = TokenCache(redis=app.redis, encryption_key=Fernet.generate_key())
+    second = TokenCache(redis=app.redis, encryption_key=Fernet.generate_key())
+
+    first.get(key, Mock(return_value=("first", 3600)))
+    assert second.get(key, Mock(return_value=("second", 3600))) == "second"
+
+
+def test_falls_back_to_fetching_when_redis_fails(app, key):
+    redis = Mock()
+    redis.lock.side_effect = RedisError
+    cache = TokenCache(redis=redis, encryption_key=Fernet.generate_key())
+
+    assert cache.get(key, Mock(return_value=("token", 3600))) == "token"
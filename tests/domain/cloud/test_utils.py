@@ -7,7 +7,7 @@ import requests
 from atat.domain.csp.cloud.models import UserCSPPayload
 from atat.domain.csp.cloud.utils import (
     create_active_directory_user,
-    get_principal_auth_token,
+    get_principal_auth_token_response,
     make_auth_header,
 )
 from tests.domain.cloud.test_azure_csp import mock_requests_response
@@ -15,22 +15,23 @@ from tests.mock_azure import mock_requests
 
 
 @patch("atat.domain.csp.cloud.utils.requests", new_callable=mock_requests)
-def test_get_principal_auth_token(mock_requests):
+def test_get_principal_auth_token_response(mock_requests):
     mock_requests.post.side_effect = [
         mock_requests_response(
             status=500,
             raise_for_status=requests.exceptions.HTTPError("500 Server Error"),
         ),
-        mock_requests_response(json_data={"access_token": "token"}),
-        mock_requests_response(json_data={}),
+        mock_requests_response(json_data={"access_token": "token", "expires_in": 1}),
     ]
     payload = MagicMock(return_value={})
 
     with pytest.raises(requests.HTTPError):
-        get_principal_auth_token("a_tenant_id", payload)
+        get_principal_auth_token_response("a_tenant_id", payload)
 
-    assert get_principal_auth_token("a_tenant_id", payload) == "token"
-    assert get_principal_auth_token("a_tenant_id", payload) is None
+    assert get_principal_auth_token_response("a_tenant_id", payload) == {
+        "access_token": "token",
+        "expires_in": 1,
+    }
 
 
 def test_make_auth_header():
@@ -223,3 +223,57 @@ class TestGetCloudIdForUser:
             user=user, application=ApplicationFactory.create(portfolio=portfolio)
         )
         assert ApplicationRoles.get_cloud_id_for_user(user.dod_id, portfolio.id) is None
+
+
+def test_claim_pending_creation():
+    portfolio = PortfolioFactory.create()
+    ready_app = ApplicationFactory.create(cloud_id="123", portfolio=portfolio)
+    ready_app2 = ApplicationFactory.create(cloud_id="321", portfolio=portfolio)
+    user = UserFactory.create()
+    role_one = ApplicationRoleFactory.create(
+        user=user, application=ready_app, status=ApplicationRoleStatus.ACTIVE
+    )
+    role_two = ApplicationRoleFactory.create(
+        user=user, application=ready_app2, status=ApplicationRoleStatus.ACTIVE
+    )
+    role_three = ApplicationRoleFactory.create(
+        user=UserFactory.create(),
+        application=ready_app,
+        status=ApplicationRoleStatus.ACTIVE,
+    )
+
+    groups = ApplicationRoles.claim_pending_creation(limit=10)
+
+    claimed_ids = [[ar.id for ar in group] for group in groups]
+    expected_ids = [[role_one.id, role_two.id], [role_three.id]]
+    sort_nested(claimed_ids)
+    sort_nested(expected_ids)
+    assert claimed_ids == expected_ids
+    assert ApplicationRoles.get_pending_creation() == []
+    assert ApplicationRoles.claim_pending_creation(limit=10) == []
+
+
+def test_claim_pending_creation_claims_all_of_a_users_roles():
+    ready_app = ApplicationFactory.create(cloud_id="123")
+    ready_app2 = ApplicationFactory.create(cloud_id="321")
+    user = UserFactory.create()
+    for application in (ready_app, ready_app2):
+        ApplicationRoleFactory.create(
+            user=user, application=application, status=ApplicationRoleStatus.ACTIVE
+        )
+    other_role = ApplicationRoleFactory.create(
+        user=UserFactory.create(),
+        application=ready_app,
+        status=ApplicationRoleStatus.ACTIVE,
+    )
+
+    first = ApplicationRoles.claim_pending_creation(limit=1)
+    second = ApplicationRoles.claim_pending_creation(limit=1)
+
+    claimed = [ar for group in first + second for ar in group]
+    assert len({ar.user_id for group in first for ar in group}) == 1
+    assert len({ar.user_id for group in second for ar in group}) == 1
+    assert sorted(ar.id for ar in claimed) == sorted(
+        [*[ar.id for ar in user.application_roles], other_role.id]
+    )
+    assert ApplicationRoles.claim_pending_creation(limit=1) == []
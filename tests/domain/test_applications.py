@@ -7,6 +7,7 @@ from atat.domain.application_roles import ApplicationRoles
 from atat.domain.applications import Applications
 from atat.domain.environment_roles import EnvironmentRoles
 from atat.domain.exceptions import AlreadyExistsError, NotFoundError
+from atat.domain.invitations import ApplicationInvitations
 from atat.domain.permission_sets import PermissionSets
 from atat.models import ApplicationRoleStatus, CSPRole
 from tests.factories import (
@@ -210,6 +211,37 @@ class TestInvite:
 
         assert invitation.role.cloud_id == cloud_id
 
+    def test_invite_many(self, application, user_data):
+        member = UserFactory.create()
+        ApplicationRoleFactory.create(
+            application=ApplicationFactory.create(portfolio=application.portfolio),
+            user=member,
+            cloud_id="abc",
+        )
+
+        sent = Applications.invite_many(
+            application=application,
+            inviter=application.portfolio.owner,
+            members_data=[
+                {
+                    "user_data": user_data,
+                    "permission_sets": [PermissionSets.EDIT_APPLICATION_TEAM],
+                },
+                {"user_data": member.to_dictionary()},
+            ],
+        )
+
+        assert [email for email, _ in sent] == [user_data["email"], member.email]
+        new_role, member_role = [
+            ApplicationInvitations._get(token).role for _, token in sent
+        ]
+        assert new_role.application == application
+        assert len(new_role.permission_sets) == 2
+        assert new_role.cloud_id is None
+        assert not new_role.environment_roles
+        # existing users keep the cloud ID they have elsewhere in the portfolio
+        assert member_role.cloud_id == "abc"
+
 
 def test_create_does_not_duplicate_names_within_portfolio():
     portfolio = PortfolioFactory.create()
@@ -238,6 +270,9 @@ def test_get_applications_pending_creation():
     app_ready = ApplicationFactory.create(portfolio=portfolio1)
 
     app_done = ApplicationFactory.create(portfolio=portfolio1, cloud_id="123456")
+    app_creating = ApplicationFactory.create(
+        portfolio=portfolio1, csp_operation={"status_url": "https://status"}
+    )
 
     portfolio2 = PortfolioFactory.create(state="UNSTARTED")
     app_not_ready = ApplicationFactory.create(portfolio=portfolio2)
@@ -2,6 +2,7 @@ import pytest
 
 from atat.domain.applications import Applications
 from atat.domain.audit_log import AuditLog
+from atat.domain.common import KeysetPage
 from atat.domain.exceptions import UnauthorizedError
 from atat.domain.permission_sets import PermissionSets
 from atat.domain.portfolios import Portfolios
@@ -133,3 +134,56 @@ def test_get_all_includes_ccpo_user_changes():
     Users.revoke_ccpo_perms(user)
 
     assert len(AuditLog.get_all_events()) == len(initial_audit_log) + 2
+
+
+@pytest.mark.audit_log
+def test_keyset_paginate_audit_log():
+    portfolio = PortfolioFactory.create()
+    application = ApplicationFactory.create(portfolio=portfolio)
+    for _ in range(30):
+        AuditLog.log_system_event(
+            resource=application, action="create", portfolio=portfolio
+        )
+    all_events = AuditLog.get_portfolio_events(portfolio)
+
+    first = AuditLog.get_portfolio_events(portfolio, {"per_page": 10, "page": 1})
+    assert list(first) == all_events[:10]
+    assert not first.has_prev and first.has_next
+
+    second = AuditLog.get_portfolio_events(
+        portfolio, {"per_page": 10, "page": 2, "after": first.next_cursor}
+    )
+    assert list(second) == all_events[10:20]
+    assert second.page == 2
+    assert second.has_prev and second.has_next
+
+    back = AuditLog.get_portfolio_events(
+        portfolio, {"per_page": 10, "page": 1, "before": second.prev_cursor}
+    )
+    assert list(back) == all_events[:10]
+    assert not back.has_prev
+
+    last = AuditLog.get_portfolio_events(portfolio, {"per_page": 10, "last": True})
+    assert list(last) == all_events[-10:]
+    assert last.page == last.pages
+    assert not last.has_next
+
+
+@pytest.mark.audit_log
+def test_audit_log_total_is_estimated_past_count_limit(monkeypatch):
+    monkeypatch.setattr(KeysetPage, "COUNT_PAGES_LIMIT", 2)
+    portfolio = PortfolioFactory.create()
+    application = ApplicationFactory.create(portfolio=portfolio)
+    for _ in range(30):
+        AuditLog.log_system_event(
+            resource=application, action="create", portfolio=portfolio
+        )
+
+    events = AuditLog.get_portfolio_events(portfolio, {"per_page": 10, "page": 1})
+    assert events.total == 20
+    assert events.total_is_estimate
+
+
+def test_invalid_keyset_cursor_is_ignored():
+    assert KeysetPage.decode_cursor("not a cursor") is None
+    assert KeysetPage.decode_cursor(None) is None
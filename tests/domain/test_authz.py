@@ -1,19 +1,24 @@
+from unittest.mock import Mock
+
 import pytest
 
-from atat.domain.authz import Authorization, user_can_access
+from atat.database import db
+from atat.domain.authz import Authorization, PermissionIndex, user_can_access
 from atat.domain.authz.decorator import user_can_access_decorator
 from atat.domain.exceptions import UnauthorizedError
 from atat.domain.permission_sets import PermissionSets
 from atat.domain.portfolio_roles import PortfolioRoles
 from atat.models.permissions import Permissions
+from atat.models.portfolio_role import Status as PortfolioRoleStatus
 from tests.factories import (
+    ApplicationFactory,
     ApplicationRoleFactory,
     PortfolioFactory,
     PortfolioRoleFactory,
     TaskOrderFactory,
     UserFactory,
 )
-from tests.utils import FakeLogger
+from tests.utils import FakeLogger, captured_statements
 
 
 @pytest.fixture
@@ -240,3 +245,58 @@ def test_user_can_access_decorator_logs_access(
     assert len(mock_logger.messages) == num_msgs + 1
     assert "denied access" in mock_logger.messages[-1]
     assert "GET" in mock_logger.messages[-1]
+
+
+def test_permission_index_is_built_once_per_request(request_ctx, monkeypatch):
+    port_role = PortfolioRoleFactory.create(
+        permission_sets=[PermissionSets.get(PermissionSets.VIEW_PORTFOLIO_FUNDING)]
+    )
+    user, portfolio = port_role.user, port_role.portfolio
+    build = Mock(wraps=PermissionIndex.build)
+    monkeypatch.setattr(PermissionIndex, "build", build)
+
+    for _ in range(3):
+        assert Authorization.has_portfolio_permission(
+            user, portfolio, Permissions.VIEW_PORTFOLIO_FUNDING
+        )
+    assert build.call_count == 1
+
+    PortfolioRoles.disable(port_role)
+    assert not Authorization.has_portfolio_permission(
+        user, portfolio, Permissions.VIEW_PORTFOLIO_FUNDING
+    )
+    assert build.call_count == 2
+
+
+def test_permission_index_loads_roles_in_fixed_queries(request_ctx):
+    user = UserFactory.create()
+    portfolios = [PortfolioFactory.create() for _ in range(3)]
+    for portfolio in portfolios:
+        PortfolioRoleFactory.create(user=user, portfolio=portfolio)
+        ApplicationRoleFactory.create(
+            user=user, application=ApplicationFactory.create(portfolio=portfolio)
+        )
+    db.session.expire_all()
+    for portfolio in portfolios:
+        db.session.refresh(portfolio)
+
+    with captured_statements() as statements:
+        for portfolio in portfolios * 10:
+            Authorization.has_portfolio_permission(
+                user, portfolio, Permissions.VIEW_PORTFOLIO_FUNDING
+            )
+
+    # The user, their permission sets, and their portfolio and application
+    # roles with their permission sets, however many roles there are.
+    assert len(statements) == 7
+
+
+def test_disabled_portfolio_role_grants_no_permissions():
+    port_role = PortfolioRoleFactory.create(
+        permission_sets=[PermissionSets.get(PermissionSets.VIEW_PORTFOLIO_FUNDING)],
+        status=PortfolioRoleStatus.DISABLED,
+    )
+
+    assert not Authorization.has_portfolio_permission(
+        port_role.user, port_role.portfolio, Permissions.VIEW_PORTFOLIO_FUNDING
+    )
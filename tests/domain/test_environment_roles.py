@@ -189,3 +189,12 @@ class TestPendingCreation:
             application_role=appr, status=EnvironmentRoleStatus.DISABLED
         )
         assert EnvironmentRoles.get_pending_creation() == []
+
+    def test_claim_pending_creation(self):
+        appr = ApplicationRoleFactory.create(cloud_id="123")
+        envr = EnvironmentRoleFactory.create(application_role=appr)
+        EnvironmentRoleFactory.create(application_role=appr, deleted=True)
+
+        assert EnvironmentRoles.claim_pending_creation(limit=10) == [envr]
+        assert EnvironmentRoles.get_pending_creation() == []
+        assert EnvironmentRoles.claim_pending_creation(limit=10) == []
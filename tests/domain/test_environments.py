@@ -175,6 +175,31 @@ class TestGetEnvironmentsPendingCreate(EnvQueryTest):
         envs_pending_creation = Environments.get_environments_pending_creation(self.NOW)
         assert len(envs_pending_creation) == 1
 
+    def test_with_pending_csp_operation(self, session):
+        self.create_portfolio_with_clins(
+            [(self.YESTERDAY, self.TOMORROW)],
+            app_data={"cloud_id": uuid4().hex},
+            env_data={"csp_operation": {"status_url": "https://status"}},
+        )
+        assert len(Environments.get_environments_pending_creation(self.NOW)) == 0
+
+
+class TestClaimPendingCreation(EnvQueryTest):
+    def test_claims_disjoint_batches(self, session):
+        for _ in range(3):
+            self.create_portfolio_with_clins(
+                [(self.YESTERDAY, self.TOMORROW), (self.YESTERDAY, self.TOMORROW)],
+                app_data={"cloud_id": uuid4().hex},
+            )
+
+        first = Environments.claim_pending_creation(self.NOW, limit=2)
+        second = Environments.claim_pending_creation(self.NOW, limit=2)
+
+        assert len(first) == 2
+        assert len(second) == 1
+        assert {e.id for e in first}.isdisjoint({e.id for e in second})
+        assert Environments.get_environments_pending_creation(self.NOW) == []
+
 
 def test_create_many_environments_will_skip_already_created_names():
     application = ApplicationFactory.create()
@@ -0,0 +1,81 @@
+import pendulum
+
+from atat.database import db
+from atat.domain.portfolios import PortfolioStageRuns
+from atat.domain.portfolios.stage_runs import prometheus_metrics
+from atat.models import PortfolioStageRun, StageOutcome
+from tests.factories import PortfolioFactory
+
+
+def add_runs(state_machine, stage, runs, time_created=None):
+    for attempt, (outcome, duration_ms) in enumerate(runs, start=1):
+        db.session.add(
+            PortfolioStageRun(
+                portfolio_state_machine_id=state_machine.id,
+                stage=stage,
+                outcome=outcome,
+                attempt=attempt,
+                duration_ms=duration_ms,
+                time_created=time_created,
+            )
+        )
+    db.session.commit()
+
+
+def test_timings_summarise_runs_per_stage_in_provisioning_order(session):
+    session.query(PortfolioStageRun).delete()
+    state_machine = PortfolioFactory.create(state="TENANT_CREATED").state_machine
+    add_runs(
+        state_machine,
+        "billing_profile_creation",
+        [(StageOutcome.RESET, 100), (StageOutcome.FINISHED, 300)],
+    )
+    add_runs(
+        state_machine,
+        "tenant",
+        [(StageOutcome.FAILED, 1000), (StageOutcome.FINISHED, 3000)],
+    )
+    add_runs(
+        state_machine,
+        "policies",
+        [(StageOutcome.FINISHED, 50)],
+        time_created=pendulum.now(tz="UTC").subtract(days=10),
+    )
+
+    tenant, billing, policies = PortfolioStageRuns.timings(quantiles=(0.5, 1.0))
+
+    assert (tenant.stage, billing.stage, policies.stage) == (
+        "tenant",
+        "billing_profile_creation",
+        "policies",
+    )
+    assert (tenant.runs, tenant.finished, tenant.failed, tenant.reset) == (2, 1, 1, 0)
+    assert tenant.max_attempt == 2
+    assert tenant.total_ms == 4000
+    assert tenant.percentiles_ms == {0.5: 2000, 1.0: 3000}
+    assert billing.reset == 1
+
+    recent = PortfolioStageRuns.timings(since=pendulum.now(tz="UTC").subtract(days=1))
+    assert [timing.stage for timing in recent] == ["tenant", "billing_profile_creation"]
+
+
+def test_prometheus_metrics(session):
+    session.query(PortfolioStageRun).delete()
+    state_machine = PortfolioFactory.create(state="TENANT_CREATED").state_machine
+    add_runs(state_machine, "tenant", [(StageOutcome.FINISHED, 1500)])
+
+    metrics = prometheus_metrics(PortfolioStageRuns.timings(quantiles=(0.5,)))
+
+    assert "# TYPE atat_portfolio_stage_duration_seconds summary" in metrics
+    assert (
+        'atat_portfolio_stage_duration_seconds{stage="tenant",quantile="0.5"} 1.5'
+        in metrics
+    )
+    assert 'atat_portfolio_stage_duration_seconds_count{stage="tenant"} 1' in metrics
+    assert (
+        'atat_portfolio_stage_runs_total{stage="tenant",outcome="finished"} 1'
+        in metrics
+    )
+    assert (
+        'atat_portfolio_stage_runs_total{stage="tenant",outcome="failed"} 0' in metrics
+    )
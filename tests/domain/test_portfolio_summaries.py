@@ -0,0 +1,119 @@
+from unittest.mock import Mock
+
+import pytest
+from redis.exceptions import RedisError
+
+from atat.database import db
+from atat.domain.portfolios import Portfolios
+from atat.domain.portfolios.summaries import PortfolioSummary, PortfolioSummaryCache
+from atat.models import ApplicationRoleStatus, PortfolioRoleStatus
+from tests.factories import (
+    ApplicationFactory,
+    ApplicationRoleFactory,
+    PortfolioFactory,
+    PortfolioRoleFactory,
+    UserFactory,
+)
+
+
+@pytest.fixture
+def cache(app):
+    return app.portfolio_summaries
+
+
+@pytest.fixture
+def user():
+    return UserFactory.create()
+
+
+def loader(user):
+    return Mock(side_effect=lambda: Portfolios.for_user(user))
+
+
+def test_caches_summaries_per_user(cache, user):
+    portfolio = PortfolioFactory.create(owner=user)
+    load = loader(user)
+
+    assert cache.for_user(user, load) == [
+        PortfolioSummary(portfolio.id, portfolio.name)
+    ]
+    assert cache.for_user(user, load) == [
+        PortfolioSummary(portfolio.id, portfolio.name)
+    ]
+    assert load.call_count == 1
+
+
+def test_role_changes_invalidate_the_users_entry(cache, user):
+    first = PortfolioFactory.create(owner=user)
+    load = loader(user)
+    cache.for_user(user, load)
+
+    second = PortfolioFactory.create()
+    PortfolioRoleFactory.create(
+        user=user, portfolio=second, status=PortfolioRoleStatus.ACTIVE
+    )
+    third = PortfolioFactory.create()
+    ApplicationRoleFactory.create(
+        user=user,
+        application=ApplicationFactory.create(portfolio=third),
+        status=ApplicationRoleStatus.ACTIVE,
+    )
+
+    assert {s.id for s in cache.for_user(user, load)} == {
+        first.id,
+        second.id,
+        third.id,
+    }
+    assert load.call_count == 2
+
+
+def test_renaming_a_portfolio_invalidates_every_entry(cache, user):
+    portfolio = PortfolioFactory.create(owner=user)
+    load = loader(user)
+    cache.for_user(user, load)
+
+    portfolio.csp_data = {"tenant_id": "unrelated"}
+    db.session.commit()
+    cache.for_user(user, load)
+    assert load.call_count == 1
+
+    portfolio.name = "Renamed"
+    db.session.commit()
+    assert cache.for_user(user, load) == [PortfolioSummary(portfolio.id, "Renamed")]
+    assert load.call_count == 2
+
+
+def test_rolled_back_changes_do_not_invalidate(cache, user):
+    portfolio = PortfolioFactory.create(owner=user)
+    user_id = user.id
+    summaries = cache.for_user(user, loader(user))
+
+    portfolio.name = "Renamed"
+    db.session.flush()
+    db.session.rollback()
+
+    load = Mock(return_value=[])
+    assert cache.for_user(Mock(id=user_id), load) == summaries
+    load.assert_not_called()
+
+
+def test_loads_from_database_when_redis_fails(app, user):
+    portfolio = PortfolioFactory.create(owner=user)
+    redis = Mock(mget=Mock(side_effect=RedisError))
+    cache = PortfolioSummaryCache(redis)
+
+    assert cache.for_user(user, loader(user)) == [
+        PortfolioSummary(portfolio.id, portfolio.name)
+    ]
+
+
+def test_zero_ttl_disables_cache(user):
+    redis = Mock()
+    cache = PortfolioSummaryCache(redis, ttl=0)
+    load = loader(user)
+
+    cache.for_user(user, load)
+    cache.for_user(user, load)
+
+    assert load.call_count == 2
+    redis.mget.assert_not_called()
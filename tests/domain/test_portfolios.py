@@ -4,6 +4,7 @@ import pytest
 
 from atat.domain.applications import Applications
 from atat.domain.exceptions import NotFoundError
+from atat.domain.invitations import PortfolioInvitations
 from atat.domain.permission_sets import PermissionSets
 from atat.domain.portfolios import (
     PortfolioDeletionApplicationsExistError,
@@ -19,7 +20,7 @@ from tests.factories import (
     UserFactory,
     get_all_portfolio_permission_sets,
 )
-from tests.utils import EnvQueryTest
+from tests.utils import EnvQueryTest, captured_statements
 
 
 @pytest.fixture(scope="function")
@@ -202,6 +203,41 @@ def test_invite():
     assert invitation.dod_id == member_data["dod_id"]
 
 
+def test_invite_many():
+    portfolio = PortfolioFactory.create()
+    inviter = UserFactory.create()
+    members_data = [
+        {
+            "user_data": UserFactory.dictionary(),
+            "permission_sets": [PermissionSets.EDIT_PORTFOLIO_FUNDING],
+        },
+        {"user_data": UserFactory.dictionary()},
+    ]
+
+    with captured_statements() as statements:
+        sent = Portfolios.invite_many(portfolio, inviter, members_data)
+
+    # one query for the permission sets and one insert per table
+    assert len([s for s in statements if "FROM permission_sets" in s]) == 1
+    inserts = [s.split(" (")[0] for s in statements if s.startswith("INSERT")]
+    assert sorted(inserts) == [
+        "INSERT INTO portfolio_invitations",
+        "INSERT INTO portfolio_roles",
+        "INSERT INTO portfolio_roles_permission_sets",
+    ]
+    assert [email for email, _ in sent] == [
+        member_data["user_data"]["email"] for member_data in members_data
+    ]
+    invitations = [PortfolioInvitations._get(token) for _, token in sent]
+    assert [invitation.dod_id for invitation in invitations] == [
+        member_data["user_data"]["dod_id"] for member_data in members_data
+    ]
+    assert all(invitation.role.portfolio == portfolio for invitation in invitations)
+    # view permissions are always granted, as for a single invite
+    assert len(invitations[0].role.permission_sets) == 6
+    assert len(invitations[1].role.permission_sets) == 5
+
+
 def test_delete_success():
     portfolio = PortfolioFactory.create()
 
@@ -245,6 +281,30 @@ def test_for_user_does_not_include_deleted_application_roles():
     assert len(Portfolios.for_user(user2)) == 0
 
 
+def test_for_user_lists_each_portfolio_once_in_name_order():
+    user = UserFactory.create()
+    second = PortfolioFactory.create(name="B portfolio", owner=user)
+    ApplicationRoleFactory.create(
+        status=ApplicationRoleStatus.ACTIVE,
+        user=user,
+        application=ApplicationFactory.create(portfolio=second),
+    )
+    first = PortfolioFactory.create(name="A portfolio")
+    for _ in range(2):
+        ApplicationRoleFactory.create(
+            status=ApplicationRoleStatus.ACTIVE,
+            user=user,
+            application=ApplicationFactory.create(portfolio=first),
+        )
+    ApplicationRoleFactory.create(
+        status=ApplicationRoleStatus.DISABLED,
+        user=user,
+        application=ApplicationFactory.create(),
+    )
+
+    assert Portfolios.for_user(user) == [first, second]
+
+
 def test_create_state_machine(portfolio):
     fsm = PortfolioStateMachines.create(portfolio)
     assert fsm
@@ -1,6 +1,10 @@
 from decimal import Decimal
+from unittest.mock import Mock
+from uuid import uuid4
 
-from atat.domain.reports import Reports
+import pytest
+
+from atat.domain.reports import PortfolioSpendingCache, Reports
 from tests.factories import PortfolioFactory
 
 
@@ -35,3 +39,52 @@ class TestGetPortfolioSpending:
         data = Reports.get_portfolio_spending(portfolio)
         assert data["invoiced"] == Decimal(0)
         assert data["estimated"] == Decimal(0)
+
+
+class TestCachedPortfolioSpending:
+    @pytest.fixture
+    def cache(self, app, monkeypatch):
+        cache = PortfolioSpendingCache(app.redis, key_prefix=f"test:{uuid4()}")
+        monkeypatch.setattr(app, "portfolio_spending", cache)
+        monkeypatch.setitem(app.config, "PORTFOLIO_SPENDING_CACHE_TTL", 60)
+        return cache
+
+    @pytest.fixture
+    def refresh(self, monkeypatch):
+        refresh = Mock()
+        monkeypatch.setattr("atat.jobs.refresh_portfolio_spending", refresh)
+        return refresh
+
+    @pytest.fixture
+    def portfolio(self):
+        portfolio = PortfolioFactory.create(state="COMPLETED")
+        portfolio.csp_data = TestGetPortfolioSpending.csp_data
+        return portfolio
+
+    def test_miss_requests_one_refresh(self, cache, refresh, portfolio):
+        data = Reports.get_cached_portfolio_spending(portfolio)
+        assert data["retrieved"] is None
+        assert data["invoiced"] == Decimal(0)
+
+        Reports.get_cached_portfolio_spending(portfolio)
+        refresh.delay.assert_called_once_with(portfolio_id=portfolio.id)
+
+    def test_serves_refreshed_spending(self, cache, refresh, portfolio):
+        assert cache.claim_refresh(portfolio.id)
+        Reports.refresh_portfolio_spending(portfolio)
+
+        data = Reports.get_cached_portfolio_spending(portfolio)
+        assert data["invoiced"] == Decimal(1551.0)
+        assert data["estimated"] == Decimal(500.0)
+        assert data["retrieved"] is not None
+        refresh.delay.assert_not_called()
+
+        assert Reports.request_spending_refresh(portfolio.id)
+        refresh.delay.assert_called_once_with(portfolio_id=portfolio.id)
+
+    def test_reads_from_api_when_disabled(self, app, cache, refresh, portfolio):
+        app.config["PORTFOLIO_SPENDING_CACHE_TTL"] = 0
+        data = Reports.get_cached_portfolio_spending(portfolio)
+        assert data["invoiced"] == Decimal(1551.0)
+        assert data["retrieved"] is not None
+        refresh.delay.assert_not_called()
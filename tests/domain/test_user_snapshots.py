@@ -0,0 +1,174 @@
+from unittest.mock import Mock
+
+import pendulum
+import pytest
+from flask import session
+from redis.exceptions import RedisError
+
+from atat.database import db
+from atat.domain.auth import get_current_user
+from atat.domain.authz import Authorization
+from atat.domain.permission_sets import PermissionSets
+from atat.domain.portfolio_roles import PortfolioRoles
+from atat.domain.user_snapshots import UserSnapshotCache
+from atat.domain.users import Users
+from atat.models import PermissionSet
+from atat.models.permissions import Permissions
+from tests.factories import PortfolioFactory, PortfolioRoleFactory, UserFactory
+from tests.utils import captured_statements
+
+
+@pytest.fixture
+def cache(app, monkeypatch):
+    cache = UserSnapshotCache(app.redis, ttl=60)
+    monkeypatch.setattr(app, "user_snapshots", cache)
+    return cache
+
+
+@pytest.fixture
+def user():
+    return UserFactory.create(last_login=pendulum.now(tz="UTC"))
+
+
+def loader():
+    return Mock(side_effect=Users.get_with_roles)
+
+
+def test_restores_user_from_snapshot_without_a_query(cache, user):
+    load = loader()
+    cache.get(user.id, load)
+    db.session.expunge_all()
+
+    with captured_statements() as statements:
+        snapshot = cache.get(user.id, load)
+        assert (snapshot.id, snapshot.dod_id, snapshot.last_login) == (
+            user.id,
+            user.dod_id,
+            user.last_login,
+        )
+        assert snapshot.profile_complete
+
+    assert statements == []
+    assert load.call_count == 1
+    assert snapshot in db.session
+
+
+def test_snapshot_lazy_loads_roles(cache, user):
+    role_id = PortfolioRoleFactory.create(
+        user=user, portfolio=PortfolioFactory.create()
+    ).id
+    cache.get(user.id, loader())
+    db.session.expunge_all()
+
+    snapshot = cache.get(user.id, loader())
+    assert [role.id for role in snapshot.portfolio_roles] == [role_id]
+
+
+def test_committed_changes_replace_the_snapshot(cache, user):
+    load = loader()
+    cache.get(user.id, load)
+
+    Users.update(user, {"first_name": "Changed"})
+    db.session.expunge_all()
+
+    assert cache.get(user.id, load).first_name == "Changed"
+    assert load.call_count == 2
+
+
+def test_snapshot_authorizes_the_request_without_a_query(app, cache, user):
+    role = PortfolioRoleFactory.create(
+        user=user,
+        permission_sets=[PermissionSets.get(PermissionSets.VIEW_PORTFOLIO_FUNDING)],
+    )
+    portfolio = role.portfolio
+    cache.get(user.id, loader())
+
+    with app.test_request_context():
+        with captured_statements() as statements:
+            snapshot = cache.get(user.id, loader())
+            assert Authorization.has_portfolio_permission(
+                snapshot, portfolio, Permissions.VIEW_PORTFOLIO_FUNDING
+            )
+            assert not Authorization.has_portfolio_permission(
+                snapshot, portfolio, Permissions.EDIT_PORTFOLIO_NAME
+            )
+
+    assert statements == []
+
+
+def test_role_changes_replace_the_snapshot(cache, user):
+    role = PortfolioRoleFactory.create(user=user)
+    load = loader()
+    cache.get(user.id, load)
+
+    PortfolioRoles.disable(role)
+    cache.get(user.id, load)
+
+    assert load.call_count == 2
+
+
+def test_permission_set_changes_replace_every_snapshot(cache, user):
+    load = loader()
+    cache.get(user.id, load)
+
+    permission_set = db.session.query(PermissionSet).first()
+    permission_set.display_name = "Changed"
+    db.session.commit()
+    cache.get(user.id, load)
+
+    assert load.call_count == 2
+
+
+def test_snapshot_loaded_during_a_change_is_not_used(cache, user):
+    def load_then_change(user_id):
+        loaded = Users.get_with_roles(user_id)
+        cache.invalidate([user_id])
+        return loaded
+
+    cache.get(user.id, load_then_change)
+    load = loader()
+    cache.get(user.id, load)
+
+    assert load.call_count == 1
+
+
+def test_snapshot_of_other_columns_is_not_used(cache, user):
+    cache.redis.set(
+        cache._user_key(user.id),
+        '{"version": 0, "columns": {"id": "%s", "removed": null}}' % user.id,
+    )
+    load = loader()
+
+    assert cache.get(user.id, load) == user
+    assert load.call_count == 1
+
+
+def test_loads_from_database_when_redis_fails(app, user):
+    cache = UserSnapshotCache(Mock(mget=Mock(side_effect=RedisError)), ttl=60)
+
+    assert cache.get(user.id, loader()) == user
+
+
+def test_zero_ttl_disables_snapshots(user):
+    redis = Mock()
+    cache = UserSnapshotCache(redis, ttl=0)
+    load = loader()
+
+    cache.get(user.id, load)
+    cache.get(user.id, load)
+
+    assert load.call_count == 2
+    redis.mget.assert_not_called()
+
+
+@pytest.mark.parametrize("method, snapshot_used", [("GET", True), ("POST", False)])
+def test_current_user_uses_snapshots_for_read_only_requests(
+    app, cache, user, method, snapshot_used
+):
+    cache.get(user.id, loader())
+    with app.test_request_context(method=method):
+        session["user_id"] = user.id
+        with captured_statements() as statements:
+            assert get_current_user() == user
+
+    assert (statements == []) == snapshot_used
@@ -11,6 +11,7 @@ from tests.factories import (
     PortfolioFactory,
     UserFactory,
 )
+from tests.utils import captured_statements
 
 DOD_ID = "my_dod_id"
 REQUIRED_KWARGS = {"first_name": "Luke", "last_name": "Skywalker"}
@@ -108,3 +109,26 @@ def test_revoke_ccpo_perms():
     Users.revoke_ccpo_perms(ccpo)
     ccpo_users = Users.get_ccpo_users()
     assert ccpo not in ccpo_users
+
+
+def test_get_user_with_roles_loads_roles_up_front(session):
+    user = UserFactory.create()
+    for _ in range(3):
+        ApplicationRoleFactory.create(
+            user=user, application=ApplicationFactory.create()
+        )
+    session.expire_all()
+
+    user = Users.get_with_roles(user.id)
+    with captured_statements() as statements:
+        for role in user.portfolio_roles + user.application_roles:
+            role.permission_sets
+        user.permission_sets
+
+    assert len(user.application_roles) == 3
+    assert statements == []
+
+
+def test_get_nonexistent_user_with_roles():
+    with pytest.raises(NotFoundError):
+        Users.get_with_roles(uuid4())
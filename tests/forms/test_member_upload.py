@@ -0,0 +1,53 @@
+import pytest
+
+from atat.forms.application_member import NewForm as NewApplicationMemberForm
+from atat.forms.member_upload import MemberUploadError, validate_member_rows
+from atat.forms.portfolio_member import NewForm
+from tests.factories import UserFactory
+
+
+@pytest.fixture
+def csrf_enabled_app(app):
+    app.config.update({"WTF_CSRF_ENABLED": True})
+    yield app
+    app.config.update({"WTF_CSRF_ENABLED": False})
+
+
+def _row(**kwargs):
+    member = UserFactory.build().to_dictionary()
+    row = {key: member[key] for key in ("first_name", "last_name", "email", "dod_id")}
+    return {**row, **kwargs}
+
+
+@pytest.mark.parametrize("form_class", [NewForm, NewApplicationMemberForm])
+def test_validate_member_rows_with_csrf_enabled(csrf_enabled_app, form_class):
+    rows = [_row(), _row()]
+
+    with csrf_enabled_app.test_request_context(method="POST"):
+        members = validate_member_rows(rows, form_class)
+
+    assert [member["user_data"]["dod_id"] for member in members] == [
+        row["dod_id"] for row in rows
+    ]
+
+
+def test_validate_member_rows_grants_permissions(app):
+    rows = [_row(), _row(funding="yes")]
+
+    with app.test_request_context(method="POST"):
+        members = validate_member_rows(rows, NewForm)
+
+    assert not members[0]["perms_funding"]
+    assert members[1]["perms_funding"]
+
+
+def test_validate_member_rows_reports_every_invalid_row(app):
+    rows = [_row(email="not an email"), _row(), _row(dod_id="123")]
+
+    with app.test_request_context(method="POST"):
+        with pytest.raises(MemberUploadError) as error:
+            validate_member_rows(rows, NewForm)
+
+    assert len(error.value.errors) == 2
+    assert error.value.errors[0].startswith("Row 1")
+    assert error.value.errors[1].startswith("Row 3")
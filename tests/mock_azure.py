@@ -12,6 +12,17 @@ AZURE_CONFIG = {
     "AZURE_CALC_RESOURCE": "http://calc",
     "AZURE_CLIENT_ID": "MOCK",
     "AZURE_SECRET_KEY": "MOCK",
+    "AZURE_CREDENTIAL_CACHE_SIZE": 256,
+    "AZURE_CREDENTIAL_CACHE_TTL": 300,
+    "AZURE_GRAPH_BATCHING": False,
+    "AZURE_HTTP_BACKOFF_FACTOR": 0,
+    "AZURE_HTTP_MAX_RETRIES": 0,
+    "AZURE_HTTP_POOL_SIZE": 1,
+    "AZURE_HTTP_TIMEOUT": 30,
+    "AZURE_NONBLOCKING_MGMT_GROUPS": False,
+    "AZURE_THROTTLING": False,
+    "AZURE_TOKEN_CACHE_REDIS": False,
+    "AZURE_TOKEN_REFRESH_MARGIN": 300,
     "AZURE_TENANT_ID": "MOCK",
     "AZURE_POLICY_LOCATION": "policies",
     "AZURE_VAULT_URL": "http://vault",
@@ -61,8 +72,8 @@ class MockAzureSDK(object):
 def mock_azure(monkeypatch):
     monkeypatch.setattr(
         atat.domain.csp.cloud.azure_cloud_provider,
-        "get_principal_auth_token",
-        Mock(return_value=MOCK_ACCESS_TOKEN),
+        "get_principal_auth_token_response",
+        Mock(return_value={"access_token": MOCK_ACCESS_TOKEN, "expires_in": 3599}),
     )
     monkeypatch.setattr(
         AzureCloudProvider,
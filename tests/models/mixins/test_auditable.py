@@ -1,5 +1,12 @@
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
 from atat.database import db
 from atat.domain.users import Users
+from atat.models import AuditEvent, PortfolioRole
 from atat.models.mixins.auditable import AuditableMixin
 from tests.factories import UserFactory
 
@@ -51,3 +58,68 @@ def test_logging_audit_event_on_update(mock_logger):
     assert event_log["action"] == "update"
 
     assert "update" in mock_logger.extras[1]["tags"]
+
+
+@pytest.mark.audit_log
+def test_audit_events_are_written_in_one_insert_per_flush(session, monkeypatch):
+    save_many = Mock(wraps=AuditEvent.save_many)
+    monkeypatch.setattr(AuditEvent, "save_many", save_many)
+
+    users = [UserFactory.build() for _ in range(3)]
+    session.add_all(users)
+    session.commit()
+
+    save_many.assert_called_once()
+    assert len(save_many.call_args[0][1]) == 3
+    for user in users:
+        assert session.query(AuditEvent).filter_by(resource_id=user.id).count() == 1
+
+
+@pytest.mark.audit_log
+def test_audit_events_are_queued_after_commit(app, session, monkeypatch):
+    monkeypatch.setitem(app.config, "AUDIT_LOG_ASYNC", True)
+    writer = Mock()
+    monkeypatch.setattr("atat.jobs.write_audit_events", writer)
+
+    user = UserFactory.build()
+    session.add(user)
+    session.flush()
+    writer.delay.assert_not_called()
+
+    session.commit()
+    writer.delay.assert_called_once()
+    (events,) = writer.delay.call_args[0]
+    assert [event["resource_id"] for event in events] == [user.id]
+    assert session.query(AuditEvent).filter_by(resource_id=user.id).count() == 0
+
+
+@pytest.mark.audit_log
+def test_queued_audit_events_are_discarded_on_rollback(app, session, monkeypatch):
+    monkeypatch.setitem(app.config, "AUDIT_LOG_ASYNC", True)
+    writer = Mock()
+    monkeypatch.setattr("atat.jobs.write_audit_events", writer)
+
+    session.add(UserFactory.build())
+    session.flush()
+    session.rollback()
+    session.commit()
+
+    writer.delay.assert_not_called()
+
+
+@pytest.mark.audit_log
+def test_audit_events_from_a_failed_flush_are_discarded(session):
+    session.begin_nested()
+    user = UserFactory.build()
+    # The user is inserted, but the flush fails on the role's missing portfolio
+    session.add(PortfolioRole(user=user, portfolio_id=uuid4()))
+    with pytest.raises(IntegrityError):
+        session.flush()
+    session.rollback()
+
+    other = UserFactory.build()
+    session.add(other)
+    session.commit()
+
+    assert session.query(AuditEvent).filter_by(resource_id=user.id).count() == 0
+    assert session.query(AuditEvent).filter_by(resource_id=other.id).count() == 1
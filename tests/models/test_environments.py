@@ -50,6 +50,18 @@ def test_audit_event_for_environment_deletion(session):
     assert after
 
 
+@pytest.mark.audit_log
+def test_audit_event_for_environment_role_creation(session):
+    env_role = EnvironmentRoleFactory.create(role=CSPRole.ADMIN)
+
+    create_event = (
+        session.query(AuditEvent)
+        .filter(AuditEvent.resource_id == env_role.id, AuditEvent.action == "create")
+        .one()
+    )
+    assert create_event.display_name == CSPRole.ADMIN.value
+
+
 def test_environment_roles_do_not_include_deleted():
     member_list = [
         {"role_name": CSPRole.ADMIN},
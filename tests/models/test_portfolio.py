@@ -3,6 +3,7 @@ from decimal import Decimal
 import pendulum
 import pytest
 
+from atat.models.portfolio_funding import FundingSummary, funding_summaries
 from tests.factories import (
     ApplicationFactory,
     CLINFactory,
@@ -11,6 +12,7 @@ from tests.factories import (
     random_future_date,
     random_past_date,
 )
+from tests.utils import captured_statements
 
 
 @pytest.fixture(scope="function")
@@ -190,6 +192,49 @@ class TestUpcomingObligatedFunds:
         assert portfolio.upcoming_obligated_funds == Decimal(700.0)
 
 
+class TestFundingSummary:
+    def test_summarizes_several_portfolios(
+        self, past_task_order, current_task_order, upcoming_task_order
+    ):
+        funded = PortfolioFactory(
+            task_orders=[past_task_order, current_task_order, upcoming_task_order]
+        )
+        empty = PortfolioFactory()
+
+        summaries = funding_summaries([funded.id, empty.id])
+
+        today = pendulum.today(tz="UTC").date()
+        assert summaries[funded.id] == FundingSummary(
+            obligated=Decimal(1000.0),
+            upcoming=Decimal(700.0),
+            start_date=today.subtract(days=1),
+            end_date=today.add(days=1),
+            days_to_expiration=1,
+        )
+        assert summaries[empty.id] == FundingSummary()
+
+    def test_unsigned_task_orders_are_excluded(self, current_task_order):
+        portfolio = PortfolioFactory(
+            task_orders=[{**current_task_order, "signed_at": None}]
+        )
+        assert portfolio.funding_summary == FundingSummary()
+
+    def test_reused_within_a_request(self, app, current_task_order):
+        portfolio = PortfolioFactory(task_orders=[current_task_order])
+        assert portfolio.id
+
+        with app.test_request_context():
+            with captured_statements() as statements:
+                assert portfolio.total_obligated_funds == Decimal(1000.0)
+                portfolio.upcoming_obligated_funds
+                portfolio.funding_duration
+                portfolio.days_to_funding_expiration
+            assert len(statements) == 1
+
+            TaskOrderFactory.create(portfolio=portfolio, **current_task_order)
+            assert portfolio.total_obligated_funds == Decimal(2000.0)
+
+
 class TestInitialClinDict:
     def test_formats_dict_correctly(self):
         portfolio = PortfolioFactory()
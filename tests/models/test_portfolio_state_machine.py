@@ -5,7 +5,9 @@ import pydantic
 import pytest
 from pytest import raises
 
+from atat.database import db
 from atat.domain.csp.cloud.models import AliasModel
+from atat.models import PortfolioStageRun, StageOutcome
 from atat.models.mixins.state_machines import (
     AzureStages,
     PortfolioStates,
@@ -146,6 +148,58 @@ class Test_after_in_progress_callback:
             == PortfolioStates.TASK_ORDER_BILLING_CREATION_CREATED
         )
 
+    @patch("atat.models.PortfolioStateMachine._do_provisioning_stage")
+    def test_records_stage_runs(self, _do_provisioning_stage, mock_logger):
+        portfolio = PortfolioFactory.create(state="TENANT_IN_PROGRESS")
+        state_machine = portfolio.state_machine
+        _do_provisioning_stage.side_effect = [
+            Exception,
+            AliasModel(reset_stage=True),
+            AliasModel(),
+        ]
+
+        with raises(Exception):
+            state_machine.after_in_progress_callback(Mock())
+        for state in ["TENANT_IN_PROGRESS", "TENANT_IN_PROGRESS"]:
+            state_machine.state = state
+            state_machine.after_in_progress_callback(Mock())
+
+        runs = (
+            db.session.query(PortfolioStageRun)
+            .filter_by(portfolio_state_machine_id=state_machine.id)
+            .order_by(PortfolioStageRun.attempt)
+            .all()
+        )
+        assert [(run.stage, run.outcome, run.attempt) for run in runs] == [
+            ("tenant", StageOutcome.FAILED, 1),
+            ("tenant", StageOutcome.RESET, 2),
+            ("tenant", StageOutcome.FINISHED, 3),
+        ]
+        assert all(run.duration_ms >= 0 for run in runs)
+        stage_logs = [
+            extra["metrics"]
+            for extra in mock_logger.extras
+            if extra.get("tags") == ["portfolio_stage"]
+        ]
+        assert [log["outcome"] for log in stage_logs] == ["failed", "reset", "finished"]
+        assert stage_logs[-1]["retries"] == 2
+        # the next stage counts its attempts from 1
+        assert state_machine.stage_attempts == 0
+
+    @patch("atat.models.portfolio_state_machine.PortfolioStageRun")
+    @patch("atat.models.PortfolioStateMachine._do_provisioning_stage")
+    def test_stage_run_errors_do_not_change_transitions(
+        self, _do_provisioning_stage, PortfolioStageRun, mock_logger
+    ):
+        portfolio = PortfolioFactory.create(state="TENANT_IN_PROGRESS")
+        _do_provisioning_stage.side_effect = [AliasModel()]
+        PortfolioStageRun.side_effect = Exception
+
+        portfolio.state_machine.after_in_progress_callback(Mock())
+
+        assert portfolio.state_machine.state == PortfolioStates.TENANT_CREATED
+        assert any("Could not record" in message for message in mock_logger.messages)
+
 
 @pytest.mark.state_machine
 def test_current_state_property(state_machine):
@@ -1,7 +1,13 @@
 from threading import Thread
 
 from atat.domain.exceptions import ClaimFailedException
-from atat.models.utils import claim_for_update, claim_many_for_update
+from atat.models import Environment
+from atat.models.utils import (
+    claim_batch,
+    claim_for_update,
+    claim_many_for_update,
+    release_claims,
+)
 from tests.factories import EnvironmentFactory
 
 
@@ -101,3 +107,34 @@ def test_claim_many_for_update(session):
 
     # The claim is released
     # assert environment.claimed_until is None
+
+
+def test_claim_batch(session):
+    environments = [EnvironmentFactory.create() for _ in range(3)]
+    query = session.query(Environment).filter(
+        Environment.id.in_([e.id for e in environments])
+    )
+
+    first = claim_batch(query, limit=2)
+    second = claim_batch(query, limit=2)
+
+    assert len(first) == 2
+    assert len(second) == 1
+    assert {e.id for e in first}.isdisjoint({e.id for e in second})
+    assert all(e.claimed_until for e in first + second)
+    assert claim_batch(query, limit=2) == []
+
+
+def test_release_claims(session):
+    environments = [EnvironmentFactory.create() for _ in range(2)]
+    query = session.query(Environment).filter(
+        Environment.id.in_([e.id for e in environments])
+    )
+
+    with release_claims(claim_batch(query, limit=2)) as claimed:
+        assert len(claimed) == 2
+
+    for env in environments:
+        session.refresh(env)
+        assert env.claimed_until is None
+    assert len(claim_batch(query, limit=2)) == 2
@@ -9,7 +9,7 @@ from werkzeug.datastructures import ImmutableMultiDict
 from atat.database import db
 from atat.domain.application_roles import ApplicationRoles
 from atat.domain.applications import Applications
-from atat.domain.common import Paginator
+from atat.domain.common import KeysetPage
 from atat.domain.csp.cloud.azure_cloud_provider import AzureCloudProvider
 from atat.domain.csp.cloud.exceptions import GeneralCSPException
 from atat.domain.csp.cloud.models import (
@@ -35,7 +35,7 @@ from atat.routes.applications.settings import (
 )
 from tests.factories import *
 from tests.mock_azure import mock_azure
-from tests.utils import captured_templates
+from tests.utils import captured_statements, captured_templates
 
 
 def test_updating_application_environments_success(client, user_session):
@@ -165,7 +165,7 @@ def test_edit_application_environments_obj(app, client, user_session):
             "user_name": app_role2.user_name,
             "status": env_role2.status.value,
         } in env_obj["members"]
-        assert isinstance(context["audit_events"], Paginator)
+        assert isinstance(context["audit_events"], KeysetPage)
 
 
 def test_get_environments_obj_for_app(app, client, user_session):
@@ -225,6 +225,34 @@ def test_get_members_data(app, client, user_session):
         assert isinstance(member["form"], UpdateMemberForm)
 
 
+def test_settings_page_queries_do_not_grow_with_members(app, client, user_session):
+    def settings_page_statements(member_count, environment_count):
+        application = ApplicationFactory.create()
+        environments = [
+            EnvironmentFactory.create(application=application)
+            for _ in range(environment_count)
+        ]
+        for i in range(member_count):
+            member = ApplicationRoleFactory.create(
+                application=application, user=None if i % 2 else UserFactory.create()
+            )
+            for environment in environments:
+                EnvironmentRoleFactory.create(
+                    environment=environment, application_role=member
+                )
+
+        user_session(application.portfolio.owner)
+        db.session.expire_all()
+        with captured_statements() as statements:
+            response = client.get(
+                url_for("applications.settings", application_id=application.id)
+            )
+        assert response.status_code == 200
+        return statements
+
+    assert len(settings_page_statements(2, 1)) == len(settings_page_statements(20, 5))
+
+
 def test_user_with_permission_can_update_application(client, user_session):
     owner = UserFactory.create()
     portfolio = PortfolioFactory.create(
@@ -440,6 +468,38 @@ def test_create_member(monkeypatch, client, user_session, session):
     assert job_mock.called
 
 
+def test_create_members(monkeypatch, client, user_session, session):
+    job_mock = Mock()
+    monkeypatch.setattr("atat.jobs.send_mails.delay", job_mock)
+    members = [UserFactory.build().to_dictionary() for _ in range(2)]
+    application = ApplicationFactory.create(environments=[{"name": "Naboo"}])
+    user_session(application.portfolio.owner)
+
+    response = client.post(
+        url_for("applications.create_members", application_id=application.id),
+        json={
+            "members": [
+                {
+                    "first_name": member["first_name"],
+                    "last_name": member["last_name"],
+                    "email": member["email"],
+                    "dod_id": member["dod_id"],
+                    "team_mgmt": True,
+                }
+                for member in members
+            ]
+        },
+    )
+
+    assert response.status_code == 201
+    assert response.json == {"invited": 2}
+    assert len(application.roles) == 2
+    for role in application.roles:
+        assert len(role.permission_sets) == 2
+        assert not role.environment_roles
+    job_mock.assert_called_once()
+
+
 def test_remove_member_success(client, user_session):
     user = UserFactory.create()
     application = ApplicationFactory.create()
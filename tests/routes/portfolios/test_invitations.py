@@ -1,3 +1,4 @@
+import io
 from unittest.mock import Mock
 
 import pendulum
@@ -293,3 +294,58 @@ def test_invite_member(monkeypatch, client, user_session, session):
 
     assert job_mock.called
     assert len(invitation.role.permission_sets) == 5
+
+
+def test_invite_members_from_csv(monkeypatch, client, user_session, session):
+    job_mock = Mock()
+    monkeypatch.setattr("atat.jobs.send_mails.delay", job_mock)
+    members = [UserFactory.build().to_dictionary() for _ in range(3)]
+    portfolio = PortfolioFactory.create()
+    user_session(portfolio.owner)
+
+    csv_file = "first_name,last_name,email,dod_id,funding\n" + "".join(
+        f"{m['first_name']},{m['last_name']},{m['email']},{m['dod_id']},yes\n"
+        for m in members
+    )
+    response = client.post(
+        url_for("portfolios.invite_members", portfolio_id=portfolio.id),
+        data={"members_file": (io.BytesIO(csv_file.encode()), "members.csv")},
+    )
+
+    assert response.status_code == 302
+    invitations = (
+        session.query(PortfolioInvitation)
+        .filter(PortfolioInvitation.dod_id.in_([m["dod_id"] for m in members]))
+        .all()
+    )
+    assert len(invitations) == 3
+    assert all(len(invite.role.permission_sets) == 6 for invite in invitations)
+    # every invitation email is sent from one job
+    job_mock.assert_called_once()
+    assert len(job_mock.call_args[0][0]) == 3
+
+
+def test_invite_members_with_invalid_rows(monkeypatch, client, user_session, session):
+    job_mock = Mock()
+    monkeypatch.setattr("atat.jobs.send_mails.delay", job_mock)
+    valid = UserFactory.dictionary()
+    invalid = UserFactory.dictionary(email="not an email")
+    portfolio = PortfolioFactory.create()
+    user_session(portfolio.owner)
+
+    response = client.post(
+        url_for("portfolios.invite_members", portfolio_id=portfolio.id),
+        json=[
+            {key: member[key] for key in ("first_name", "last_name", "email", "dod_id")}
+            for member in (valid, invalid)
+        ],
+    )
+
+    assert response.status_code == 400
+    assert "Row 2" in response.json["errors"][0]
+    # nobody is invited unless every row is valid
+    assert (
+        session.query(PortfolioInvitation).filter_by(dod_id=valid["dod_id"]).count()
+        == 0
+    )
+    assert not job_mock.called
@@ -0,0 +1,81 @@
+import pytest
+from flask import url_for
+
+from tests.factories import PortfolioFactory, TaskOrderFactory
+
+SAMPLE_PDF = "tests/fixtures/sample.pdf"
+
+
+@pytest.fixture
+def task_order():
+    portfolio = PortfolioFactory.create()
+    return TaskOrderFactory.create(portfolio=portfolio)
+
+
+@pytest.fixture
+def sample_pdf():
+    with open(SAMPLE_PDF, "rb") as pdf:
+        return pdf.read()
+
+
+@pytest.fixture
+def download(client, user_session, task_order):
+    user_session(task_order.portfolio.owner)
+    url = url_for("task_orders.download_task_order_pdf", task_order_id=task_order.id)
+
+    def _download(**headers):
+        return client.get(url, headers=headers)
+
+    return _download
+
+
+def test_download_streams_whole_file(download, sample_pdf, task_order):
+    response = download()
+    assert response.status_code == 200
+    assert response.data == sample_pdf
+    assert response.content_length == len(sample_pdf)
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert task_order.pdf.filename in response.headers["Content-Disposition"]
+    assert response.headers["ETag"]
+
+
+def test_download_streams_in_chunks(app, download, sample_pdf, monkeypatch):
+    monkeypatch.setattr(app.csp.files, "chunk_size", 100)
+    chunks = list(download().response)
+    assert b"".join(chunks) == sample_pdf
+    assert max(len(chunk) for chunk in chunks) == 100
+
+
+def test_download_not_modified(download):
+    etag = download().headers["ETag"]
+    response = download(**{"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_download_range(download, sample_pdf):
+    response = download(Range="bytes=10-19")
+    assert response.status_code == 206
+    assert response.data == sample_pdf[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(sample_pdf)}"
+
+    response = download(Range="bytes=-5")
+    assert response.status_code == 206
+    assert response.data == sample_pdf[-5:]
+
+
+def test_download_unsatisfiable_range(download, sample_pdf):
+    response = download(Range=f"bytes={len(sample_pdf)}-")
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(sample_pdf)}"
+
+
+def test_download_range_ignored_when_file_changed(download, sample_pdf):
+    etag = download().headers["ETag"]
+
+    response = download(Range="bytes=0-9", **{"If-Range": etag})
+    assert response.status_code == 206
+
+    response = download(Range="bytes=0-9", **{"If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.data == sample_pdf
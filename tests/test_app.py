@@ -1,6 +1,7 @@
 from flask import Response
 
-from atat.app import set_response_content_security_policy_headers
+from atat.app import make_worker_app, set_response_content_security_policy_headers
+from atat.utils.config import make_config
 
 
 def test_response_content_security_policy_headers():
@@ -9,3 +10,14 @@ def test_response_content_security_policy_headers():
     set_response_content_security_policy_headers(response, "foobar")
     assert response.headers["Content-Security-Policy"] == "foobar"
     assert response.headers["X-Content-Security-Policy"] == "foobar"
+
+
+def test_worker_app_skips_web_setup(monkeypatch):
+    # Keep the test app's Celery configuration
+    monkeypatch.setattr("atat.app.update_celery", lambda *args: None)
+    app = make_worker_app(make_config({"default": {"CSP_LAZY_INIT": True}}))
+
+    assert not app.blueprints
+    assert "csrf" not in app.extensions
+    assert "cloud" not in app.csp.__dict__
+    assert app.mailer and app.portfolio_spending
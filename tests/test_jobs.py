@@ -1,4 +1,4 @@
-from smtplib import SMTPException
+from smtplib import SMTPDataError, SMTPException, SMTPServerDisconnected
 from unittest.mock import MagicMock, Mock, patch
 from uuid import uuid4
 
@@ -7,9 +7,17 @@ import pytest
 from azure.core.exceptions import AzureError
 
 from atat.domain.csp.cloud import MockCloudProvider
-from atat.domain.csp.cloud.exceptions import ConnectionException, GeneralCSPException
+from atat.domain.csp.cloud.exceptions import (
+    ConnectionException,
+    GeneralCSPException,
+    ResourceProvisioningError,
+    ThrottlingException,
+)
 from atat.domain.csp.cloud.models import (
+    EnvironmentCSPResult,
+    ManagementGroupOperationCSPResult,
     SubscriptionCreationCSPPayload,
+    UserCSPResult,
     UserRoleCSPResult,
 )
 from atat.domain.csp.cloud.utils import OFFICE_365_DOMAIN
@@ -23,27 +31,38 @@ from atat.jobs import (
     dispatch_create_environment_role,
     dispatch_create_user,
     dispatch_provision_portfolio,
+    dispatch_refresh_portfolio_spending,
     do_create_application,
     do_create_environment,
     do_create_environment_role,
     do_create_subscription,
     do_create_user,
+    do_create_users_batch,
+    do_poll_management_group_operations,
+    do_process_pending_environment_roles,
+    do_process_pending_environments,
+    do_process_pending_users,
     do_provision_portfolio,
     log_do_create_environment,
     make_initial_csp_data,
     provision_portfolio,
+    send_mails,
     send_ppoc_email,
+    send_queued_mail,
     send_task_order_files,
 )
 from atat.models import (
     ApplicationRoleStatus,
+    CSPRole,
     EnvironmentRoleStatus,
     JobFailure,
     Portfolio,
     PortfolioStates,
 )
 from atat.models.mixins.state_machines import AzureStages
+from atat.utils.dispatcher import DispatchMetrics
 from atat.utils.localization import translate
+from atat.utils.mailer import OUTBOX_KEY, MailBatchError
 from tests.factories import (
     ApplicationFactory,
     ApplicationRoleFactory,
@@ -355,6 +374,343 @@ def test_dispatch_provision_portfolio(csp, monkeypatch):
     mock.delay.assert_called_once_with(portfolio_id=portfolio.id)
 
 
+def test_dispatch_refresh_portfolio_spending(monkeypatch):
+    provisioned = PortfolioFactory.create(state="COMPLETED")
+    PortfolioFactory.create(state="UNSTARTED")
+    PortfolioFactory.create(state="COMPLETED", deleted=True)
+    request_refresh = Mock()
+    monkeypatch.setattr("atat.jobs.Reports.request_spending_refresh", request_refresh)
+
+    dispatch_refresh_portfolio_spending.run()
+
+    request_refresh.assert_called_once_with(provisioned.id)
+
+
+def test_dispatch_batched(app, monkeypatch):
+    portfolio = PortfolioFactory.create(state="COMPLETED")
+    application = ApplicationFactory.create(portfolio=portfolio)
+
+    monkeypatch.setitem(app.config, "DISPATCH_BATCHED", True)
+    dispatcher = Mock()
+    dispatcher.dispatch.return_value = DispatchMetrics(1, 1, 0)
+    monkeypatch.setattr(app, "dispatcher", dispatcher)
+    mock = Mock()
+    monkeypatch.setattr("atat.jobs.create_application", mock)
+
+    dispatch_create_application.run()
+
+    dispatcher.dispatch.assert_called_once_with(
+        mock, "application_id", [application.id]
+    )
+    mock.delay.assert_not_called()
+
+
+def test_dispatch_claimers(app, monkeypatch):
+    monkeypatch.setitem(app.config, "CLAIM_PENDING_WORK", True)
+    monkeypatch.setitem(app.config, "CLAIM_CONCURRENCY", 3)
+    claimer = Mock()
+    monkeypatch.setattr("atat.jobs.process_pending_environment_roles", claimer)
+    single = Mock()
+    monkeypatch.setattr("atat.jobs.create_environment_role", single)
+
+    dispatch_create_environment_role.run()
+
+    assert claimer.delay.call_count == 3
+    single.delay.assert_not_called()
+
+
+def test_process_pending_environments(csp, session, monkeypatch):
+    monkeypatch.setattr("atat.jobs.current_task", Mock(request=Mock(id="task-id")))
+    portfolio = PortfolioFactory.create(
+        csp_data={"tenant_id": "fake"},
+        applications=[{"environments": [{}, {}], "cloud_id": "parentId"}],
+        task_orders=[
+            {"create_clins": [{"start_date": YESTERDAY, "end_date": TOMORROW}]}
+        ],
+    )
+    environments = portfolio.applications[0].environments
+    csp.create_environment.side_effect = [
+        GeneralCSPException("oops"),
+        EnvironmentCSPResult(id="env-cloud-id", name="env"),
+    ]
+
+    with patch("atat.jobs.create_subscription"):
+        processed = do_process_pending_environments(csp, limit=10)
+
+    assert sorted(processed) == sorted(e.id for e in environments)
+    for environment in environments:
+        session.refresh(environment)
+        assert environment.claimed_until is None
+    assert len([e for e in environments if e.cloud_id]) == 1
+    failed = next(e for e in environments if e.cloud_id is None)
+    assert _find_failure(session, "environment", str(failed.id)).task_id == "task-id"
+
+
+def test_process_pending_users(csp, session, monkeypatch):
+    monkeypatch.setattr("atat.jobs.send_mail", Mock())
+    application = ApplicationFactory.create(
+        cloud_id="123",
+        portfolio=PortfolioFactory.create(
+            csp_data={"tenant_id": "123", "domain_name": "rebelalliance"}
+        ),
+    )
+    app_role = ApplicationRoleFactory.create(
+        application=application, status=ApplicationRoleStatus.ACTIVE, cloud_id=None
+    )
+
+    assert do_process_pending_users(csp, limit=10) == [[app_role.id]]
+
+    session.refresh(app_role)
+    assert app_role.cloud_id
+    assert app_role.claimed_until is None
+
+
+def test_process_pending_environment_roles(csp, session, monkeypatch):
+    monkeypatch.setattr("atat.jobs.send_mail", Mock())
+    portfolio = PortfolioFactory.create(csp_data={"tenant_id": "123"})
+    app_role = ApplicationRoleFactory.create(
+        application=ApplicationFactory.create(portfolio=portfolio),
+        status=ApplicationRoleStatus.ACTIVE,
+        cloud_id="123",
+    )
+    env = EnvironmentFactory.create(application=app_role.application, cloud_id="123")
+    env_role = EnvironmentRoleFactory.create(
+        environment=env, application_role=app_role, role=CSPRole.ADMIN
+    )
+
+    assert do_process_pending_environment_roles(csp, limit=10) == [env_role.id]
+
+    session.refresh(env_role)
+    assert env_role.cloud_id
+    assert env_role.claimed_until is None
+
+
+class TestConcurrentProvisioning:
+    @pytest.fixture(autouse=True)
+    def async_provisioning(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, "CSP_ASYNC_PROVISIONING", True)
+        monkeypatch.setattr("atat.jobs.send_mail", Mock())
+
+    def make_app_role(self):
+        return ApplicationRoleFactory.create(
+            application=ApplicationFactory.create(
+                cloud_id="123",
+                portfolio=PortfolioFactory.create(
+                    csp_data={"tenant_id": "123", "domain_name": "rebelalliance"}
+                ),
+            ),
+            status=ApplicationRoleStatus.ACTIVE,
+            cloud_id=None,
+        )
+
+    def test_dispatch_create_user_enqueues_one_batch(self, monkeypatch):
+        app_roles = [self.make_app_role() for _ in range(2)]
+        mock = Mock()
+        monkeypatch.setattr("atat.jobs.create_users_batch", mock)
+
+        dispatch_create_user.run()
+
+        groups = mock.delay.call_args.kwargs["application_role_id_groups"]
+        assert sorted(groups) == sorted([ar.id] for ar in app_roles)
+
+    def test_create_users_batch(self, csp, session, monkeypatch):
+        monkeypatch.setattr("atat.jobs.current_task", Mock(request=Mock(id="task-id")))
+        created, failed = self.make_app_role(), self.make_app_role()
+
+        def create_user(payload):
+            if payload.email == failed.user.email:
+                raise GeneralCSPException("oops")
+            return UserCSPResult(id="user-cloud-id")
+
+        csp.create_user.side_effect = create_user
+
+        processed = do_create_users_batch(csp, [[created.id], [failed.id]])
+
+        assert sorted(processed) == sorted([[created.id], [failed.id]])
+        session.refresh(created)
+        session.refresh(failed)
+        assert created.cloud_id == "user-cloud-id"
+        assert failed.cloud_id is None
+        assert created.claimed_until is None
+        assert failed.claimed_until is None
+        failure = _find_failure(session, "application_role", str(failed.id))
+        assert failure.task_id == "task-id"
+        assert session.query(JobFailure).count() == 1
+
+    def test_create_users_batch_with_graph_batching(
+        self, app, csp, session, monkeypatch
+    ):
+        monkeypatch.setitem(app.config, "AZURE_GRAPH_BATCHING", True)
+        app_roles = [self.make_app_role() for _ in range(3)]
+
+        do_create_users_batch(csp, [[ar.id] for ar in app_roles])
+
+        csp.create_users.assert_called_once()
+        assert len(csp.create_users.call_args.args[0]) == 3
+        for app_role in app_roles:
+            session.refresh(app_role)
+            assert app_role.cloud_id
+
+    def test_create_users_batch_skips_claimed_roles(self, csp, session):
+        app_role = self.make_app_role()
+        app_role.claimed_until = pendulum.now(tz="UTC").add(minutes=5)
+        session.add(app_role)
+        session.commit()
+
+        assert do_create_users_batch(csp, [[app_role.id]]) == []
+        csp.create_user.assert_not_called()
+
+    def test_process_pending_environment_roles(self, csp, session):
+        app_role = self.make_app_role()
+        app_role.cloud_id = "123"
+        env_roles = [
+            EnvironmentRoleFactory.create(
+                environment=EnvironmentFactory.create(
+                    application=app_role.application, cloud_id="123"
+                ),
+                application_role=app_role,
+                role=role,
+            )
+            for role in (CSPRole.ADMIN, CSPRole.CONTRIBUTOR)
+        ]
+
+        processed = do_process_pending_environment_roles(csp, limit=10)
+
+        assert sorted(processed) == sorted(env_role.id for env_role in env_roles)
+        for env_role in env_roles:
+            session.refresh(env_role)
+            assert env_role.cloud_id
+            assert env_role.claimed_until is None
+
+
+class TestManagementGroupOperations:
+    OPERATION = {
+        "management_group_name": "group",
+        "status_url": "https://status",
+        "result_url": "https://result",
+        "parent_id": "/providers/Microsoft.Management/managementGroups/parent",
+    }
+
+    def test_create_application_records_operation(self, csp, session):
+        portfolio = PortfolioFactory.create(csp_data={"tenant_id": "fake"})
+        application = ApplicationFactory.create(portfolio=portfolio, cloud_id=None)
+        csp.create_application.return_value = ManagementGroupOperationCSPResult(
+            management_group_name="group",
+            status_url="https://status",
+            result_url="https://result",
+        )
+
+        do_create_application(csp, application.id)
+
+        session.refresh(application)
+        assert application.cloud_id is None
+        assert application.csp_operation == {
+            **self.OPERATION,
+            "parent_id": "/providers/Microsoft.Management/managementGroups/fake",
+        }
+
+    def test_create_environment_records_operation(self, csp, session):
+        application = ApplicationFactory.create(
+            portfolio=PortfolioFactory.create(csp_data={"tenant_id": "fake"}),
+            cloud_id=self.OPERATION["parent_id"],
+        )
+        environment = EnvironmentFactory.create(application=application)
+        csp.create_environment.return_value = ManagementGroupOperationCSPResult(
+            management_group_name="group",
+            status_url="https://status",
+            result_url="https://result",
+        )
+
+        with patch("atat.jobs.create_subscription") as create_subscription:
+            do_create_environment(csp, environment.id)
+
+        session.refresh(environment)
+        assert environment.cloud_id is None
+        assert environment.csp_operation == self.OPERATION
+        create_subscription.delay.assert_not_called()
+
+    def test_poll_completes_operations(self, csp, session):
+        portfolio = PortfolioFactory.create(csp_data={"tenant_id": "fake"})
+        application = ApplicationFactory.create(
+            portfolio=portfolio, csp_operation=self.OPERATION
+        )
+        environment = EnvironmentFactory.create(
+            application=application, csp_operation=self.OPERATION
+        )
+
+        with patch("atat.jobs.create_subscription") as create_subscription:
+            polled = do_poll_management_group_operations(csp, limit=10)
+
+        assert polled == [application.id, environment.id]
+        session.refresh(application)
+        session.refresh(environment)
+        assert application.cloud_id.endswith("/group")
+        assert environment.cloud_id.endswith("/group")
+        assert application.csp_operation is None
+        assert environment.csp_operation is None
+        assert environment.claimed_until is None
+        create_subscription.delay.assert_called_once_with(environment_id=environment.id)
+
+    def test_poll_leaves_running_operations(self, csp, session):
+        application = ApplicationFactory.create(
+            portfolio=PortfolioFactory.create(csp_data={"tenant_id": "fake"}),
+            csp_operation=self.OPERATION,
+        )
+        csp.check_management_group_operation.return_value = None
+
+        do_poll_management_group_operations(csp, limit=10)
+
+        session.refresh(application)
+        assert application.cloud_id is None
+        assert application.csp_operation == self.OPERATION
+        assert application.claimed_until is None
+
+    def test_poll_clears_failed_operations(self, csp, session):
+        application = ApplicationFactory.create(
+            portfolio=PortfolioFactory.create(csp_data={"tenant_id": "fake"}),
+            csp_operation=self.OPERATION,
+        )
+        csp.check_management_group_operation.side_effect = ResourceProvisioningError(
+            "management group", "failed"
+        )
+
+        do_poll_management_group_operations(csp, limit=10)
+
+        session.refresh(application)
+        assert application.cloud_id is None
+        assert application.csp_operation is None
+
+
+def test_record_failure_releases_inflight_id(app, monkeypatch):
+    monkeypatch.setitem(app.config, "DISPATCH_BATCHED", True)
+    dispatcher = Mock()
+    monkeypatch.setattr(app, "dispatcher", dispatcher)
+    task = RecordFailure()
+    task.name = "atat.jobs.create_environment"
+    environment_id = uuid4()
+
+    task.after_return("RETRY", None, "1", (), {"environment_id": environment_id}, None)
+    dispatcher.release.assert_not_called()
+
+    task.after_return(
+        "SUCCESS", None, "1", (), {"environment_id": environment_id}, None
+    )
+    dispatcher.release.assert_called_once_with(task.name, environment_id)
+
+
+def test_record_failure_waits_out_throttling(monkeypatch):
+    retry = Mock()
+    monkeypatch.setattr("celery.app.task.Task.retry", retry)
+    task = RecordFailure()
+    exc = ThrottlingException("create_user", 45)
+
+    task.retry(exc=exc)
+    retry.assert_called_with(exc=exc, countdown=45, eta=None)
+
+    task.retry(exc=exc, countdown=5)
+    retry.assert_called_with(exc=exc, countdown=5, eta=None)
+
+
 class TestDoProvisionPortfolio:
     @patch("atat.models.PortfolioStateMachine.trigger_next_transition")
     def test_portfolio_has_state_machine(
@@ -409,6 +765,97 @@ def test_send_ppoc_email(monkeypatch, app):
     )
 
 
+def test_send_ppoc_email_when_mail_is_batched(monkeypatch, app):
+    monkeypatch.setitem(app.config, "MAIL_BATCHED", True)
+    mock = Mock()
+    monkeypatch.setattr("atat.jobs.send_mail", mock)
+    app.redis.delete(OUTBOX_KEY)
+
+    send_ppoc_email(
+        {
+            "password_recovery_email_address": "example@example.com",
+            "user_id": "userid",
+            "domain_name": "domain",
+        }
+    )
+
+    [message] = app.mail_outbox.take()
+    assert message["recipients"] == ["example@example.com"]
+    assert not mock.called
+
+
+def test_send_mails_skips_mail_that_cannot_be_sent(app, monkeypatch):
+    connection = Mock()
+    connection.send_many.side_effect = [
+        MailBatchError(1, SMTPDataError(554, b"Message rejected")),
+        None,
+    ]
+    monkeypatch.setattr(app.mailer, "connection", connection)
+    logger = Mock()
+    monkeypatch.setattr(app, "logger", logger)
+    recipients = ["a@example.com", "b@example.com", "c@example.com", "d@example.com"]
+
+    send_mails.run(
+        [
+            {"recipients": [recipient], "subject": "subject", "body": "body"}
+            for recipient in recipients
+        ]
+    )
+
+    batches = [call[0][0] for call in connection.send_many.call_args_list]
+    assert [[message["To"] for message in batch] for batch in batches] == [
+        recipients,
+        recipients[2:],
+    ]
+    assert logger.error.call_args[0][1] == ["b@example.com"]
+
+
+class TestSendQueuedMail:
+    @pytest.fixture
+    def connection(self, app, monkeypatch):
+        connection = Mock()
+        monkeypatch.setattr(app.mailer, "connection", connection)
+        monkeypatch.setattr(app.mail_outbox, "batch_size", 2)
+        app.redis.delete(OUTBOX_KEY)
+        for recipient in ["a@example.com", "b@example.com", "c@example.com"]:
+            app.mail_outbox.put([recipient], "subject", "body")
+        yield connection
+        app.redis.delete(OUTBOX_KEY)
+
+    def test_sends_in_batches(self, app, connection):
+        send_queued_mail.run()
+
+        assert connection.send_many.call_count == 2
+        batches = [call[0][0] for call in connection.send_many.call_args_list]
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert batches[1][0]["To"] == "c@example.com"
+        assert len(app.mail_outbox) == 0
+
+    def test_leaves_unsent_mail_in_outbox(self, app, connection):
+        connection.send_many.side_effect = MailBatchError(1, SMTPServerDisconnected())
+
+        send_queued_mail.run()
+
+        assert connection.send_many.call_count == 1
+        unsent = app.mail_outbox.take()
+        assert [message["recipients"] for message in unsent] == [
+            ["b@example.com"],
+            ["c@example.com"],
+        ]
+        assert "attempts" not in unsent[0]
+
+    def test_counts_an_attempt_for_rejected_mail(self, app, connection):
+        connection.send_many.side_effect = MailBatchError(
+            1, SMTPDataError(554, b"Message rejected")
+        )
+
+        send_queued_mail.run()
+
+        unsent = app.mail_outbox.take()
+        assert unsent[0]["recipients"] == ["b@example.com"]
+        assert unsent[0]["attempts"] == 1
+
+
 class TestProvisionPortfolio:
     @patch("atat.jobs.do_provision_portfolio")
     def test_calls_do_provision_portfolio(self, do_provision_portfolio, app, portfolio):
@@ -4,8 +4,10 @@ from unittest.mock import Mock
 
 import pendulum
 from flask import template_rendered
+from sqlalchemy import event
 
 import tests.factories as factories
+from atat.database import db
 from atat.utils.notification_sender import NotificationSender
 
 
@@ -23,6 +25,20 @@ def captured_templates(app):
         template_rendered.disconnect(record, app)
 
 
+@contextmanager
+def captured_statements():
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield recorded
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
 class FakeLogger:
     def __init__(self):
         self.messages = []
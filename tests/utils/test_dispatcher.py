@@ -0,0 +1,78 @@
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+import pytest
+
+from atat.utils.dispatcher import BatchDispatcher, DispatchMetrics
+
+
+@pytest.fixture
+def task():
+    task = Mock()
+    task.name = f"atat.jobs.test_task_{uuid4().hex}"
+    return task
+
+
+@pytest.fixture
+def dispatcher(app):
+    return BatchDispatcher(app.redis, chunk_size=2, inflight_ttl=60)
+
+
+@patch("atat.utils.dispatcher.group")
+def test_dispatch_enqueues_chunked_groups(group, dispatcher, task):
+    ids = [uuid4() for _ in range(5)]
+
+    metrics = dispatcher.dispatch(task, "environment_id", ids)
+
+    assert metrics == DispatchMetrics(found=5, enqueued=5, deduplicated=0)
+    assert group.call_count == 3
+    assert group.return_value.apply_async.call_count == 3
+    for id_ in ids:
+        task.s.assert_any_call(environment_id=id_)
+
+
+@patch("atat.utils.dispatcher.group")
+def test_dispatch_skips_inflight_ids(group, dispatcher, task):
+    ids = [uuid4(), uuid4()]
+    dispatcher.dispatch(task, "environment_id", ids[:1])
+    task.s.reset_mock()
+
+    metrics = dispatcher.dispatch(task, "environment_id", ids)
+
+    assert metrics == DispatchMetrics(found=2, enqueued=1, deduplicated=1)
+    task.s.assert_called_once_with(environment_id=ids[1])
+
+
+@patch("atat.utils.dispatcher.group")
+def test_dispatch_after_release(group, dispatcher, task):
+    id_groups = [[uuid4(), uuid4()]]
+    dispatcher.dispatch(task, "application_role_ids", id_groups)
+    dispatcher.release(task.name, list(reversed(id_groups[0])))
+
+    metrics = dispatcher.dispatch(task, "application_role_ids", id_groups)
+
+    assert metrics.enqueued == 1
+
+
+@patch("atat.utils.dispatcher.group")
+def test_dispatch_after_ttl_expires(group, app, task):
+    dispatcher = BatchDispatcher(app.redis, inflight_ttl=0)
+    id_ = uuid4()
+    dispatcher.dispatch(task, "environment_id", [id_])
+
+    metrics = dispatcher.dispatch(task, "environment_id", [id_])
+
+    assert metrics.enqueued == 1
+
+
+@patch("atat.utils.dispatcher.group")
+def test_dispatch_releases_ids_when_enqueue_fails(group, dispatcher, task):
+    group.return_value.apply_async.side_effect = [None, ConnectionError()]
+    ids = [uuid4() for _ in range(4)]
+
+    with pytest.raises(ConnectionError):
+        dispatcher.dispatch(task, "environment_id", ids)
+
+    group.return_value.apply_async.side_effect = None
+    metrics = dispatcher.dispatch(task, "environment_id", ids)
+    assert metrics == DispatchMetrics(found=4, enqueued=2, deduplicated=2)
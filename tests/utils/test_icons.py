@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from atat.utils.icons import IconRegistry, minify_svg
+
+SVG = """<!-- a comment -->
+<svg viewBox="0 0 16 16">
+    <path d="M0 0h16v16H0z"/>
+</svg>
+"""
+
+
+@pytest.fixture
+def icons_dir(tmp_path):
+    (tmp_path / "check.svg").write_text(SVG)
+    (tmp_path / "notes.txt").write_text("not an icon")
+    return tmp_path
+
+
+def test_loads_every_svg_once(icons_dir, monkeypatch):
+    registry = IconRegistry(str(icons_dir))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("icon was read from disk")
+
+    monkeypatch.setattr("builtins.open", fail)
+    assert registry.get("check") == SVG
+    assert list(registry.icons) == ["check"]
+    with pytest.raises(TypeError):
+        registry.icons["check"] = ""
+
+
+def test_missing_icon_raises(icons_dir):
+    registry = IconRegistry(str(icons_dir))
+    with pytest.raises(FileNotFoundError):
+        registry.get("notes")
+
+
+def test_minify_svg():
+    assert minify_svg(SVG) == (
+        '<svg viewBox="0 0 16 16"><path d="M0 0h16v16H0z"/></svg>'
+    )
+    assert IconRegistry(minify=True).get("alert") == minify_svg(
+        IconRegistry().get("alert")
+    )
+
+
+def test_watch_reloads_changed_icons(icons_dir):
+    registry = IconRegistry(str(icons_dir), watch=True)
+    registry.watch_interval = 0
+
+    (icons_dir / "check.svg").write_text("<svg/>")
+    os.utime(icons_dir / "check.svg", ns=(0, 0))
+    (icons_dir / "added.svg").write_text("<svg></svg>")
+
+    assert registry.get("check") == "<svg/>"
+    assert registry.get("added") == "<svg></svg>"
+
+
+def test_registry_serves_the_icon_filter(app):
+    assert app.jinja_env.filters["iconSvg"]("alert") == app.icons.icons["alert"]
@@ -1,6 +1,13 @@
+import os
+
 import pytest
 
-from atat.utils.localization import LocalizationInvalidKeyError, all_keys, translate
+from atat.utils.localization import (
+    LocalizationInvalidKeyError,
+    all_keys,
+    load_catalogue,
+    translate,
+)
 
 
 def test_looking_up_existing_key():
@@ -29,3 +36,63 @@ def test_all_keys():
     assert "testing.example_with_variables" in all_keys()
     assert "testing.nested.example" in all_keys()
     assert not "testing.nested.missing" in all_keys()
+
+
+TRANSLATIONS = """
+greeting: Hello
+  World
+braces: "{{ literal }}"
+nested:
+  welcome: "Welcome, {name}!"
+"""
+
+
+@pytest.fixture
+def translations_file(tmp_path):
+    file_name = tmp_path / "translations.yaml"
+    file_name.write_text(TRANSLATIONS)
+    return str(file_name)
+
+
+def test_catalogue_precompiles_static_strings(translations_file):
+    catalogue = load_catalogue(translations_file)
+    assert catalogue.static == {"greeting": "Hello World", "braces": "{ literal }"}
+    assert catalogue.templates == {"nested.welcome": "Welcome, {name}!"}
+    assert catalogue.translate("nested.welcome", {"name": "Ada"}) == "Welcome, Ada!"
+    assert catalogue.keys() == ["greeting", "braces", "nested.welcome"]
+    with pytest.raises(LocalizationInvalidKeyError):
+        catalogue.translate("nested")
+
+
+def test_catalogue_cache_is_reused_until_file_changes(translations_file, tmp_path):
+    cache_file = str(tmp_path / "translations.json")
+    mtime_ns = load_catalogue(translations_file, cache_file).mtime_ns
+
+    with open(translations_file, "a") as translations:
+        translations.write("farewell: Goodbye\n")
+
+    os.utime(translations_file, ns=(mtime_ns, mtime_ns))
+    assert "farewell" not in load_catalogue(translations_file, cache_file).keys()
+
+    os.utime(translations_file, ns=(mtime_ns, mtime_ns + 1))
+    catalogue = load_catalogue(translations_file, cache_file)
+    assert catalogue.translate("farewell") == "Goodbye"
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        b"\x80\x04not json",
+        b"[]",
+        b'{"version": 1}',
+        b'{"version": 1, "static": {"greeting": []}, "templates": {}, "mtime_ns": 0}',
+    ],
+)
+def test_unreadable_catalogue_cache_is_rebuilt(translations_file, tmp_path, contents):
+    cache_file = tmp_path / "translations.json"
+    cache_file.write_bytes(contents)
+
+    catalogue = load_catalogue(translations_file, str(cache_file))
+
+    assert catalogue.translate("greeting") == "Hello World"
+    assert load_catalogue(translations_file, str(cache_file)).static == catalogue.static
@@ -1,9 +1,19 @@
+import smtplib
 from email.mime.base import MIMEBase
 
 import pytest
 
 from atat.utils.localization import translate
-from atat.utils.mailer import MailConnection, Mailer, RedisConnection
+from atat.utils.mailer import (
+    OUTBOX_KEY,
+    MailBatchError,
+    MailConnection,
+    Mailer,
+    MailOutbox,
+    PooledSMTPConnection,
+    RedisConnection,
+    SMTPConnection,
+)
 
 
 class MockConnection(MailConnection):
@@ -103,3 +113,155 @@ def test_send_with_attachment(app, mailer, downloaded_task_order):
         attachment["Content-Disposition"]
         == f"attachment; filename=\"{downloaded_task_order['name']}\""
     )
+
+
+class FakeSMTP(object):
+    connections = []
+    refuse = set()
+
+    def __init__(self, server, port):
+        self.sent = []
+        self.connected = True
+        FakeSMTP.connections.append(self)
+
+    def starttls(self):
+        pass
+
+    def set_debuglevel(self, level):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def noop(self):
+        if not self.connected:
+            raise smtplib.SMTPServerDisconnected()
+        return (250, b"OK")
+
+    def send_message(self, message):
+        if not self.connected:
+            raise smtplib.SMTPServerDisconnected()
+        if message["To"] in self.refuse:
+            raise smtplib.SMTPRecipientsRefused({message["To"]: (550, b"No")})
+        self.sent.append(message["To"])
+
+    def quit(self):
+        self.connected = False
+
+    def close(self):
+        self.connected = False
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    FakeSMTP.connections = []
+    FakeSMTP.refuse = set()
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+def _smtp_mailer(connection_class, **kwargs):
+    connection = connection_class(
+        "smtp.example.com", 587, "user", "password", use_tls=True, **kwargs
+    )
+    return Mailer(connection, "test@atat.com")
+
+
+def _messages(*recipients):
+    return [
+        {"recipients": [recipient], "subject": "help", "body": "my only hope"}
+        for recipient in recipients
+    ]
+
+
+def test_pooled_connection_reuses_one_login(smtp):
+    mailer = _smtp_mailer(PooledSMTPConnection)
+    for message in _messages("a@atat.com", "b@atat.com"):
+        mailer.send(**message)
+    mailer.send_many(_messages("c@atat.com", "d@atat.com"))
+
+    assert len(smtp.connections) == 1
+    assert smtp.connections[0].sent == [
+        "a@atat.com",
+        "b@atat.com",
+        "c@atat.com",
+        "d@atat.com",
+    ]
+
+    mailer.connection.close()
+    assert not smtp.connections[0].connected
+
+
+def test_pooled_connection_replaces_dropped_connections(smtp):
+    mailer = _smtp_mailer(PooledSMTPConnection, health_check_interval=0)
+    mailer.send(**_messages("a@atat.com")[0])
+    smtp.connections[0].connected = False
+
+    # the idle connection fails its health check
+    mailer.send(**_messages("b@atat.com")[0])
+    assert len(smtp.connections) == 2
+
+    mailer.connection.health_check_interval = 60
+    smtp.connections[1].connected = False
+
+    # the connection is dropped before it is due a health check
+    mailer.send_many(_messages("c@atat.com", "d@atat.com"))
+    assert len(smtp.connections) == 3
+    assert smtp.connections[2].sent == ["c@atat.com", "d@atat.com"]
+
+
+@pytest.mark.parametrize("connection_class", [SMTPConnection, PooledSMTPConnection])
+def test_send_many_reports_messages_sent(smtp, connection_class):
+    mailer = _smtp_mailer(connection_class)
+    mailer.send(**_messages("a@atat.com")[0])
+    smtp.refuse = {"c@atat.com"}
+
+    with pytest.raises(MailBatchError) as error:
+        mailer.send_many(_messages("b@atat.com", "c@atat.com", "d@atat.com"))
+
+    assert error.value.sent == 1
+    assert isinstance(error.value.error, smtplib.SMTPRecipientsRefused)
+    assert "d@atat.com" not in smtp.connections[-1].sent
+
+
+@pytest.fixture
+def outbox(app):
+    app.redis.delete(OUTBOX_KEY)
+    yield MailOutbox(app.redis, batch_size=2, max_attempts=2)
+    app.redis.delete(OUTBOX_KEY)
+
+
+def test_mail_outbox_sends_in_batches(outbox):
+    for message in _messages("a@atat.com", "b@atat.com", "c@atat.com"):
+        outbox.put(**message)
+
+    assert outbox.take() == _messages("a@atat.com", "b@atat.com")
+    assert outbox.take() == _messages("c@atat.com")
+    assert outbox.take() == []
+
+
+def test_mail_outbox_puts_back_unsent_mail(outbox):
+    outbox.put(**_messages("c@atat.com")[0])
+    unsent = _messages("a@atat.com", "b@atat.com")
+
+    # a connection error does not count as an attempt
+    assert outbox.put_back(unsent) is None
+    assert outbox.take() == unsent
+
+    assert outbox.put_back(unsent, rejected=True) is None
+    failed, *rest = outbox.take()
+    assert failed == {**unsent[0], "attempts": 1}
+    assert rest == unsent[1:]
+
+    # the message is dropped once it is out of attempts
+    dropped = outbox.put_back([failed], rejected=True)
+    assert dropped["recipients"] == ["a@atat.com"]
+    assert outbox.take() == _messages("c@atat.com")
+
+
+def test_mail_batch_error_is_rejected_for_refused_messages():
+    refused = smtplib.SMTPRecipientsRefused({"a@atat.com": (550, b"no")})
+    assert MailBatchError(0, refused).rejected
+    assert MailBatchError(0, smtplib.SMTPDataError(554, b"no")).rejected
+    assert not MailBatchError(0, smtplib.SMTPServerDisconnected()).rejected
+    assert not MailBatchError(0, ConnectionRefusedError()).rejected